@@ -0,0 +1,762 @@
+"""
+性能测试脚本，不需要显示设备即可运行。
+用法：python Benchmark.py [测试项 ...]，不指定测试项时运行全部测试（不含suite）。
+python Benchmark.py suite [--sizes 61,251] [--output benchmark.json]：以固定的种子对各生成器与a*做基准测试，
+记录耗时与内存峰值，结果写入JSON文件；python Benchmark.py --compare old.json new.json：对比两次的结果（如两个提交之间）。
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from time import perf_counter
+
+from config import MapGridType
+
+
+# 在时间预算内重复执行func，返回平均每次耗时（秒）
+def time_repeated(func, max_runs, min_time=1.0):
+    runs = 0
+    start = perf_counter()
+    elapsed = 0.0
+    while runs < max_runs and (runs == 0 or elapsed < min_time):
+        func()
+        runs += 1
+        elapsed = perf_counter() - start
+    return elapsed / runs
+
+
+# 测试MazePlay中两种绘制模式的帧率
+def bench_render(sizes=(61, 301, 1001), frames=30):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from MazePlay import Game
+
+    print('%-8s %-8s %12s %12s %8s' % ('cells', 'rec_size', 'rect fps', 'numpy fps', 'gain'))
+    for size in sizes:
+        rec_size = max(1, 610 // size)
+        fps = {}
+        for mode in ('rect', 'numpy'):
+            game = Game(size, size, rec_size, render_mode=mode)
+            # 没有安装numpy时Game会退回rect模式，此时不做测试
+            if game.render_mode != mode:
+                fps[mode] = float('nan')
+                continue
+            game.maze_generator = 'backtrack'
+            game.reset_maze()
+            game.maze.generator.generate()
+            game.maze.astar.search()
+            fps[mode] = 1.0 / time_repeated(game.draw_maze, frames)
+        print('%-8d %-8d %12.1f %12.1f %7.1fx' % (size, rec_size, fps['rect'], fps['numpy'],
+                                                  fps['numpy'] / fps['rect']))
+
+
+# 测试生成器的耗时随迷宫尺寸的变化。scaled cells即路径单元数，约为单元总数的1/4
+def bench_generator_scaling(generator, sizes, **maze_kwargs):
+    from MazeGenerator import Maze
+
+    label = ' '.join([generator] + ['%s=%s' % item for item in sorted(maze_kwargs.items())])
+    print('%-30s %-8s %14s %10s %12s' % ('generator', 'size', 'scaled cells', 'seconds', 'us/cell'))
+    for size in sizes:
+        maze = Maze(size, size, generator, **maze_kwargs)
+        cells = maze.scaled_length * maze.scaled_width
+        start = perf_counter()
+        maze.generator.generate()
+        elapsed = perf_counter() - start
+        print('%-30s %-8d %14d %10.3f %12.2f' % (label, size, cells, elapsed, elapsed / cells * 1e6))
+
+
+def bench_ufs(sizes=(201, 633, 2001, 6325)):
+    bench_generator_scaling('ufs', sizes)
+
+
+def bench_kruskal(sizes=(201, 633, 2001)):
+    for generator in ('ufs', 'kruskal'):
+        bench_generator_scaling(generator, sizes)
+
+
+# 回溯生成器在不同选取策略下的耗时
+def bench_backtrack(sizes=(201, 633, 2001)):
+    for generator in ('backtrack', 'mybacktrack'):
+        for selection in ('newest', 'random', 0.5):
+            bench_generator_scaling(generator, sizes, selection=selection)
+
+
+def bench_cross(sizes=(201, 1001, 2001, 4001)):
+    bench_generator_scaling('cross', sizes)
+
+
+# 对比a*的两种模式在从左上角到右下角的长查询上的耗时
+def bench_astar(sizes=(301, 1001, 2001), generator='kruskal'):
+    from MazeGenerator import Maze
+    from SearchRoute import Astar
+
+    print('%-8s %10s %12s %12s %8s' % ('size', 'path cost', 'nodes (s)', 'fast (s)', 'speedup'))
+    for size in sizes:
+        maze = Maze(size, size, generator)
+        maze.generator.generate()
+        timings = {}
+        costs = set()
+        for fast in (False, True):
+            astar = Astar(maze, fast=fast)
+            start = perf_counter()
+            astar.search()
+            timings[fast] = perf_counter() - start
+            costs.add(astar.path_cost)
+        assert len(costs) == 1, 'path costs differ: %r' % costs
+        print('%-8d %10s %12.3f %12.3f %7.1fx' % (size, costs.pop(), timings[False], timings[True],
+                                                 timings[False] / timings[True]))
+
+
+# 在大的稀疏障碍地图上对比两种open集实现的入堆/出堆次数与耗时。八方向移动时decrease-key会频繁发生
+def bench_open_list(sizes=(300, 600), density=0.1, seed=1):
+    import random
+    from SearchRoute import Astar, TestMap
+
+    print('%-6s %-9s %-8s %10s %10s %8s %10s %10s' % ('size', 'diagonal', 'variant', 'pushes', 'pops', 'stale',
+                                                     'seconds', 'cost'))
+    for size in sizes:
+        random.seed(seed)
+        test_map = TestMap(size, size)
+        test_map.create_block(int(size * size * density))
+        for diagonal in (False, True):
+            # 以快速模式的结果为参照，检查两种open集得到的都是最短路径
+            reference = Astar(test_map, diagonal=diagonal, fast=True)
+            reference.search()
+            for variant in ('lazy', 'indexed'):
+                astar = Astar(test_map, diagonal=diagonal, open_list=variant)
+                start = perf_counter()
+                astar.search()
+                elapsed = perf_counter() - start
+                assert astar.path_cost == reference.path_cost, (variant, astar.path_cost, reference.path_cost)
+                open_list = astar.open_list
+                print('%-6d %-9s %-8s %10d %10d %8d %10.3f %10.1f' % (
+                    size, diagonal, variant, open_list.push_count, open_list.pop_count, open_list.stale_count,
+                    elapsed, astar.path_cost))
+
+
+# 对比单向与双向搜索扩展的单元数与耗时
+def bench_bidirectional(sizes=(301, 1001, 2001), generator='kruskal', density=0.2, seed=1):
+    import random
+    from MazeGenerator import Maze
+    from SearchRoute import Astar, TestMap
+
+    print('%-16s %10s %12s %10s %12s %12s %10s' % ('map', 'cost', 'one-sided', 'seconds', 'forward', 'backward',
+                                                 'seconds'))
+    for size in sizes:
+        maze = Maze(size, size, generator)
+        maze.generator.generate()
+        random.seed(seed)
+        test_map = TestMap(size, size)
+        test_map.create_block(int(size * size * density))
+        for name, the_map in (('%s %d' % (generator, size), maze), ('grid %d' % size, test_map)):
+            results = []
+            for options in ({'fast': True}, {'bidirectional': True}):
+                astar = Astar(the_map, **options)
+                start = perf_counter()
+                astar.search()
+                results.append((astar, perf_counter() - start))
+            (one_sided, one_sided_time), (astar, elapsed) = results
+            assert astar.path_cost == one_sided.path_cost, (astar.path_cost, one_sided.path_cost)
+            print('%-16s %10s %12d %10.3f %12d %12d %10.3f' % (
+                name, astar.path_cost, one_sided.expanded_forward, one_sided_time,
+                astar.expanded_forward, astar.expanded_backward, elapsed))
+
+
+# 在不同障碍密度的八方向地图上对比a*与跳点搜索
+def bench_jump_point(size=500, densities=(0.0, 0.05, 0.1, 0.2, 0.3), seed=1):
+    import random
+    from SearchRoute import Astar, TestMap
+
+    print('%-8s %10s %12s %10s %12s %10s' % ('density', 'cost', 'a* expanded', 'seconds', 'jps expanded',
+                                           'seconds'))
+    for density in densities:
+        random.seed(seed)
+        test_map = TestMap(size, size)
+        test_map.create_block(int(size * size * density))
+        results = []
+        for options in ({'fast': True, 'diagonal': True}, {'jump_point': True}):
+            astar = Astar(test_map, **options)
+            start = perf_counter()
+            astar.search()
+            results.append((astar, perf_counter() - start))
+        (astar, astar_time), (jps, jps_time) = results
+        assert astar.path_cost == jps.path_cost, (astar.path_cost, jps.path_cost)
+        print('%-8.2f %10s %12d %10.3f %12d %10.3f' % (density, jps.path_cost, astar.expanded_forward, astar_time,
+                                                     jps.expanded_forward, jps_time))
+
+
+# 走廊图的建立耗时、压缩率，以及在随机起终点的查询上与快速模式的对比
+def bench_corridor(sizes=(301, 1001, 2001), generators=('backtrack', 'ufs', 'cross', 'kruskal'), queries=20, seed=1):
+    import random
+    from MazeGenerator import Maze
+    from SearchRoute import Astar
+
+    print('%-10s %-6s %10s %10s %10s %12s %12s %8s' % ('generator', 'size', 'cells', 'nodes', 'build (s)',
+                                                      'fast (ms)', 'graph (ms)', 'speedup'))
+    for generator in generators:
+        for size in sizes:
+            random.seed(seed)
+            maze = Maze(size, size, generator)
+            maze.generator.generate()
+            start = perf_counter()
+            graph = maze.get_corridor_graph()
+            build_time = perf_counter() - start
+            open_cells = [(x, y) for y in range(maze.width) for x in range(maze.length) if maze.can_move(x, y)]
+            pairs = [(random.choice(open_cells), random.choice(open_cells)) for _ in range(queries)]
+            timings = {}
+            for options in ({'fast': True}, {'corridor': True}):
+                costs = []
+                start = perf_counter()
+                for maze.origin_coor, maze.destination_coor in pairs:
+                    astar = Astar(maze, **options)
+                    astar.search()
+                    costs.append(astar.path_cost)
+                timings[tuple(options)] = (perf_counter() - start) / queries, costs
+            (fast_time, fast_costs), (graph_time, graph_costs) = timings[('fast',)], timings[('corridor',)]
+            assert fast_costs == graph_costs, 'path costs differ'
+            print('%-10s %-6d %10d %10d %10.3f %12.2f %12.2f %7.1fx' % (
+                generator, size, len(open_cells), graph.node_count(), build_time, fast_time * 1e3,
+                graph_time * 1e3, fast_time / graph_time))
+
+
+# 树距离索引：建立耗时，以及随机起终点的距离查询、路径查询与走廊图a*的对比
+def bench_tree(sizes=(301, 1001, 2001), generator='backtrack', queries=1000, path_queries=20, seed=1):
+    import random
+    from MazeGenerator import Maze
+    from SearchRoute import Astar
+
+    print('%-6s %10s %10s %14s %12s %14s %8s' % ('size', 'nodes', 'build (s)', 'distance (us)', 'path (ms)',
+                                                'corridor (ms)', 'speedup'))
+    for size in sizes:
+        random.seed(seed)
+        maze = Maze(size, size, generator)
+        maze.generator.generate()
+        graph = maze.get_corridor_graph()
+        start = perf_counter()
+        index = maze.get_tree_index()
+        build_time = perf_counter() - start
+        assert index.is_tree, '%s generated a maze with cycles' % generator
+        open_cells = [(x, y) for y in range(maze.width) for x in range(maze.length) if maze.can_move(x, y)]
+        pairs = [(random.choice(open_cells), random.choice(open_cells)) for _ in range(queries)]
+        start = perf_counter()
+        for origin, destination in pairs:
+            index.distance(origin, destination)
+        distance_time = (perf_counter() - start) / queries
+        timings = {}
+        for options in ({'tree': True}, {'corridor': True}):
+            costs = []
+            start = perf_counter()
+            for maze.origin_coor, maze.destination_coor in pairs[:path_queries]:
+                astar = Astar(maze, **options)
+                astar.search()
+                costs.append(astar.path_cost)
+            timings[tuple(options)] = (perf_counter() - start) / path_queries, costs
+        (tree_time, tree_costs), (graph_time, graph_costs) = timings[('tree',)], timings[('corridor',)]
+        assert tree_costs == graph_costs, 'path costs differ'
+        print('%-6d %10d %10.3f %14.1f %12.2f %14.2f %7.1fx' % (
+            size, graph.node_count(), build_time, distance_time * 1e6, tree_time * 1e3, graph_time * 1e3,
+            graph_time / tree_time))
+
+
+# 批量查询在不同进程数下的吞吐量
+def bench_batch(size=1001, generator='kruskal', queries=64, workers=(1, 2, 4), seed=1):
+    import random
+    from MazeGenerator import Maze
+
+    random.seed(seed)
+    maze = Maze(size, size, generator)
+    maze.generator.generate()
+    open_cells = [(x, y) for y in range(maze.width) for x in range(maze.length) if maze.can_move(x, y)]
+    pairs = [(random.choice(open_cells), random.choice(open_cells)) for _ in range(queries)]
+    print('%-8s %10s %12s %8s' % ('workers', 'seconds', 'queries/s', 'speedup'))
+    baseline = None
+    for count in workers:
+        start = perf_counter()
+        for _ in maze.find_paths(pairs, workers=count, chunk_size=1):
+            pass
+        elapsed = perf_counter() - start
+        baseline = baseline or elapsed
+        print('%-8d %10.3f %12.1f %7.1fx' % (count, elapsed, queries / elapsed, baseline / elapsed))
+
+
+# 迷宫文件的大小与保存、读取耗时
+def bench_file(sizes=(1001, 4001), generator='kruskal', seed=1):
+    import tempfile
+    from MazeGenerator import Maze
+
+    print('%-6s %-6s %12s %10s %10s %12s' % ('size', 'packed', 'bytes', 'save (s)', 'load (s)', 'mmap (s)'))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.maze')
+        for size in sizes:
+            maze = Maze(size, size, generator, seed=seed)
+            maze.generator.generate()
+            for packed in (False, True):
+                start = perf_counter()
+                maze.save(path, packed)
+                save_time = perf_counter() - start
+                start = perf_counter()
+                Maze.load(path, use_mmap=False)
+                load_time = perf_counter() - start
+                start = perf_counter()
+                Maze.load(path)
+                mmap_time = perf_counter() - start
+                print('%-6d %-6s %12d %10.3f %10.3f %12.4f' % (size, packed, os.path.getsize(path), save_time,
+                                                             load_time, mmap_time))
+
+
+# 分块世界中从(1, 1)到(distance, distance)的搜索：生成的块数、淘汰次数与耗时（含生成块的时间）
+def bench_tiles(distances=(255, 511), cache_sizes=(16, 1024), tile_size=32, seed=1):
+    from MazeChunks import TileWorld
+    from SearchRoute import Astar
+
+    print('%-9s %-7s %10s %10s %10s %10s %10s' % ('distance', 'cache', 'cost', 'expanded', 'generated', 'evicted',
+                                                 'seconds'))
+    for distance in distances:
+        for cache_tiles in cache_sizes:
+            world = TileWorld(seed=seed, tile_size=tile_size, cache_tiles=cache_tiles)
+            world.destination_coor = (distance, distance)
+            astar = Astar(world)
+            start = perf_counter()
+            astar.search()
+            elapsed = perf_counter() - start
+            print('%-9d %-7d %10s %10d %10d %10d %10.3f' % (distance, cache_tiles, astar.path_cost,
+                                                         astar.expanded_forward, world.tile_misses,
+                                                         world.evictions, elapsed))
+
+
+# Eller算法逐行写入文件与并查集生成器的耗时、峰值内存（tracemalloc）对比
+def bench_eller(sizes=(501, 1001), seed=1):
+    import tempfile
+    import tracemalloc
+    from MazeGenerator import Maze, stream_eller
+
+    print('%-6s %-14s %10s %14s' % ('size', 'generator', 'seconds', 'peak (KiB)'))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'eller.maze')
+        for size in sizes:
+            runs = (('ufs', lambda: Maze(size, size, 'ufs', seed=seed).generator.generate()),
+                    ('eller', lambda: Maze(size, size, 'eller', seed=seed).generator.generate()),
+                    ('eller stream', lambda: stream_eller(path, size, size, seed)))
+            for name, func in runs:
+                tracemalloc.start()
+                start = perf_counter()
+                func()
+                elapsed = perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print('%-6d %-14s %10.3f %14.1f' % (size, name, elapsed, peak / 1024))
+
+
+# 分层寻路：簇抽象的建立耗时、随机查询与快速模式的对比，以及改动一面墙后增量更新的耗时
+def bench_hierarchical(sizes=(501, 1001, 2001), generator='kruskal', cluster_size=16, queries=10, seed=1):
+    import random
+    from MazeGenerator import Maze
+    from SearchRoute import Astar
+
+    print('%-6s %10s %10s %12s %12s %8s %12s' % ('size', 'nodes', 'build (s)', 'fast (ms)', 'hpa (ms)', 'speedup',
+                                                'update (ms)'))
+    for size in sizes:
+        random.seed(seed)
+        maze = Maze(size, size, generator, seed=seed)
+        maze.generator.generate()
+        start = perf_counter()
+        hierarchy = maze.get_hierarchy(cluster_size)
+        build_time = perf_counter() - start
+        open_cells = [(x, y) for y in range(maze.width) for x in range(maze.length) if maze.can_move(x, y)]
+        pairs = [(random.choice(open_cells), random.choice(open_cells)) for _ in range(queries)]
+        timings = {}
+        for options in ({'fast': True}, {'hierarchical': True, 'cluster_size': cluster_size}):
+            costs = []
+            start = perf_counter()
+            for maze.origin_coor, maze.destination_coor in pairs:
+                astar = Astar(maze, **options)
+                astar.search()
+                costs.append(astar.path_cost)
+            timings[len(options)] = (perf_counter() - start) / queries, costs
+        (fast_time, fast_costs), (hpa_time, hpa_costs) = timings[1], timings[2]
+        assert fast_costs == hpa_costs, 'path costs differ'
+        # 打通一面墙，再做增量更新
+        x, y = 0, 0
+        while maze.can_move(x, y):
+            x, y = 2 * random.randrange(1, maze.scaled_length), 2 * random.randrange(maze.scaled_width) + 1
+        maze.set_grid(x, y, MapGridType.MAP_EMPTY)
+        start = perf_counter()
+        hierarchy.update()
+        update_time = perf_counter() - start
+        print('%-6d %10d %10.3f %12.2f %12.2f %7.1fx %12.2f' % (size, hierarchy.node_count(), build_time,
+                                                             fast_time * 1e3, hpa_time * 1e3, fast_time / hpa_time,
+                                                             update_time * 1e3))
+
+
+# 增量规划与每次从头搜索的对比：玩家沿路径前进steps步，每步关上上一步打开的门，再在玩家附近（radius范围内）
+# 打开一面墙作为新的门（地图始终连通），然后重新规划
+def bench_replan(sizes=(101, 301, 1001), generator='cross', steps=50, radius=10, seed=1):
+    import random
+    from MazeGenerator import Maze
+    from SearchRoute import Astar
+
+    print('%-6s %12s %12s %12s %8s %10s' % ('size', 'initial (ms)', 'fast (ms)', 'replan (ms)', 'speedup',
+                                          'expanded'))
+    for size in sizes:
+        rand = random.Random(seed)
+        maze = Maze(size, size, generator, seed=seed)
+        maze.generator.generate()
+        start = perf_counter()
+        planner = maze.get_replanner()
+        path, cost, _ = planner.find_path(maze.player_loc)
+        initial_time = perf_counter() - start
+        fast_time = replan_time = 0
+        expanded = 0
+        door = None
+        for _ in range(steps):
+            if len(path) > 1:
+                maze.player_loc = path[1]
+            if door is not None and door != maze.player_loc:
+                maze.set_grid(door[0], door[1], MapGridType.MAP_BLOCK)
+            # 两个路径单元之间的墙：一个坐标为奇数，另一个为偶数
+            px, py = maze.player_loc
+            x, y = px, py
+            while not (0 < x < maze.length - 1 and 0 < y < maze.width - 1) or (x + y) % 2 == 0 or maze.can_move(x, y):
+                x, y = px + rand.randint(-radius, radius), py + rand.randint(-radius, radius)
+            maze.set_grid(x, y, MapGridType.MAP_EMPTY)
+            door = x, y
+            start = perf_counter()
+            path, cost, count = planner.find_path(maze.player_loc)
+            replan_time += perf_counter() - start
+            expanded += count
+            maze.origin_coor = maze.player_loc
+            astar = Astar(maze, fast=True)
+            start = perf_counter()
+            astar.search()
+            fast_time += perf_counter() - start
+            assert astar.path_cost == cost, 'path costs differ'
+            # 去掉a*标记的路径，以免影响之后的比较
+            for cell_x, cell_y in astar.path:
+                if maze.map.get(cell_x, cell_y) == MapGridType.MAP_PATH:
+                    maze.map.set(cell_x, cell_y, MapGridType.MAP_EMPTY)
+        print('%-6d %12.2f %12.2f %12.2f %7.1fx %10.1f' % (size, initial_time * 1e3, fast_time / steps * 1e3,
+                                                         replan_time / steps * 1e3, fast_time / replan_time,
+                                                         expanded / steps))
+
+
+# 许多个体从随机的单元走向终点：每个个体各做一次快速a*，与建立一次距离场后各自查表对比
+def bench_field(sizes=(301, 1001, 2001), generator='kruskal', agents=(10, 100, 1000), seed=1):
+    import random
+    from MazeGenerator import Maze
+    from MazeField import DistanceField
+    from SearchRoute import Astar
+
+    print('%-6s %-7s %12s %12s %12s %8s' % ('size', 'agents', 'astar (ms)', 'field (ms)', 'lookup (ms)', 'speedup'))
+    for size in sizes:
+        rand = random.Random(seed)
+        maze = Maze(size, size, generator, seed=seed)
+        maze.generator.generate()
+        cells = [(x, y) for y in range(maze.width) for x in range(maze.length) if maze.can_move(x, y)]
+        start = perf_counter()
+        field = DistanceField(maze.map, maze.destination_coor)
+        field_time = perf_counter() - start
+        for count in agents:
+            origins = rand.sample(cells, count)
+            # a*太慢时只测一部分个体，按比例估算
+            searched = origins[:max(1, min(count, 5000000 // (size * size)))]
+            start = perf_counter()
+            for origin in searched:
+                maze.origin_coor = origin
+                astar = Astar(maze, fast=True)
+                astar.search()
+                assert astar.path_cost == field.get_distance(*origin), 'path costs differ'
+                for cell_x, cell_y in astar.path:
+                    if maze.map.get(cell_x, cell_y) == MapGridType.MAP_PATH:
+                        maze.map.set(cell_x, cell_y, MapGridType.MAP_EMPTY)
+            astar_time = (perf_counter() - start) * count / len(searched)
+            start = perf_counter()
+            for x, y in origins:
+                field.next_move(x, y)
+            lookup_time = perf_counter() - start
+            print('%-6d %-7d %12.1f %12.1f %12.3f %7.1fx' % (size, count, astar_time * 1e3, field_time * 1e3,
+                                                          lookup_time * 1e3,
+                                                          astar_time / (field_time + lookup_time)))
+
+
+# 带通行cost的地图上，对比a*（最短路径）、加权a*与限时的anytime模式（ARA*）的耗时、路径cost与上界
+def bench_anytime(size=1000, density=0.25, terrain=(1, 1, 1, 3, 8), weights=(1.5, 3), budgets=(0.05, 0.2), seed=1):
+    import random
+    from SearchRoute import Astar, TestMap
+
+    random.seed(seed)
+    test_map = TestMap(size, size)
+    test_map.create_block(int(size * size * density))
+    test_map.origin_coor, test_map.destination_coor = grid_endpoints(test_map)
+    rand = random.Random(seed)
+    test_map.costs = bytearray(rand.choice(terrain) for _ in range(size * size))
+    cases = [('astar', {'fast': True})]
+    cases += [('weight %g' % weight, {'fast': True, 'weight': weight}) for weight in weights]
+    cases += [('anytime %gs' % budget, {'anytime': True, 'weight': max(weights), 'time_budget': budget})
+              for budget in budgets]
+    print('%-14s %-9s %8s %10s %8s %10s %7s' % ('search', 'diagonal', 'seconds', 'cost', 'bound', 'expanded',
+                                              'rounds'))
+    for diagonal in (False, True):
+        for name, options in cases:
+            astar = Astar(test_map, diagonal=diagonal, **options)
+            start = perf_counter()
+            astar.search()
+            elapsed = perf_counter() - start
+            print('%-14s %-9s %8.3f %10.1f %8.3f %10d %7d' % (name, diagonal, elapsed, astar.path_cost, astar.bound,
+                                                           astar.stats.expanded, len(astar.stats.solutions)))
+            for x, y in astar.path:
+                if test_map.map.get(x, y) == MapGridType.MAP_PATH:
+                    test_map.map.set(x, y, MapGridType.MAP_EMPTY)
+
+
+# 基准测试套件的默认参数
+SUITE_SIZES = (61, 251, 1001, 4001)
+SUITE_GENERATORS = ('backtrack', 'cross', 'ufs', 'mybacktrack', 'kruskal', 'eller')
+# 在Maze上测试a*时使用的生成器，以及TestMap的障碍密度
+SUITE_MAZE_GENERATOR = 'backtrack'
+SUITE_DENSITIES = (0.1, 0.2, 0.3)
+# a*的模式。普通模式为每个单元创建Node对象，在大地图上很慢，只测到SUITE_NODES_LIMIT
+SUITE_SEARCHES = (('nodes', {}), ('fast', {'fast': True}))
+SUITE_NODES_LIMIT = 1001
+# 对比两次结果时，耗时的比值超过该值即视为变慢
+REGRESSION_RATIO = 1.1
+
+
+# 对setup()得到的对象执行一次run，返回(耗时（秒）, run期间新分配内存的峰值（字节）, run的返回值)。
+# tracemalloc会拖慢执行，因此耗时与内存分两次测量，每次都重新setup；memory为False时不测内存，峰值为None
+def measure(setup, run, memory=True):
+    target = setup()
+    start = perf_counter()
+    result = run(target)
+    elapsed = perf_counter() - start
+    peak = None
+    if memory:
+        target = setup()
+        tracemalloc.start()
+        try:
+            run(target)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return elapsed, peak, result
+
+
+# 随机障碍地图的角落可能被障碍围住。从最靠近中心的空单元出发做广度优先搜索，
+# 取其所在的连通区域中最靠近左上角与右下角的两个单元作为起点与终点
+def grid_endpoints(test_map):
+    from collections import deque
+
+    length, width, buf = test_map.length, test_map.width, test_map.map.buf
+    center = (width // 2) * length + length // 2
+    while buf[center] == MapGridType.MAP_BLOCK:
+        center += 1
+    visited = bytearray(length * width)
+    visited[center] = 1
+    queue = deque([center])
+    origin = destination = center
+    while queue:
+        cell = queue.popleft()
+        y, x = divmod(cell, length)
+        if x + y < origin % length + origin // length:
+            origin = cell
+        if x + y > destination % length + destination // length:
+            destination = cell
+        for neighbor, inside in ((cell - 1, x > 0), (cell + 1, x < length - 1),
+                                 (cell - length, y > 0), (cell + length, y < width - 1)):
+            if inside and not visited[neighbor] and buf[neighbor] != MapGridType.MAP_BLOCK:
+                visited[neighbor] = 1
+                queue.append(neighbor)
+    return (origin % length, origin // length), (destination % length, destination // length)
+
+
+# 当前环境的信息，与结果一起保存
+def suite_meta(seed):
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                         cwd=os.path.dirname(os.path.abspath(__file__))).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': numpy_version,
+        'seed': seed,
+    }
+
+
+def bench_suite(sizes=SUITE_SIZES, seed=1, output='benchmark.json', memory=True):
+    import random
+    from MazeGenerator import Maze
+    from SearchRoute import Astar, TestMap
+
+    results = []
+
+    def record(entry, elapsed, peak):
+        entry.update(seconds=elapsed, peak_bytes=peak)
+        results.append(entry)
+        print('%-12s %-12s %-6d %8s %10.3f %12s' % (entry['benchmark'], entry['name'], entry['size'],
+                                                   entry.get('density', ''), elapsed,
+                                                   '-' if peak is None else '%.1f' % (peak / 1024.0)))
+
+    def generate(maze):
+        maze.generator.generate()
+        return maze.generator.stats
+
+    def search(the_map, options):
+        astar = Astar(the_map, **options)
+        astar.search()
+        return astar
+
+    # 搜索的统计信息（见MazeStats.SearchStats）中的计数
+    def search_counts(astar):
+        stats = astar.stats
+        return {'path_cost': astar.path_cost, 'expanded': stats.expanded, 'pushes': stats.pushes,
+                'stale_pops': stats.stale_pops, 'peak_open': stats.peak_open}
+
+    print('%-12s %-12s %-6s %8s %10s %12s' % ('benchmark', 'name', 'size', 'density', 'seconds', 'peak (KiB)'))
+    for size in sizes:
+        for generator in SUITE_GENERATORS:
+            elapsed, peak, stats = measure(lambda: Maze(size, size, generator, seed=seed), generate, memory)
+            record({'benchmark': 'generate', 'name': generator, 'size': size, 'steps': stats.steps,
+                    'peak_frontier': stats.peak_frontier}, elapsed, peak)
+
+        maze = Maze(size, size, SUITE_MAZE_GENERATOR, seed=seed)
+        maze.generator.generate()
+        walls = bytes(maze.map.buf)
+        # 每张地图上各模式得到的路径cost（应当相同）
+        costs = {}
+        for name, options in SUITE_SEARCHES:
+            if name == 'nodes' and size > SUITE_NODES_LIMIT:
+                continue
+
+            # 每次搜索前恢复地图，去掉上次标记的路径
+            def setup():
+                maze.map.buf[:] = walls
+                return maze
+
+            elapsed, peak, astar = measure(setup, lambda the_map: search(the_map, options), memory)
+            entry = {'benchmark': 'astar_maze', 'name': name, 'size': size, 'generator': SUITE_MAZE_GENERATOR}
+            entry.update(search_counts(astar))
+            record(entry, elapsed, peak)
+            costs[name] = astar.path_cost
+        assert len(set(costs.values())) == 1, ('path costs differ', size, costs)
+
+        for density in SUITE_DENSITIES:
+            random.seed(seed)
+            test_map = TestMap(size, size)
+            test_map.create_block(int(size * size * density))
+            test_map.origin_coor, test_map.destination_coor = grid_endpoints(test_map)
+            cells = bytes(test_map.map.buf)
+            costs = {}
+            for name, options in SUITE_SEARCHES:
+                if name == 'nodes' and size > SUITE_NODES_LIMIT:
+                    continue
+
+                def setup():
+                    test_map.map.buf[:] = cells
+                    return test_map
+
+                elapsed, peak, astar = measure(setup, lambda the_map: search(the_map, options), memory)
+                entry = {'benchmark': 'astar_grid', 'name': name, 'size': size, 'density': density,
+                         'origin': test_map.origin_coor, 'destination': test_map.destination_coor}
+                entry.update(search_counts(astar))
+                record(entry, elapsed, peak)
+                costs[name] = astar.path_cost
+            assert len(set(costs.values())) == 1, ('path costs differ', size, density, costs)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'meta': suite_meta(seed), 'results': results}, f, indent=1)
+        print('results written to %s' % output)
+    return results
+
+
+# 结果中用于对应两次测试的键
+def suite_key(entry):
+    return entry['benchmark'], entry['name'], entry['size'], entry.get('density')
+
+
+# 对比两个bench_suite的结果文件，列出耗时与内存的变化，返回变慢（比值超过REGRESSION_RATIO）的项数
+def compare_suites(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    old_results = {suite_key(entry): entry for entry in old['results']}
+    print('%s (%s) -> %s (%s)' % (old_path, old['meta'].get('commit'), new_path, new['meta'].get('commit')))
+    print('%-12s %-12s %-6s %8s %10s %10s %8s %10s' % ('benchmark', 'name', 'size', 'density', 'old (s)', 'new (s)',
+                                                     'ratio', 'peak'))
+    regressions = 0
+    for entry in new['results']:
+        previous = old_results.get(suite_key(entry))
+        if previous is None:
+            continue
+        ratio = entry['seconds'] / previous['seconds'] if previous['seconds'] else float('inf')
+        if previous.get('peak_bytes') and entry.get('peak_bytes') is not None:
+            peak = '%.2fx' % (entry['peak_bytes'] / float(previous['peak_bytes']))
+        else:
+            peak = '-'
+        flag = ''
+        if ratio > REGRESSION_RATIO:
+            regressions += 1
+            flag = ' slower'
+        print('%-12s %-12s %-6d %8s %10.3f %10.3f %7.2fx %10s%s' % (entry['benchmark'], entry['name'], entry['size'],
+                                                                  entry.get('density', ''), previous['seconds'],
+                                                                  entry['seconds'], ratio, peak, flag))
+    return regressions
+
+
+BENCHMARKS = {
+    'render': bench_render,
+    'ufs': bench_ufs,
+    'kruskal': bench_kruskal,
+    'backtrack': bench_backtrack,
+    'cross': bench_cross,
+    'astar': bench_astar,
+    'open_list': bench_open_list,
+    'bidirectional': bench_bidirectional,
+    'jump_point': bench_jump_point,
+    'corridor': bench_corridor,
+    'tree': bench_tree,
+    'batch': bench_batch,
+    'file': bench_file,
+    'tiles': bench_tiles,
+    'eller': bench_eller,
+    'hierarchical': bench_hierarchical,
+    'replan': bench_replan,
+    'field': bench_field,
+    'anytime': bench_anytime,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='maze generator and search benchmarks')
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help='benchmarks to run: suite, %s' % ', '.join(BENCHMARKS))
+    parser.add_argument('--sizes', help='comma separated maze sizes for the suite')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the suite')
+    parser.add_argument('--output', default='benchmark.json', help='JSON file for the suite results')
+    parser.add_argument('--no-memory', action='store_true', help='do not track peak memory in the suite')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two suite result files')
+    args = parser.parse_args()
+    for name in args.names:
+        if name != 'suite' and name not in BENCHMARKS:
+            parser.error('unknown benchmark: %s' % name)
+    if args.compare:
+        sys.exit(1 if compare_suites(*args.compare) else 0)
+    for name in args.names or list(BENCHMARKS):
+        print('== %s ==' % name)
+        if name == 'suite':
+            sizes = tuple(int(size) for size in args.sizes.split(',')) if args.sizes else SUITE_SIZES
+            bench_suite(sizes, args.seed, args.output, not args.no_memory)
+        else:
+            BENCHMARKS[name]()
@@ -0,0 +1,103 @@
+"""
+批量寻路：对同一张地图执行大量(起点, 终点)查询。
+地图的字节缓冲区复制一次到共享内存（multiprocessing.shared_memory）中，各个工作进程直接映射这块内存，
+不需要把地图序列化后传给每个进程；每个进程只在第一次用到时建立一次走廊图/树索引与快速模式所需的加边框地图
+（见QueryMap.get_padded_walls），之后的查询都复用。默认使用快速模式。
+查询结果按输入的顺序以生成器的形式逐个返回，不必等所有查询完成。
+"""
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+from MazeGrid import Grid
+from MazeGraph import CorridorGraph, TreeIndex
+from SearchRoute import Astar
+
+
+class SharedGrid(Grid):
+    """ 直接使用已有缓冲区（如共享内存）的只读地图 """
+    def __init__(self, length, width, buf):
+        self.length = length
+        self.width = width
+        self.buf = buf
+
+
+class QueryMap(object):
+    """
+    供批量查询使用的地图：只读取地图，不在地图上标记路径。
+    起点与终点在每次查询前设置；走廊图、树索引与加边框的地图在第一次用到时建立并缓存（同Maze）。
+    """
+    def __init__(self, grid, corridor_graph=None, tree_index=None):
+        self.map = grid
+        self.length = grid.length
+        self.width = grid.width
+        self.origin_coor = None
+        self.destination_coor = None
+        self.corridor_graph = corridor_graph
+        self.tree_index = tree_index
+        self.padded_walls = None
+
+    def set_grid(self, x, y, value):
+        pass
+
+    def get_corridor_graph(self):
+        if self.corridor_graph is None:
+            self.corridor_graph = CorridorGraph(self.map)
+        return self.corridor_graph
+
+    def get_tree_index(self):
+        if self.tree_index is None:
+            self.tree_index = TreeIndex(self.get_corridor_graph())
+        return self.tree_index
+
+    # 快速模式所需的加边框地图（见MazeGrid.Grid.padded_walls）。搜索会在其中写入close标记，因此每次返回一份复制，
+    # 复制整块bytearray比逐行重建快得多
+    def get_padded_walls(self):
+        if self.padded_walls is None:
+            self.padded_walls = self.map.padded_walls()
+        walls, row = self.padded_walls
+        return bytearray(walls), row
+
+    # 搜索一对起终点，返回(路径, 路径长度)。options为Astar的参数
+    def find_path(self, origin, destination, options):
+        self.origin_coor, self.destination_coor = tuple(origin), tuple(destination)
+        astar = Astar(self, **options)
+        astar.search()
+        return astar.path, astar.path_cost
+
+
+# 工作进程中的地图与Astar参数，由init_worker设置
+worker_state = {}
+
+
+def init_worker(name, length, width, options):
+    shared = SharedMemory(name=name)
+    # 需要保留SharedMemory对象的引用，否则其映射的内存会被关闭
+    worker_state['shared'] = shared
+    worker_state['map'] = QueryMap(SharedGrid(length, width, shared.buf[:length * width]))
+    worker_state['options'] = options
+
+
+def find_path_worker(pair):
+    return worker_state['map'].find_path(pair[0], pair[1], worker_state['options'])
+
+
+# 对grid上的每一对(起点, 终点)求路径，按输入顺序逐个返回(路径, 路径长度)。
+# workers为进程数，不大于1时在当前进程中执行；chunk_size为每次发给工作进程的查询数。options为Astar的参数，默认使用快速模式
+def find_paths(grid, pairs, workers=1, chunk_size=16, query_map=None, **options):
+    options.setdefault('fast', True)
+    if workers is None or workers <= 1:
+        query_map = query_map or QueryMap(grid)
+        for origin, destination in pairs:
+            yield query_map.find_path(origin, destination, options)
+        return
+
+    size = grid.length * grid.width
+    shared = SharedMemory(create=True, size=size)
+    try:
+        shared.buf[:size] = bytes(grid.buf)
+        with Pool(workers, initializer=init_worker, initargs=(shared.name, grid.length, grid.width, options)) as pool:
+            for result in pool.imap(find_path_worker, pairs, chunk_size):
+                yield result
+    finally:
+        shared.close()
+        shared.unlink()
@@ -0,0 +1,128 @@
+"""
+分块生成的迷宫世界，用于远大于内存的地图。
+世界从(0, 0)开始向右、向下延伸（tiles_x、tiles_y为None时无限延伸），划分为边长为span = 2 * tile_size的正方形块（tile）。
+坐标的含义与Maze相同：路径单元位于奇数坐标(2x + 1, 2y + 1)上，其余单元为墙或被打通的墙。
+每个块只在用到时生成：以(seed, 块坐标)为种子，用一个普通的生成器（默认'kruskal'）生成 tile_size * tile_size 个路径单元的
+完美迷宫，取其左上角span * span个单元（右侧与下方的外墙即相邻块的左侧、上方的缝）。
+相邻两块之间的缝上只打通一个单元，其位置由(seed, 缝的坐标)决定，因此从缝的哪一侧生成都相同，整个世界是连通的。
+块的内容只取决于种子与块坐标，因此被淘汰的块需要时可以重新生成，结果不变。生成的块存放在LRU缓存中，超过容量时淘汰最久未用的块。
+"""
+from collections import OrderedDict
+from random import Random
+
+from config import MapGridType
+from MazeGenerator import Maze
+
+
+class TileWorld(object):
+    # Astar根据该属性选择按需读取块的搜索方式（见Astar.search_tiled）
+    is_tiled = True
+
+    def __init__(self, seed=0, tile_size=32, generator='kruskal', cache_tiles=64, tiles_x=None, tiles_y=None):
+        self.seed = seed
+        self.tile_size = tile_size
+        self.span = 2 * tile_size
+        self.generator = generator
+        self.cache_tiles = cache_tiles
+        self.tiles_x = tiles_x
+        self.tiles_y = tiles_y
+        # 有边界时，世界的长宽（最右侧与最下方各有一条外墙）；无边界时为None
+        self.length = tiles_x * self.span + 1 if tiles_x is not None else None
+        self.width = tiles_y * self.span + 1 if tiles_y is not None else None
+        self.tiles = OrderedDict()
+        self.last_key = None
+        self.last_tile = None
+        # 缓存命中、生成（未命中）与淘汰的次数
+        self.tile_hits = 0
+        self.tile_misses = 0
+        self.evictions = 0
+        # 起点、终点（原始坐标），以及标记在地图上的路径等（只用于显示，不影响墙）
+        self.origin_coor = (1, 1)
+        self.destination_coor = (self.span - 1, self.span - 1)
+        self.overlay = {}
+
+    # 块(tx, ty)的字节，行优先，每行span个单元
+    def get_tile(self, tx, ty):
+        key = (tx, ty)
+        if key == self.last_key:
+            return self.last_tile
+        tile = self.tiles.get(key)
+        if tile is None:
+            self.tile_misses += 1
+            tile = self.generate_tile(tx, ty)
+            self.tiles[key] = tile
+            if len(self.tiles) > self.cache_tiles:
+                self.tiles.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.tile_hits += 1
+            self.tiles.move_to_end(key)
+        self.last_key, self.last_tile = key, tile
+        return tile
+
+    def generate_tile(self, tx, ty):
+        span = self.span
+        maze = Maze(span + 1, span + 1, self.generator, seed='%s-%d-%d' % (self.seed, tx, ty))
+        maze.generator.generate()
+        buf = bytes(maze.map.buf)
+        tile = bytearray(b''.join(buf[y * (span + 1):y * (span + 1) + span] for y in range(span)))
+        # 打通左侧与上方的缝（世界的外墙除外）
+        if tx > 0:
+            tile[(2 * self.door(tx, ty, 'v') + 1) * span] = MapGridType.MAP_EMPTY
+        if ty > 0:
+            tile[2 * self.door(tx, ty, 'h') + 1] = MapGridType.MAP_EMPTY
+        return bytes(tile)
+
+    # 块(tx, ty)左侧（'v'）或上方（'h'）的缝上打通的位置（第几个路径单元）
+    def door(self, tx, ty, direction):
+        return Random('%s-%s-%d-%d' % (self.seed, direction, tx, ty)).randrange(self.tile_size)
+
+    def is_blocked(self, x, y):
+        if x < 0 or y < 0 or (self.length is not None and x >= self.length - 1) or \
+                (self.width is not None and y >= self.width - 1):
+            return True
+        span = self.span
+        tx, local_x = divmod(x, span)
+        ty, local_y = divmod(y, span)
+        return self.get_tile(tx, ty)[local_y * span + local_x] == MapGridType.MAP_BLOCK
+
+    def can_move(self, x, y):
+        return not self.is_blocked(x, y)
+
+    # 只记录路径等标记，用于显示；墙的分布由种子决定，不能修改
+    def set_grid(self, x, y, value):
+        self.overlay[(x, y)] = value
+
+    def get_grid_type(self, x, y):
+        if (x, y) == self.origin_coor:
+            return MapGridType.MAP_ORIGIN
+        if (x, y) == self.destination_coor:
+            return MapGridType.MAP_DESTINATION
+        if (x, y) in self.overlay:
+            return self.overlay[(x, y)]
+        return MapGridType.MAP_BLOCK if self.is_blocked(x, y) else MapGridType.MAP_EMPTY
+
+    def clear_overlay(self):
+        self.overlay.clear()
+
+    # 打印世界中的一块矩形区域
+    def show_region(self, x, y, length, width):
+        symbols = {
+            MapGridType.MAP_ORIGIN: ' O',
+            MapGridType.MAP_DESTINATION: ' D',
+            MapGridType.MAP_EMPTY: '  ',
+            MapGridType.MAP_BLOCK: ' #',
+            MapGridType.MAP_PATH: ' X',
+            MapGridType.MAP_PLAYER: ' P',
+        }
+        for row in range(y, y + width):
+            print(''.join(symbols[self.get_grid_type(col, row)] for col in range(x, x + length)))
+
+
+if __name__ == '__main__':
+    from SearchRoute import Astar
+
+    world = TileWorld(seed=1, tile_size=6, cache_tiles=4)
+    world.destination_coor = (35, 23)
+    Astar(world).search()
+    world.show_region(0, 0, 37, 25)
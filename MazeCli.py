@@ -0,0 +1,269 @@
+"""
+命令行工具，不需要显示设备，也不导入pygame：
+    python -m MazeCli generate --size 61 --generator kruskal --seed 1 --output maze.bin   生成迷宫（不指定output时打印）
+    python -m MazeCli batch 1000 --size 101 --workers 4 --output mazes.bin               批量生成（见generate_many）
+    python -m MazeCli solve maze.bin --index 0 --mode fast --show                        求解文件中的迷宫（或新生成的迷宫）
+    python -m MazeCli export mazes.bin --index 3 --format pgm --output maze.pgm          转换为文本、PGM图片或单个迷宫的文件
+    python -m MazeCli info mazes.bin                                                     列出文件中的迷宫
+本模块的顶层只导入argparse与sys，迷宫、寻路等模块都在子命令中才导入，只有solve会导入寻路模块，
+因此只生成、转换迷宫的任务（如定时的批量任务）启动只需几毫秒。
+"""
+import argparse
+import sys
+
+GENERATORS = ('backtrack', 'mybacktrack', 'cross', 'ufs', 'kruskal', 'eller')
+# solve的搜索模式 -> Astar的参数
+SEARCH_MODES = {
+    'nodes': {},
+    'fast': {'fast': True},
+    'bidirectional': {'bidirectional': True},
+    'jump_point': {'jump_point': True},
+    'corridor': {'corridor': True},
+    'tree': {'tree': True},
+    'hierarchical': {'hierarchical': True},
+    'incremental': {'incremental': True},
+}
+EXPORT_FORMATS = ('text', 'pgm', 'raw', 'bits')
+
+
+# '61'或'61x41'，返回(长, 宽)
+def parse_size(text):
+    parts = text.lower().split('x')
+    if len(parts) > 2:
+        raise argparse.ArgumentTypeError('size must be N or LxW: %r' % text)
+    try:
+        sizes = [int(part) for part in parts]
+    except ValueError:
+        raise argparse.ArgumentTypeError('size must be N or LxW: %r' % text)
+    if min(sizes) < 3:
+        raise argparse.ArgumentTypeError('size must be at least 3: %r' % text)
+    return sizes[0], sizes[-1]
+
+
+# 'x,y'，返回坐标
+def parse_coor(text):
+    try:
+        x, y = (int(part) for part in text.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError('coordinates must be x,y: %r' % text)
+    return x, y
+
+
+# 整数种子按整数处理，其余按字符串处理（与MazeFile中保存的种子类型一致）
+def parse_seed(text):
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+# 文件中各条记录的头部（见MazeFile.read_header），另加offset（记录在文件中的起始位置）
+def read_headers(path):
+    import mmap
+    import os
+    from MazeFile import read_header
+
+    if os.path.getsize(path) == 0:
+        return []
+    headers = []
+    with open(path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            offset = 0
+            while offset < len(buf):
+                header = read_header(buf, offset)
+                header['offset'] = offset
+                headers.append(header)
+                offset = header['end']
+    return headers
+
+
+# 读取文件中的第index个迷宫
+def load_maze(path, index):
+    from MazeGenerator import Maze
+
+    headers = read_headers(path)
+    if not 0 <= index < len(headers):
+        raise SystemExit('%s: no maze at index %d (%d mazes in file)' % (path, index, len(headers)))
+    return Maze.load(path, headers[index]['offset'])
+
+
+def new_maze(args):
+    from MazeGenerator import Maze
+
+    length, width = args.size
+    maze = Maze(length, width, args.generator, args.random_ends, args.random_ends, seed=args.seed)
+    maze.generator.generate()
+    return maze
+
+
+def command_generate(args):
+    length, width = args.size
+    # Eller算法可以逐行写入文件，不在内存中保存整张地图（起终点与默认的相同，因此不能随机选取）
+    if args.generator == 'eller' and args.output and not (args.packed or args.show or args.random_ends):
+        from MazeGenerator import stream_eller
+        stream_eller(args.output, length, width, args.seed)
+        return 0
+    maze = new_maze(args)
+    if args.output:
+        maze.save(args.output, args.packed)
+    if args.show or not args.output:
+        print(maze.to_text())
+    return 0
+
+
+def command_batch(args):
+    from MazeGenerator import generate_many
+
+    count = generate_many(args.count, args.size, args.generator, args.workers, args.output, args.seed,
+                          args.chunk_size, args.packed)
+    print('%d mazes written to %s' % (count, args.output))
+    return 0
+
+
+# 起点、终点须在迷宫内，且不是墙
+def check_coor(maze, coor, name):
+    from config import MapGridType
+
+    if not maze.is_valid(*coor):
+        raise SystemExit('solve: %s %d,%d is outside the %dx%d maze' % ((name,) + coor + (maze.length, maze.width)))
+    if maze.map.get(*coor) == MapGridType.MAP_BLOCK:
+        raise SystemExit('solve: %s %d,%d is a wall' % ((name,) + coor))
+
+
+def command_solve(args):
+    from time import perf_counter
+    from SearchRoute import Astar
+
+    maze = load_maze(args.input, args.index) if args.input else new_maze(args)
+    if args.origin:
+        maze.origin_coor = args.origin
+    if args.destination:
+        maze.destination_coor = args.destination
+    check_coor(maze, maze.origin_coor, 'origin')
+    check_coor(maze, maze.destination_coor, 'destination')
+    astar = Astar(maze, diagonal=args.diagonal, heuristic=args.heuristic, weight=args.weight, anytime=args.anytime,
+                  time_budget=args.budget, **SEARCH_MODES[args.mode])
+    start = perf_counter()
+    astar.search()
+    elapsed = perf_counter() - start
+    if args.show:
+        print(maze.to_text())
+    print('cost %s  length %d  expanded %d  seconds %.4f' % (astar.path_cost, len(astar.path),
+                                                             astar.stats.expanded, elapsed))
+    if astar.bound is not None:
+        print('bound %.3f  rounds %d' % (astar.bound, len(astar.stats.solutions)))
+    if args.stats:
+        import json
+        print(json.dumps(astar.stats.as_dict(), indent=1))
+    return 0 if astar.path_cost is not None else 1
+
+
+def command_export(args):
+    maze = load_maze(args.input, args.index)
+    if args.format in ('raw', 'bits'):
+        maze.save(args.output, args.format == 'bits')
+        return 0
+    if args.format == 'text':
+        data = (maze.to_text() + '\n').encode('utf-8')
+    else:
+        from config import MapGridType
+        # 灰度图：墙为黑，路径为白，标记的路径为灰
+        table = bytearray(range(256))
+        table[MapGridType.MAP_EMPTY], table[MapGridType.MAP_BLOCK], table[MapGridType.MAP_PATH] = 255, 0, 128
+        data = b'P5\n%d %d\n255\n' % (maze.length, maze.width) + bytes(maze.map.buf).translate(bytes(table))
+    if args.output == '-':
+        sys.stdout.buffer.write(data)
+    else:
+        with open(args.output, 'wb') as file:
+            file.write(data)
+    return 0
+
+
+def command_info(args):
+    headers = read_headers(args.input)
+    print('%-6s %-12s %-12s %-10s %-10s %-8s %s' % ('index', 'generator', 'size', 'origin', 'dest', 'packed',
+                                                    'seed'))
+    for index, header in enumerate(headers):
+        print('%-6d %-12s %-12s %-10s %-10s %-8s %s' % (
+            index, header['generator'], '%dx%d' % (header['length'], header['width']),
+            '%d,%d' % header['origin'], '%d,%d' % header['destination'], bool(header['encoding']), header['seed']))
+    return 0
+
+
+# 生成迷宫所需的参数，generate、batch与solve共用
+def add_maze_arguments(parser):
+    parser.add_argument('--size', type=parse_size, default=(61, 61), help='N or LxW (default 61)')
+    parser.add_argument('--generator', choices=GENERATORS, default='backtrack')
+    parser.add_argument('--seed', type=parse_seed, default=None, help='integer or string seed')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m MazeCli', description='generate, solve and export mazes')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    generate = commands.add_parser('generate', help='generate one maze')
+    add_maze_arguments(generate)
+    generate.add_argument('--random-ends', action='store_true', help='pick random origin and destination')
+    generate.add_argument('--output', help='maze file to write (prints the maze when omitted)')
+    generate.add_argument('--packed', action='store_true', help='store one bit per cell')
+    generate.add_argument('--show', action='store_true', help='print the maze')
+    generate.set_defaults(func=command_generate)
+
+    batch = commands.add_parser('batch', help='generate many mazes into one file')
+    batch.add_argument('count', type=int)
+    add_maze_arguments(batch)
+    batch.set_defaults(seed=0)
+    batch.add_argument('--workers', type=int, default=1)
+    batch.add_argument('--chunk-size', type=int, default=1)
+    batch.add_argument('--output', default='mazes.bin')
+    batch.add_argument('--packed', action='store_true', help='store one bit per cell')
+    batch.set_defaults(func=command_batch)
+
+    solve = commands.add_parser('solve', help='search a path in a maze file or a new maze')
+    solve.add_argument('input', nargs='?', help='maze file (a new maze is generated when omitted)')
+    solve.add_argument('--index', type=int, default=0, help='maze index in the file')
+    add_maze_arguments(solve)
+    solve.add_argument('--random-ends', action='store_true', help='pick random origin and destination')
+    solve.add_argument('--mode', choices=sorted(SEARCH_MODES), default='fast')
+    solve.add_argument('--diagonal', action='store_true', help='allow diagonal moves')
+    solve.add_argument('--heuristic', choices=('manhattan', 'octile', 'euclidean'),
+                       help='heuristic for the nodes and fast modes')
+    solve.add_argument('--weight', type=float, default=1, help='weighted A*: f = g + weight * h')
+    solve.add_argument('--anytime', action='store_true', help='refine the weighted path (ARA*) until --budget runs out')
+    solve.add_argument('--budget', type=float, help='time budget in seconds for --anytime')
+    solve.add_argument('--origin', type=parse_coor, help='x,y')
+    solve.add_argument('--destination', type=parse_coor, help='x,y')
+    solve.add_argument('--show', action='store_true', help='print the maze with the path')
+    solve.add_argument('--stats', action='store_true', help='print search statistics as JSON')
+    solve.set_defaults(func=command_solve)
+
+    export = commands.add_parser('export', help='convert a maze from a file')
+    export.add_argument('input')
+    export.add_argument('--index', type=int, default=0, help='maze index in the file')
+    export.add_argument('--format', choices=EXPORT_FORMATS, default='text')
+    export.add_argument('--output', default='-', help="output file ('-' for stdout, not for raw/bits)")
+    export.set_defaults(func=command_export)
+
+    info = commands.add_parser('info', help='list the mazes in a file')
+    info.add_argument('input')
+    info.set_defaults(func=command_info)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'export' and args.format in ('raw', 'bits') and args.output == '-':
+        raise SystemExit('--output is required for the %s format' % args.format)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # 输出被提前关闭（如接到head），不再报错
+        sys.stdout = None
+        return 0
+    except (OSError, ValueError) as error:
+        raise SystemExit('%s: %s' % (args.command, error))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
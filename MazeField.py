@@ -0,0 +1,150 @@
+"""
+距离场（流场）
+许多个体走向同一个目标时（如所有玩家都走向终点），不必每个个体各自搜索：从目标出发做一次广度优先搜索，
+求出每个单元到目标的步数distance与走向目标的下一步方向direction，之后任一单元的下一步都只需查表。
+只用于四方向移动，每步的cost为1。
+搜索按层（到目标的步数）推进，每层的波前（这一层的所有单元）一起扩展。安装了numpy时，波前较宽的层以下标数组表示，
+一次运算即完成整层向四个方向的扩展；迷宫的通道很窄，波前往往只有几个单元而层数很多，每层调用numpy的固定开销反而更大，
+因此窄的层仍逐个单元处理。两种方式读写的是同一块内存（numpy数组只是bytearray/array的视图），可以逐层切换。
+没有安装numpy时全部逐个单元处理，结果相同。
+"""
+from array import array
+
+from config import MapGridType
+from MazeGrid import load_numpy
+
+# 方向编码 -> 方向名（与Maze.player_move一致）与坐标偏移。0表示没有下一步（目标本身、墙与不可达的单元）
+DIRECTIONS = (None, 'left', 'right', 'up', 'down')
+OFFSETS = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN = 1, 2, 3, 4
+
+# 波前的单元数不少于该值时用numpy整层扩展
+VECTOR_FRONTIER = 32
+
+
+class DistanceField(object):
+    """
+    地图上所有单元到target（坐标）的距离场。distance为array('i')，不可达的单元（含墙）为-1；
+    direction为bytearray，取值为方向编码（见DIRECTIONS）。单元(x, y)的下标为 y * length + x。
+    地图中墙的分布改变后距离场即失效（由Maze.distance_field负责重建）
+    """
+    def __init__(self, grid, target, vector_frontier=VECTOR_FRONTIER):
+        self.grid = grid
+        self.length = grid.length
+        self.width = grid.width
+        self.target = tuple(target)
+        size = self.length * self.width
+        self.distance = array('i', [-1]) * size
+        self.direction = bytearray(size)
+        # 波前的最大单元数与层数（即最远的可达单元到目标的步数）
+        self.peak_frontier = 0
+        self.depth = 0
+        self.build(vector_frontier)
+
+    def build(self, vector_frontier):
+        length, size = self.length, self.length * self.width
+        distance, direction = self.distance, self.direction
+        # seen：墙与已到达的单元为1
+        table = bytes(1 if code == MapGridType.MAP_BLOCK else 0 for code in range(256))
+        seen = bytearray(bytes(self.grid.buf).translate(table))
+        goal = self.target[1] * length + self.target[0]
+        if seen[goal]:
+            return
+        seen[goal] = 1
+        distance[goal] = 0
+        np = load_numpy()
+        if np is not None:
+            seen_np = np.frombuffer(seen, dtype=np.bool_)
+            distance_np = np.frombuffer(distance, dtype=np.int32)
+            direction_np = np.frombuffer(direction, dtype=np.uint8)
+        else:
+            vector_frontier = size + 1
+        last_row = size - length
+        front = [goal]
+        depth = 0
+        while len(front):
+            self.peak_frontier = max(self.peak_frontier, len(front))
+            depth += 1
+            if len(front) >= vector_frontier:
+                if isinstance(front, list):
+                    front = np.array(front, dtype=np.intp)
+                x = front % length
+                # 相邻单元的下一步是走回波前中的单元，即与扩展的方向相反
+                parts = []
+                for cells, move in ((front[x > 0] - 1, MOVE_RIGHT), (front[x < length - 1] + 1, MOVE_LEFT),
+                                    (front[front >= length] - length, MOVE_DOWN),
+                                    (front[front < last_row] + length, MOVE_UP)):
+                    cells = cells[~seen_np[cells]]
+                    seen_np[cells] = True
+                    direction_np[cells] = move
+                    parts.append(cells)
+                front = np.concatenate(parts)
+                distance_np[front] = depth
+                continue
+            if not isinstance(front, list):
+                front = front.tolist()
+            new_front = []
+            for cell in front:
+                x = cell % length
+                if x > 0 and not seen[cell - 1]:
+                    seen[cell - 1] = 1
+                    direction[cell - 1] = MOVE_RIGHT
+                    new_front.append(cell - 1)
+                if x < length - 1 and not seen[cell + 1]:
+                    seen[cell + 1] = 1
+                    direction[cell + 1] = MOVE_LEFT
+                    new_front.append(cell + 1)
+                if cell >= length and not seen[cell - length]:
+                    seen[cell - length] = 1
+                    direction[cell - length] = MOVE_DOWN
+                    new_front.append(cell - length)
+                if cell < last_row and not seen[cell + length]:
+                    seen[cell + length] = 1
+                    direction[cell + length] = MOVE_UP
+                    new_front.append(cell + length)
+            for cell in new_front:
+                distance[cell] = depth
+            front = new_front
+        # 最后一层为空
+        self.depth = depth - 1
+
+    # 单元(x, y)到目标的步数，不可达时返回None
+    def get_distance(self, x, y):
+        value = self.distance[y * self.length + x]
+        return value if value >= 0 else None
+
+    # 单元(x, y)走向目标的下一步方向（'left'、'right'、'up'、'down'），位于目标或不可达时返回None
+    def next_move(self, x, y):
+        return DIRECTIONS[self.direction[y * self.length + x]]
+
+    # 单元(x, y)走向目标的下一个单元的坐标，位于目标或不可达时返回None
+    def next_step(self, x, y):
+        code = self.direction[y * self.length + x]
+        if not code:
+            return None
+        dx, dy = OFFSETS[code]
+        return x + dx, y + dy
+
+    # 求origin到目标的路径，返回(坐标列表, 路径长度)；不可达时返回([], None)
+    def find_path(self, origin):
+        x, y = origin
+        cost = self.get_distance(x, y)
+        if cost is None:
+            return [], None
+        path = [(x, y)]
+        direction, length = self.direction, self.length
+        for _ in range(cost):
+            dx, dy = OFFSETS[direction[y * length + x]]
+            x, y = x + dx, y + dy
+            path.append((x, y))
+        return path, cost
+
+    # 以numpy数组（形状为(width, length)，与地图共用行列顺序）返回(distance, direction)，便于对许多个体一次查表。
+    # 数组是距离场的视图，不做复制；没有安装numpy时返回None
+    def as_arrays(self):
+        np = load_numpy()
+        if np is None:
+            return None
+        shape = (self.width, self.length)
+        return (np.frombuffer(self.distance, dtype=np.int32).reshape(shape),
+                np.frombuffer(self.direction, dtype=np.uint8).reshape(shape))
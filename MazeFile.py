@@ -0,0 +1,147 @@
+"""
+迷宫的二进制文件格式。一个迷宫为一条记录，多条记录可以直接首尾相接存放在同一个文件中（见MazeGenerator.generate_many）。
+每条记录依次为：
+    固定长度的头部（HEADER，小端）：
+        magic b'MAZE'、版本号、地图的编码方式、生成器名称（16字节，不足补0）、地图长宽、
+        起点与终点（即Maze.origin、Maze.destination）、种子的类型（见SEED_TYPES）、种子的字节数；
+    种子（utf-8文本）；
+    地图：编码方式为ENCODING_RAW时即地图缓冲区本身，每个单元一个字节；
+         为ENCODING_BITS时每个单元一位（1为墙），按行优先的顺序每8个单元打包为一个字节（高位在前），不保存路径标记。
+以ENCODING_RAW保存的地图可以用mmap直接映射，不需要把整个文件读入内存（见MappedGrid）。
+"""
+import struct
+
+from config import MapGridType
+from MazeGrid import ByteGrid, load_numpy
+
+MAGIC = b'MAZE'
+VERSION = 1
+ENCODING_RAW = 0
+ENCODING_BITS = 1
+HEADER = struct.Struct('<4sBB16sIIiiiiBH')
+# 种子的类型：没有种子（或为random.Random对象，无法保存）、整数、字符串
+SEED_NONE, SEED_INT, SEED_STR = 0, 1, 2
+
+# 8个单元（每个单元为0或1）与打包后的字节之间的对照表
+BIT_PATTERNS = [bytes((byte >> (7 - bit)) & 1 for bit in range(8)) for byte in range(256)]
+BIT_VALUES = {pattern: byte for byte, pattern in enumerate(BIT_PATTERNS)}
+
+
+class MappedGrid(ByteGrid):
+    """ 直接使用mmap映射的缓冲区的地图。mapping为映射对象，需要与地图一起保留 """
+    def __init__(self, length, width, buf, mapping=None):
+        self.length = length
+        self.width = width
+        self.buf = buf
+        self.mapping = mapping
+
+    def count(self, value):
+        return bytes(self.buf).count(value)
+
+
+def encode_seed(seed):
+    if isinstance(seed, bool) or seed is None:
+        return SEED_NONE, b''
+    if isinstance(seed, int):
+        return SEED_INT, str(seed).encode('utf-8')
+    if isinstance(seed, str):
+        return SEED_STR, seed.encode('utf-8')
+    return SEED_NONE, b''
+
+
+def decode_seed(seed_type, data):
+    if seed_type == SEED_INT:
+        return int(data.decode('utf-8'))
+    if seed_type == SEED_STR:
+        return data.decode('utf-8')
+    return None
+
+
+# 将每个单元一个字节的地图打包为每个单元一位（1为墙）
+def pack_walls(buf):
+    table = bytes(1 if code == MapGridType.MAP_BLOCK else 0 for code in range(256))
+    cells = bytes(buf).translate(table)
+    np = load_numpy()
+    if np is not None:
+        return np.packbits(np.frombuffer(cells, dtype=np.uint8)).tobytes()
+    cells += bytes(-len(cells) % 8)
+    return bytes(BIT_VALUES[cells[i:i + 8]] for i in range(0, len(cells), 8))
+
+
+# pack_walls的逆运算，返回count个单元的bytearray（墙为MAP_BLOCK，即1，其余为MAP_EMPTY）
+def unpack_walls(data, count):
+    np = load_numpy()
+    if np is not None:
+        cells = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=count)
+        return bytearray(cells.tobytes())
+    return bytearray(b''.join(BIT_PATTERNS[byte] for byte in data)[:count])
+
+
+# 一条记录中地图部分的字节数
+def grid_size(length, width, encoding):
+    if encoding == ENCODING_BITS:
+        return (length * width + 7) // 8
+    return length * width
+
+
+# 生成记录的头部与种子，其后紧接着即为地图（可以逐行写入，见MazeGenerator.stream_eller）
+def pack_header(generator, length, width, origin, destination, seed, encoding=ENCODING_RAW):
+    seed_type, seed_data = encode_seed(seed)
+    name = generator.encode('ascii')
+    if len(name) > 16:
+        raise ValueError('generator name too long: %r' % generator)
+    header = HEADER.pack(MAGIC, VERSION, encoding, name, length, width, origin[0], origin[1],
+                         destination[0], destination[1], seed_type, len(seed_data))
+    return header + seed_data
+
+
+# 生成一条记录
+def pack_record(generator, length, width, origin, destination, seed, buf, encoding=ENCODING_RAW):
+    data = pack_walls(buf) if encoding == ENCODING_BITS else bytes(buf)
+    return pack_header(generator, length, width, origin, destination, seed, encoding) + data
+
+
+# 解析buf中从offset开始的记录的头部。
+# 返回字典：generator、length、width、origin、destination、seed、encoding、data_offset（地图在buf中的起始位置）、end（记录的结束位置）
+def read_header(buf, offset=0):
+    if len(buf) - offset < HEADER.size:
+        raise ValueError('truncated maze record at offset %d' % offset)
+    magic, version, encoding, name, length, width, origin_x, origin_y, dest_x, dest_y, seed_type, seed_size = \
+        HEADER.unpack_from(buf, offset)
+    if magic != MAGIC:
+        raise ValueError('not a maze record at offset %d' % offset)
+    if version != VERSION:
+        raise ValueError('unsupported maze file version: %d' % version)
+    if encoding not in (ENCODING_RAW, ENCODING_BITS):
+        raise ValueError('unknown grid encoding: %d' % encoding)
+    if not length or not width:
+        raise ValueError('empty maze (%dx%d) at offset %d' % (length, width, offset))
+    if seed_type not in (SEED_NONE, SEED_INT, SEED_STR):
+        raise ValueError('unknown seed type: %d' % seed_type)
+    seed_offset = offset + HEADER.size
+    data_offset = seed_offset + seed_size
+    end = data_offset + grid_size(length, width, encoding)
+    if len(buf) < end:
+        raise ValueError('truncated maze record at offset %d' % offset)
+    return {
+        'generator': name.rstrip(b'\x00').decode('ascii'),
+        'length': length,
+        'width': width,
+        'origin': (origin_x, origin_y),
+        'destination': (dest_x, dest_y),
+        'seed': decode_seed(seed_type, bytes(buf[seed_offset:data_offset])),
+        'encoding': encoding,
+        'data_offset': data_offset,
+        'end': end,
+    }
+
+
+# 根据头部信息取出地图。原始编码且buf为映射的内存时，地图直接使用其中的一段，不做复制
+def read_grid(buf, header, mapping=None):
+    length, width = header['length'], header['width']
+    start, end = header['data_offset'], header['end']
+    if header['encoding'] == ENCODING_BITS:
+        return ByteGrid.from_buffer(length, width, unpack_walls(buf[start:end], length * width))
+    if mapping is not None:
+        return MappedGrid(length, width, memoryview(mapping)[start:end], mapping)
+    return ByteGrid.from_buffer(length, width, bytearray(buf[start:end]))
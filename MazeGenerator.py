@@ -2,9 +2,19 @@
 本文件为迷宫类，包括迷宫的属性以及迷宫的生成算法
 """
 
-from random import randint, choice
+import mmap
+import os
+from random import Random
+from array import array
+from collections import deque
+
 from config import MapGridType, WallDirection
-from SearchRoute import Astar
+from MazeGrid import create_grid, load_numpy
+from MazeStructures import UnionFind, Frontier, check_selection
+from MazeStats import GeneratorStats
+from MazeFile import ENCODING_BITS, ENCODING_RAW, pack_header, pack_record, read_header, read_grid
+# 寻路相关的模块（SearchRoute、MazeGraph、MazeBatch等）、multiprocessing与numpy都在第一次用到时才导入，
+# 只生成、读写迷宫的任务不需要为它们付出启动时间（见MazeCli）
 
 
 class Maze(object):
@@ -15,9 +25,14 @@ class Maze(object):
     在生成迷宫时，都以xy形式定位路径单元。
     这样设计的缺点是迷宫的边界尺寸都必须是奇数。
     """
-    def __init__(self, length, width, generator='backtrack', random_origin=False, random_destination=False):
+    def __init__(self, length, width, generator='backtrack', random_origin=False, random_destination=False,
+                 backend='bytearray', selection='random', seed=None, grid=None):
+        # 随机数发生器。生成迷宫与选取起终点都只使用它，因此同一个seed（整数或random.Random对象）总是得到相同的迷宫
+        self.seed = seed
+        self.rand = seed if isinstance(seed, Random) else Random(seed)
         self.random_origin = random_origin
         self.random_destination = random_destination
+        self.generator_name = generator
         # 地图长宽
         self.length = length
         self.width = width
@@ -29,66 +44,209 @@ class Maze(object):
         # scaled尺寸即大地图长宽的一半，以此作为xy的上限，以2x+1、2y+1作为候选路径点（详见各个Generate类）
         self.scaled_length = (self.length - 1) // 2
         self.scaled_width = (self.width - 1) // 2
-        # 定义生成器
-        if generator == 'backtrack':
-            self.generator = GeneratorRecursive(self)
-        elif generator == 'cross':
-            self.generator = GeneratorCross(self)
-        elif generator == 'ufs':
-            self.generator = GeneratorUFS(self)
-        elif generator == 'mybacktrack':
-            self.generator = MyGeneratorRecursive(self)
+        # 定义生成器（见GENERATORS），回溯法的两个生成器另外接受selection
+        try:
+            generator_class = GENERATORS[generator]
+        except KeyError:
+            raise ValueError('unknown generator: %r' % generator)
+        if generator_class is GeneratorRecursive or generator_class is MyGeneratorRecursive:
+            self.generator = generator_class(self, selection)
+        else:
+            self.generator = generator_class(self)
         # 起点和终点。若不用mybacktrack，则都以scaled xy表示
         self.origin = self.set_origin()
         self.destination = self.set_destination()
         # 另外存储起点和终点的实际坐标，用于a*算法自动寻路
         self.origin_coor = self.get_origin_coor()
         self.destination_coor = self.get_destination_coor()
-        # 定义迷宫地图
-        self.map = [[0] * self.length for _ in range(self.width)]
-        # 声明a*对象
-        self.astar = Astar(self)
+        # 定义迷宫地图。地图存储在一维的字节缓冲区中（详见MazeGrid），起点、终点与玩家位置只以坐标记录。
+        # grid为已有的地图（如从文件中读入的），此时不再分配
+        self.map = grid if grid is not None else create_grid(self.length, self.width, backend)
+        # 每个单元的通行cost（1～255，移动进入该单元的cost为平移/对角cost的倍数），下标与地图相同的bytearray，
+        # 只由a*的普通、快速与anytime模式使用（见SearchRoute）。为None时所有单元都为1，第一次set_cost时才分配
+        self.costs = None
+        # 记录需要重绘的单元（供MazePlay增量绘制）。all_dirty为True时表示整张地图都需要重绘，此时不再逐个记录单元
+        self.all_dirty = True
+        self.dirty_cells = set()
+        # 走廊图与树距离索引（见MazeGraph），第一次用到时才建立。地图中墙的分布改变时失效
+        self.corridor_graph = None
+        self.tree_index = None
+        # 分层寻路的簇抽象（见MazeHierarchy）。与上面两者不同，墙变化时只更新受影响的簇
+        self.hierarchy = None
+        # 以终点为目标的增量规划器（见MazeReplan），玩家移动或墙变化后修复路径而不是重新搜索
+        self.replanner = None
+        # replan在地图上标记的路径
+        self.replan_path = []
+        # 目标（坐标） -> 距离场（见MazeField），供许多个体走向同一目标时查表。地图中墙的分布改变时失效
+        self.distance_fields = {}
+        # a*对象，第一次用到时才创建（见astar）
+        self.astar_engine = None
         # 玩家游玩时当前的坐标
         self.player_loc = self.origin_coor
 
     # 设置图中某个格子的值
     def set_grid(self, x, y, value):
-        # x代表长（横向、列），y代表宽（纵向、行），故这里设置时xy颠倒，符合嵌套列表的表示方法
-        if value == MapGridType.MAP_ORIGIN:
-            self.map[y][x] = 'O'
-        elif value == MapGridType.MAP_DESTINATION:
-            self.map[y][x] = 'D'
-        elif value == MapGridType.MAP_EMPTY:
-            self.map[y][x] = 0
-        elif value == MapGridType.MAP_BLOCK:
-            self.map[y][x] = 1
-        elif value == MapGridType.MAP_PLAYER:
-            self.map[y][x] = 3
-
-    # 获得单元的属性
+        # 起点、终点、玩家以坐标记录，单元中只存储其下方的路径
+        if value == MapGridType.MAP_ORIGIN or value == MapGridType.MAP_DESTINATION or value == MapGridType.MAP_PLAYER:
+            value = MapGridType.MAP_EMPTY
+        if not self.all_dirty:
+            self.dirty_cells.add((x, y))
+        if (value == MapGridType.MAP_BLOCK) != (self.map.get(x, y) == MapGridType.MAP_BLOCK):
+            self.corridor_graph = None
+            self.tree_index = None
+            self.distance_fields = {}
+            if self.hierarchy is not None:
+                self.hierarchy.mark_changed(x, y)
+            if self.replanner is not None:
+                self.replanner.mark_changed(x, y)
+        self.map.set(x, y, value)
+
+    # 设置单元的通行cost
+    def set_cost(self, x, y, cost):
+        if not 1 <= cost <= 255:
+            raise ValueError('cell cost must be between 1 and 255: %r' % cost)
+        if self.costs is None:
+            self.costs = bytearray(b'\x01') * (self.length * self.width)
+        self.costs[y * self.length + x] = cost
+
+    # 获得单元的属性。起点、终点与玩家的位置优先于单元中存储的值
     def get_grid_type(self, x, y):
-        if self.map[y][x] == 0:
-            return MapGridType.MAP_EMPTY
-        elif self.map[y][x] == 1:
-            return MapGridType.MAP_BLOCK
-        elif self.map[y][x] == 'O':
+        if (x, y) == self.player_loc and self.player_loc != self.origin_coor:
+            return MapGridType.MAP_PLAYER
+        if (x, y) == self.origin_coor:
             return MapGridType.MAP_ORIGIN
-        elif self.map[y][x] == 'D':
+        if (x, y) == self.destination_coor:
             return MapGridType.MAP_DESTINATION
-        elif self.map[y][x] == 2:
-            return MapGridType.MAP_PATH
-        else:
-            return MapGridType.MAP_PLAYER
+        return self.map.get(x, y)
 
     # 将图中所有单元都设成某个值
     def reset_map(self, value):
-        for y in range(self.width):
-            for x in range(self.length):
-                self.set_grid(x, y, value)
-
-    # 重置a*对象信息(只用在MazePlay中)
-    def reset_astar(self):
-        self.astar = Astar(self)
+        self.map.fill(value)
+        self.mark_all_dirty()
+        self.corridor_graph = None
+        self.tree_index = None
+        self.hierarchy = None
+        self.replanner = None
+        self.replan_path = []
+        self.distance_fields = {}
+
+    # 获取走廊图。生成器直接写地图缓冲区，因此生成迷宫后第一次调用时才建立
+    def get_corridor_graph(self):
+        if self.corridor_graph is None:
+            from MazeGraph import CorridorGraph
+            self.corridor_graph = CorridorGraph(self.map)
+        return self.corridor_graph
+
+    # 获取分层寻路的簇抽象。簇的尺寸与已有的不同时重新建立
+    def get_hierarchy(self, cluster_size=16):
+        if self.hierarchy is None or self.hierarchy.cluster_size != cluster_size:
+            from MazeHierarchy import ClusterGraph
+            self.hierarchy = ClusterGraph(self.map, cluster_size)
+        return self.hierarchy
+
+    # 获取增量规划器。终点改变时重新建立
+    def get_replanner(self):
+        if self.replanner is None or self.replanner.destination != self.destination_coor:
+            from MazeReplan import DStarLite
+            self.replanner = DStarLite(self.map, self.destination_coor)
+        return self.replanner
+
+    # 用增量规划器求玩家当前位置到终点的路径，替换上次replan标记的路径，返回(路径, 路径长度)
+    def replan(self):
+        for x, y in self.replan_path:
+            if self.map.get(x, y) == MapGridType.MAP_PATH:
+                self.set_grid(x, y, MapGridType.MAP_EMPTY)
+        path, cost, _ = self.get_replanner().find_path(self.player_loc)
+        for x, y in path:
+            if (x, y) != self.player_loc and (x, y) != self.destination_coor:
+                self.set_grid(x, y, MapGridType.MAP_PATH)
+        self.replan_path = path
+        return path, cost
+
+    # 获取以target（坐标，默认为终点）为目标的距离场，已有时直接返回缓存的距离场
+    def distance_field(self, target=None):
+        target = tuple(target) if target is not None else self.destination_coor
+        field = self.distance_fields.get(target)
+        if field is None:
+            from MazeField import DistanceField
+            field = self.distance_fields[target] = DistanceField(self.map, target)
+        return field
+
+    # 获取树距离索引。迷宫有环时索引的is_tree为False，不能用于查询
+    def get_tree_index(self):
+        if self.tree_index is None:
+            from MazeGraph import TreeIndex
+            self.tree_index = TreeIndex(self.get_corridor_graph())
+        return self.tree_index
+
+    # 标记某个单元需要重绘
+    def mark_dirty(self, x, y):
+        if not self.all_dirty:
+            self.dirty_cells.add((x, y))
+
+    # 标记整张地图需要重绘
+    def mark_all_dirty(self):
+        self.all_dirty = True
+        self.dirty_cells.clear()
+
+    # 取出并清空需要重绘的信息，返回(是否需要整体重绘, 需要重绘的单元集合)
+    def pop_dirty(self):
+        all_dirty, dirty_cells = self.all_dirty, self.dirty_cells
+        self.all_dirty = False
+        self.dirty_cells = set()
+        return all_dirty, dirty_cells
+
+    # a*对象（只用在MazePlay中），第一次用到时才导入SearchRoute并创建
+    @property
+    def astar(self):
+        if self.astar_engine is None:
+            self.reset_astar()
+        return self.astar_engine
+
+    # 重置a*对象信息(只用在MazePlay中)。options为Astar的参数，如fast=True
+    def reset_astar(self, **options):
+        from SearchRoute import Astar
+        self.astar_engine = Astar(self, **options)
+
+    # 批量求多对(起点, 终点)之间的路径（见MazeBatch），按输入顺序逐个返回(路径, 路径长度)，不在地图上标记路径。
+    # workers为进程数；options为Astar的参数，默认使用快速模式
+    def find_paths(self, pairs, workers=1, chunk_size=16, **options):
+        from MazeBatch import QueryMap, find_paths
+        query_map = QueryMap(self.map, self.corridor_graph, self.tree_index)
+        return find_paths(self.map, pairs, workers, chunk_size, query_map, **options)
+
+    # 转换为文件中的一条记录（见MazeFile）。packed为True时每个单元只存一位，不保存路径标记
+    def to_bytes(self, packed=False):
+        return pack_record(self.generator_name, self.length, self.width, self.origin, self.destination, self.seed,
+                           self.map.buf, ENCODING_BITS if packed else ENCODING_RAW)
+
+    def save(self, path, packed=False):
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes(packed))
+
+    # 从buf中offset处的记录创建迷宫。mapping为buf所在的mmap对象，原始编码的地图会直接映射其中的内存
+    @classmethod
+    def from_record(cls, buf, offset=0, mapping=None):
+        header = read_header(buf, offset)
+        maze = cls(header['length'], header['width'], header['generator'], seed=header['seed'],
+                   grid=read_grid(buf, header, mapping))
+        maze.origin, maze.destination = header['origin'], header['destination']
+        maze.origin_coor = maze.get_origin_coor()
+        maze.destination_coor = maze.get_destination_coor()
+        if not maze.is_valid(*maze.origin_coor) or not maze.is_valid(*maze.destination_coor):
+            raise ValueError('origin or destination outside the %dx%d maze at offset %d' % (maze.length, maze.width,
+                                                                                            offset))
+        maze.player_loc = maze.origin_coor
+        return maze
+
+    # 从文件中读取迷宫。use_mmap为True时以写时复制的方式映射文件，修改地图不会写回文件
+    @classmethod
+    def load(cls, path, offset=0, use_mmap=True):
+        with open(path, 'rb') as file:
+            if not use_mmap:
+                return cls.from_record(file.read(), offset)
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        return cls.from_record(mapping, offset, mapping)
 
     # 设置起点
     def set_origin(self):
@@ -98,8 +256,8 @@ class Maze(object):
             else:
                 return 1, 1
         if not isinstance(self.generator, MyGeneratorRecursive):
-            return randint(0, self.scaled_length - 1), randint(0, self.scaled_width - 1)
-        return randint(1, self.length - 1), randint(1, self.width - 1)
+            return self.rand.randint(0, self.scaled_length - 1), self.rand.randint(0, self.scaled_width - 1)
+        return self.rand.randint(1, self.length - 1), self.rand.randint(1, self.width - 1)
 
     def get_origin_coor(self):
         if isinstance(self.generator, MyGeneratorRecursive):
@@ -116,9 +274,9 @@ class Maze(object):
         if not self.random_destination:
             destination = length - 1, width - 1
         else:
-            destination = randint(0, length - 1), randint(0, width - 1)
+            destination = self.rand.randint(0, length - 1), self.rand.randint(0, width - 1)
         while destination == self.origin:
-            destination = randint(0, length - 1), randint(0, width - 1)
+            destination = self.rand.randint(0, length - 1), self.rand.randint(0, width - 1)
         return destination
 
     def get_destination_coor(self):
@@ -135,29 +293,49 @@ class Maze(object):
 
     # 用于回溯生成法：定义每个单元是否被访问过。在生成迷宫时，初始所有的单元都是墙（1），当墙被改为路径点时，单元的值变成0，即视为已被访问过。
     def is_visited(self, x, y):
-        return self.map[y][x] != 1
+        return self.map.get(x, y) != MapGridType.MAP_BLOCK
 
     # 判断一个单元是否是路径单元（是否能走），和is_visited相同
     def can_move(self, x, y):
-        return self.map[y][x] != 1
+        return self.map.get(x, y) != MapGridType.MAP_BLOCK
+
+    # 判断地图中所有的非墙单元是否都与起点连通（广度优先搜索）
+    def is_connected(self):
+        buf = self.map.buf
+        length, width = self.length, self.width
+        start = self.map.index(self.origin_coor[0], self.origin_coor[1])
+        if buf[start] == MapGridType.MAP_BLOCK:
+            return False
+        visited = bytearray(length * width)
+        visited[start] = 1
+        queue = deque([start])
+        reached = 1
+        while queue:
+            cell = queue.popleft()
+            y, x = divmod(cell, length)
+            for neighbor, inside in ((cell - 1, x > 0), (cell + 1, x < length - 1),
+                                     (cell - length, y > 0), (cell + length, y < width - 1)):
+                if inside and not visited[neighbor] and buf[neighbor] != MapGridType.MAP_BLOCK:
+                    visited[neighbor] = 1
+                    reached += 1
+                    queue.append(neighbor)
+        return reached == length * width - self.map.count(MapGridType.MAP_BLOCK)
 
     def show_map(self):
-        for row in self.map:
-            s = ''
-            for entry in row:
-                if entry == MapGridType.MAP_ORIGIN:             # 起点
-                    s += ' O'
-                elif entry == MapGridType.MAP_DESTINATION:      # 终点
-                    s += ' D'
-                elif entry == MapGridType.MAP_EMPTY:            # 空白路径
-                    s += '  '
-                elif entry == MapGridType.MAP_BLOCK:            # 墙
-                    s += ' #'
-                elif entry == MapGridType.MAP_PATH:             # a*生成路径
-                    s += ' X'
-                else:                                           # 玩家当前位置
-                    s += ' P'
-            print(s)
+        print(self.to_text())
+
+    # 地图的文本形式，每个单元两个字符，行与行之间以换行分隔
+    def to_text(self):
+        symbols = {
+            MapGridType.MAP_ORIGIN: ' O',           # 起点
+            MapGridType.MAP_DESTINATION: ' D',      # 终点
+            MapGridType.MAP_EMPTY: '  ',            # 空白路径
+            MapGridType.MAP_BLOCK: ' #',            # 墙
+            MapGridType.MAP_PATH: ' X',             # a*生成路径
+            MapGridType.MAP_PLAYER: ' P',           # 玩家当前位置
+        }
+        return '\n'.join(''.join(symbols[self.get_grid_type(x, y)] for x in range(self.length))
+                         for y in range(self.width))
 
     def player_move(self, direction):
         init_x, init_y = self.player_loc[0], self.player_loc[1]
@@ -165,12 +343,27 @@ class Maze(object):
         offset = direction_dict[direction]
         new_x, new_y = init_x + offset[0], init_y + offset[1]
         if self.can_move(new_x, new_y):
-            if self.player_loc == self.origin_coor:
-                self.set_grid(init_x, init_y, 'O')
-            else:
-                self.set_grid(init_x, init_y, 0)
             self.player_loc = new_x, new_y
-            self.set_grid(new_x, new_y, 3)
+            self.mark_dirty(init_x, init_y)
+            self.mark_dirty(new_x, new_y)
+
+
+class Generator(object):
+    """
+    生成器的公共部分。stats为最近一次生成的统计信息（见MazeStats.GeneratorStats）；
+    on_step(x, y, frontier大小)在主循环的每一步调用，sample_every不为0时每隔该步数记录一次frontier的大小
+    """
+    def __init__(self, maze):
+        self.maze = maze
+        self.on_step = None
+        self.sample_every = 0
+        self.stats = GeneratorStats()
+
+    # 开始一次生成：重置统计信息，返回主循环每一步调用的observe（见MazeStats.Stats.observer），不需要时为None
+    def begin(self):
+        self.stats = GeneratorStats(self.sample_every)
+        self.stats.start()
+        return self.stats.observer(self.on_step)
 
 
 # 迷宫生成方法1：回溯。
@@ -185,159 +378,166 @@ class Maze(object):
 #     2.2. 否则：
 #         2.2.1. 栈顶路径单元出栈。
 # https://blog.csdn.net/marble_xu/article/details/88201319?spm=1001.2014.3001.5501
-class GeneratorRecursive(object):
-    def __init__(self, maze):
-        self.maze = maze
+# 堆栈使用Frontier实现，每次从中选取哪个单元由selection决定（见MazeStructures.Frontier.select_index）：
+# 'newest'即严格的回溯（总是取栈顶），'random'为随机选取，0~1之间的数值为两者按比例混合（growing tree算法）。
+# 堆栈中记录的是路径单元在地图缓冲区中的下标，相邻的路径单元的下标相差2或2 * length，两者之间的墙单元位于正中间。
+class GeneratorRecursive(Generator):
+    def __init__(self, maze, selection='random'):
+        super(GeneratorRecursive, self).__init__(maze)
+        self.selection = check_selection(selection)
 
     def generate(self):
+        observe = self.begin()
         # 首先将地图所有单元都设置为墙
         self.maze.reset_map(MapGridType.MAP_BLOCK)
+        self.stats.lap('reset')
         # 调用回溯算法
-        self.recursive_backtracker()
+        self.recursive_backtracker(observe)
+        self.stats.lap('carve')
 
     # 主循环的实现
-    def recursive_backtracker(self):
+    def recursive_backtracker(self, observe=None):
         origin_x, origin_y = self.maze.origin
-        dest_x, dest_y = self.maze.destination
-        # 映射到原始地图上，确定起、终点单元的位置
-        self.maze.set_grid(2 * origin_x + 1, 2 * origin_y + 1, MapGridType.MAP_ORIGIN)
+        length = self.maze.length
+        # 映射到原始地图上，将起点单元设为路径单元（标记为已访问）。起、终点本身以坐标记录在maze中
+        origin = self.maze.map.index(2 * origin_x + 1, 2 * origin_y + 1)
+        self.maze.map.buf[origin] = MapGridType.MAP_EMPTY
 
-        checklist = [(origin_x, origin_y)]          # checklist即为堆栈，使用缩小一半的xy来记录所有的白色单元
+        checklist = Frontier([origin], self.maze.rand)  # checklist即为堆栈
+        steps, peak = 0, 1
         while len(checklist):
-            # entry = checklist[-1]                   # 取栈顶的单元/随机取栈内的一个单元
-            entry_index = randint(0, len(checklist) - 1)
-            entry = checklist[entry_index]
+            steps += 1
+            entry_index = checklist.select_index(self.selection)
+            cell = checklist[entry_index]
             # 检查这个单元周围是否有未被访问过的单元。若没有，则出栈
-            if not self.check_adjacent_grid(entry[0], entry[1], checklist):
-                # checklist.remove(entry)
-                checklist.pop(entry_index)
-        self.maze.set_grid(2 * dest_x + 1, 2 * dest_y + 1, MapGridType.MAP_DESTINATION)
+            if not self.check_adjacent_grid(cell, checklist):
+                checklist.swap_remove(entry_index)
+            elif len(checklist) > peak:
+                peak = len(checklist)
+            if observe is not None:
+                observe(cell % length, cell // length, len(checklist))
+        self.stats.steps, self.stats.peak_frontier = steps, peak
 
     # 从一个单元的四周寻找未访问过的路径单元，并将其加入checklist，标记为已访问（值改成0）
-    def check_adjacent_grid(self, x, y, checklist):
-        # self.maze.show_map()
-        # print('======================================')
-        directions = []
-        if x > 0:
-            # 左边
-            if not self.maze.is_visited(2 * (x - 1) + 1, 2 * y + 1):
-                directions.append(WallDirection.WALL_LEFT)
-        if y > 0:
-            # 上面
-            if not self.maze.is_visited(2 * x + 1, 2 * (y - 1) + 1):
-                directions.append(WallDirection.WALL_UP)
-        if x < self.maze.scaled_length - 1:
-            # 右边
-            if not self.maze.is_visited(2 * (x + 1) + 1, 2 * y + 1):
-                directions.append(WallDirection.WALL_RIGHT)
-        if y < self.maze.scaled_width - 1:
-            # 下面
-            if not self.maze.is_visited(2 * x + 1, 2 * (y + 1) + 1):
-                directions.append(WallDirection.WALL_DOWN)
+    def check_adjacent_grid(self, cell, checklist):
+        buf = self.maze.map.buf
+        length = self.maze.length
+        y, x = divmod(cell, length)
+        # 未访问过的相邻路径单元相对当前单元的偏移
+        offsets = []
+        if x > 1 and buf[cell - 2] == MapGridType.MAP_BLOCK:
+            offsets.append(-2)                      # 左边
+        if y > 1 and buf[cell - 2 * length] == MapGridType.MAP_BLOCK:
+            offsets.append(-2 * length)             # 上面
+        if x < length - 2 and buf[cell + 2] == MapGridType.MAP_BLOCK:
+            offsets.append(2)                       # 右边
+        if y < self.maze.width - 2 and buf[cell + 2 * length] == MapGridType.MAP_BLOCK:
+            offsets.append(2 * length)              # 下面
 
         # 若存在未访问过的格子：
-        if len(directions):
-            # 随机取一个为未访问过的单元
-            direction = choice(directions)
-            # 将该单元设置为MAP_EMPTY（路径），并打通这个单元与当前单元之间的墙，并将该单元加入栈
-            if direction == WallDirection.WALL_LEFT:
-                self.maze.set_grid(2 * (x - 1) + 1, 2 * y + 1, MapGridType.MAP_EMPTY)
-                self.maze.set_grid(2 * x, 2 * y + 1, MapGridType.MAP_EMPTY)
-                checklist.append((x - 1, y))
-            elif direction == WallDirection.WALL_UP:
-                self.maze.set_grid(2 * x + 1, 2 * (y - 1) + 1, MapGridType.MAP_EMPTY)
-                self.maze.set_grid(2 * x + 1, 2 * y, MapGridType.MAP_EMPTY)
-                checklist.append((x, y - 1))
-            elif direction == WallDirection.WALL_RIGHT:
-                self.maze.set_grid(2 * (x + 1) + 1, 2 * y + 1, MapGridType.MAP_EMPTY)
-                self.maze.set_grid(2 * x + 2, 2 * y + 1, MapGridType.MAP_EMPTY)
-                checklist.append((x + 1, y))
-            elif direction == WallDirection.WALL_DOWN:
-                self.maze.set_grid(2 * x + 1, 2 * (y + 1) + 1, MapGridType.MAP_EMPTY)
-                self.maze.set_grid(2 * x + 1, 2 * y + 2, MapGridType.MAP_EMPTY)
-                checklist.append((x, y + 1))
+        if len(offsets):
+            # 随机取一个为未访问过的单元，将其设置为MAP_EMPTY（路径），并打通这个单元与当前单元之间的墙，并将该单元加入栈
+            offset = self.maze.rand.choice(offsets)
+            buf[cell + offset // 2] = MapGridType.MAP_EMPTY
+            buf[cell + offset] = MapGridType.MAP_EMPTY
+            checklist.append(cell + offset)
             return True
         else:
             return False
 
 
-class MyGeneratorRecursive(object):
+class MyGeneratorRecursive(Generator):
     """ 不用xy映射法生成的迷宫。缺点是会产生四周不相连的墙面 """
-    def __init__(self, maze):
-        self.maze = maze
+    def __init__(self, maze, selection='random'):
+        super(MyGeneratorRecursive, self).__init__(maze)
+        self.selection = check_selection(selection)
 
     def generate(self):
+        observe = self.begin()
         # 首先将地图所有单元都设置为墙
         self.maze.reset_map(MapGridType.MAP_BLOCK)
+        self.stats.lap('reset')
         # 调用回溯算法
-        self.recursive_backtracker()
+        self.recursive_backtracker(observe)
+        self.stats.lap('carve')
 
-    def recursive_backtracker(self):
+    def recursive_backtracker(self, observe=None):
         origin_x, origin_y = self.maze.origin
         dest_x, dest_y = self.maze.destination
-        # 映射到原始地图上，确定起点单元的位置
-        self.maze.set_grid(origin_x, origin_y, MapGridType.MAP_ORIGIN)
+        length = self.maze.length
+        # 映射到原始地图上，将起点单元设为路径单元（标记为已访问）
+        origin = self.maze.map.index(origin_x, origin_y)
+        self.maze.map.buf[origin] = MapGridType.MAP_EMPTY
 
-        checklist = [(origin_x, origin_y)]          # checklist即为堆栈，使用缩小一半的xy来记录所有的白色单元
+        checklist = Frontier([origin], self.maze.rand)  # checklist即为堆栈，记录单元在地图缓冲区中的下标
+        steps, peak = 0, 1
         while len(checklist):
-            # entry = checklist[-1]                   # 取栈顶的单元/随机取栈内的一个单元
-            entry_index = randint(0, len(checklist) - 1)
-            entry = checklist[entry_index]
+            steps += 1
+            entry_index = checklist.select_index(self.selection)
+            cell = checklist[entry_index]
             # 检查这个单元周围是否有未被访问过的单元。若没有，则出栈
-            if not self.check_adjacent_grid(entry[0], entry[1], checklist):
-                # checklist.remove(entry)
-                checklist.pop(entry_index)
-        self.maze.set_grid(dest_x, dest_y, MapGridType.MAP_DESTINATION)
+            if not self.check_adjacent_grid(cell, checklist):
+                checklist.swap_remove(entry_index)
+            elif len(checklist) > peak:
+                peak = len(checklist)
+            if observe is not None:
+                observe(cell % length, cell // length, len(checklist))
+        self.stats.steps, self.stats.peak_frontier = steps, peak
+        # 终点可能落在墙单元上，将其打通
+        self.connect_cell(self.maze.map.index(dest_x, dest_y))
+
+    # 若单元是墙，则从它出发找到最近的路径单元，将两者之间（含该单元）的墙都打通，使其与已生成的路径相连
+    def connect_cell(self, target):
+        buf = self.maze.map.buf
+        length, width = self.maze.length, self.maze.width
+        if buf[target] != MapGridType.MAP_BLOCK:
+            return
+        parents = {target: -1}
+        queue = deque([target])
+        while queue:
+            cell = queue.popleft()
+            if buf[cell] != MapGridType.MAP_BLOCK:
+                break
+            y, x = divmod(cell, length)
+            for neighbor, inside in ((cell - 1, x > 0), (cell + 1, x < length - 1),
+                                     (cell - length, y > 0), (cell + length, y < width - 1)):
+                if inside and neighbor not in parents:
+                    parents[neighbor] = cell
+                    queue.append(neighbor)
+        cell = parents[cell]
+        while cell >= 0:
+            buf[cell] = MapGridType.MAP_EMPTY
+            cell = parents[cell]
 
     # 从一个节点的四周寻找未访问过的节点，并将其加入checklist，标记为已访问（值改成0）
     # 加入额外的限制：相邻的未访问的点，若其周围已经有另外的已访问的点，则不做访问
-    def check_adjacent_grid(self, x, y, checklist):
-        directions = []
-        if x > 1:
-            # 左边
-            if not self.maze.is_visited(x - 1, y) and \
-                    not self.maze.is_visited(x - 2, y) and \
-                    not self.maze.is_visited(x - 1, y + 1) and \
-                    not self.maze.is_visited(x - 1, y - 1):
-                directions.append(WallDirection.WALL_LEFT)
-        if y > 1:
-            # 上面
-            if not self.maze.is_visited(x, y - 1) and \
-                    not self.maze.is_visited(x, y - 2) and \
-                    not self.maze.is_visited(x - 1, y - 1) and \
-                    not self.maze.is_visited(x + 1, y - 1):
-                directions.append(WallDirection.WALL_UP)
-        if x < self.maze.length - 2:
-            # 右边
-            if not self.maze.is_visited(x + 1, y) and \
-                    not self.maze.is_visited(x + 2, y) and \
-                    not self.maze.is_visited(x + 1, y - 1) and \
-                    not self.maze.is_visited(x + 1, y + 1):
-                directions.append(WallDirection.WALL_RIGHT)
-        if y < self.maze.width - 2:
-            # 下面
-            if not self.maze.is_visited(x, y + 1) and \
-                    not self.maze.is_visited(x, y + 2) and \
-                    not self.maze.is_visited(x - 1, y + 1) and \
-                    not self.maze.is_visited(x + 1, y + 1):
-                directions.append(WallDirection.WALL_DOWN)
+    def check_adjacent_grid(self, cell, checklist):
+        buf = self.maze.map.buf
+        length = self.maze.length
+        y, x = divmod(cell, length)
+        width = self.maze.width
+        # 依次为左边、上面、右边、下面。step为前进方向上的偏移，side为与之垂直方向上的偏移（两侧的单元也须在地图内）
+        candidates = (
+            (x > 1 and 0 < y < width - 1, -1, length),
+            (y > 1 and 0 < x < length - 1, -length, 1),
+            (x < length - 2 and 0 < y < width - 1, 1, length),
+            (y < width - 2 and 0 < x < length - 1, length, 1),
+        )
+        steps = []
+        for allowed, step, side in candidates:
+            if allowed and \
+                    buf[cell + step] == MapGridType.MAP_BLOCK and \
+                    buf[cell + 2 * step] == MapGridType.MAP_BLOCK and \
+                    buf[cell + step + side] == MapGridType.MAP_BLOCK and \
+                    buf[cell + step - side] == MapGridType.MAP_BLOCK:
+                steps.append(step)
 
         # 若存在未访问过的格子：
-        if len(directions):
+        if len(steps):
             # 随机取一个为未访问过的格子
-            direction = choice(directions)
-            if direction == WallDirection.WALL_LEFT:
-                self.maze.set_grid(x - 1, y, MapGridType.MAP_EMPTY)
-                checklist.append((x - 1, y))
-            elif direction == WallDirection.WALL_UP:
-                self.maze.set_grid(x, y - 1, MapGridType.MAP_EMPTY)
-                checklist.append((x, y - 1))
-            elif direction == WallDirection.WALL_RIGHT:
-                self.maze.set_grid(x + 1, y, MapGridType.MAP_EMPTY)
-                checklist.append((x + 1, y))
-            elif direction == WallDirection.WALL_DOWN:
-                self.maze.set_grid(x, y + 1, MapGridType.MAP_EMPTY)
-                checklist.append((x, y + 1))
+            step = self.maze.rand.choice(steps)
+            buf[cell + step] = MapGridType.MAP_EMPTY
+            checklist.append(cell + step)
             return True
         else:
             return False
@@ -355,62 +555,62 @@ class MyGeneratorRecursive(object):
 #         2.1.2. 十字的四个边，随机选择三个，这三个边随机选择一个墙单元，将其打通成路径单元
 #         2.1.3. 对四个小矩阵块继续递归
 #     2.2. 不能继续分割，返回
-class GeneratorCross(object):
+class GeneratorCross(Generator):
     """ 缺点是可能会生成含有多个很长的直路的迷宫 """
-    def __init__(self, maze):
-        self.maze = maze
-
     def generate(self):
-        # 首先将四周都设置为墙
-        for x in range(0, self.maze.length):
-            self.maze.set_grid(x, 0, MapGridType.MAP_BLOCK)
-            self.maze.set_grid(x, self.maze.width - 1, MapGridType.MAP_BLOCK)
-        for y in range(0, self.maze.width):
-            self.maze.set_grid(0, y, MapGridType.MAP_BLOCK)
-            self.maze.set_grid(self.maze.length - 1, y, MapGridType.MAP_BLOCK)
-
-        # 标记起点终点
-        origin_x, origin_y = self.maze.origin
-        dest_x, dest_y = self.maze.destination
-        # 映射到原始地图上，确定起、终点单元的位置
-        self.maze.set_grid(2 * origin_x + 1, 2 * origin_y + 1, MapGridType.MAP_ORIGIN)
-
-        # 执行递归。
+        observe = self.begin()
+        # 首先将内部都设置为路径，四周都设置为墙
+        grid = self.maze.map
+        self.maze.reset_map(MapGridType.MAP_EMPTY)
+        grid.set_row(0, 0, grid.length, MapGridType.MAP_BLOCK)
+        grid.set_row(grid.width - 1, 0, grid.length, MapGridType.MAP_BLOCK)
+        grid.set_col(0, 0, grid.width, MapGridType.MAP_BLOCK)
+        grid.set_col(grid.length - 1, 0, grid.width, MapGridType.MAP_BLOCK)
+        self.stats.lap('reset')
+
+        # 执行递归。起、终点以坐标记录在maze中，且都位于奇数坐标上，不会被十字墙覆盖。
         # 初始基准点为最左上角的路径单元。基准点即矩形块的左上角路径单元的坐标
         # 初视十字的长、宽即地图的长、宽-2（排除两个边缘的墙单元）
-        self.recursive_division(1, 1, self.maze.length - 2, self.maze.width - 2)
-        self.maze.set_grid(2 * dest_x + 1, 2 * dest_y + 1, MapGridType.MAP_DESTINATION)
-
-    def recursive_division(self, base_x, base_y, rec_length, rec_width):
-        # self.maze.show_map()
-        # print()
-        # 递归终止条件：矩形块的长或宽≤1
-        if rec_length <= 1 or rec_width <= 1:
-            return
-
-        # 确定十字墙的交点坐标。其坐标必须都是偶数
-        wall_x, wall_y = (self.get_wall_index(base_x, rec_length), self.get_wall_index(base_y, rec_width))
-
-        # 生成这个矩形块内的十字墙单元
-        for i in range(base_x, base_x + rec_length):
-            self.maze.set_grid(i, wall_y, MapGridType.MAP_BLOCK)
-        for i in range(base_y, base_y + rec_width):
-            self.maze.set_grid(wall_x, i, MapGridType.MAP_BLOCK)
-
-        # 在十字墙的四个边中随机打通三个墙单元
-        self.generate_holes(base_x, base_y, rec_length, rec_width, wall_x, wall_y)
-
-        # 在四个子矩形块内继续，顺序分别是左上、左下、右上、右下
-        self.recursive_division(base_x, base_y, wall_x - base_x, wall_y - base_y)
-        self.recursive_division(base_x, wall_y + 1, wall_x - base_x, base_y + rec_width - wall_y - 1)
-        self.recursive_division(wall_x + 1, base_y, base_x + rec_length - wall_x - 1, wall_y - base_y)
-        self.recursive_division(wall_x + 1, wall_y + 1, base_x + rec_length - wall_x - 1, base_y + rec_width - wall_y - 1)
-
-    @staticmethod
-    def get_wall_index(start, length):
+        self.recursive_division(1, 1, self.maze.length - 2, self.maze.width - 2, observe)
+        self.stats.lap('carve')
+
+    # 用显式的栈代替递归，栈中存放待分割的矩形块(base_x, base_y, rec_length, rec_width)
+    def recursive_division(self, base_x, base_y, rec_length, rec_width, observe=None):
+        grid = self.maze.map
+        stack = [(base_x, base_y, rec_length, rec_width)]
+        steps, peak = 0, 1
+        while stack:
+            base_x, base_y, rec_length, rec_width = stack.pop()
+            # 终止条件：矩形块的长或宽≤1。只有生成了十字墙的矩形块计入步数（与on_step的调用次数一致）
+            if rec_length <= 1 or rec_width <= 1:
+                continue
+            steps += 1
+
+            # 确定十字墙的交点坐标。其坐标必须都是偶数
+            wall_x, wall_y = (self.get_wall_index(base_x, rec_length), self.get_wall_index(base_y, rec_width))
+
+            # 生成这个矩形块内的十字墙单元，每条墙都是对地图缓冲区的一次区间赋值
+            grid.set_row(wall_y, base_x, base_x + rec_length, MapGridType.MAP_BLOCK)
+            grid.set_col(wall_x, base_y, base_y + rec_width, MapGridType.MAP_BLOCK)
+
+            # 在十字墙的四个边中随机打通三个墙单元
+            self.generate_holes(base_x, base_y, rec_length, rec_width, wall_x, wall_y)
+
+            # 在四个子矩形块内继续，处理顺序分别是左上、左下、右上、右下，因此逆序入栈
+            stack.append((wall_x + 1, wall_y + 1, base_x + rec_length - wall_x - 1, base_y + rec_width - wall_y - 1))
+            stack.append((wall_x + 1, base_y, base_x + rec_length - wall_x - 1, wall_y - base_y))
+            stack.append((base_x, wall_y + 1, wall_x - base_x, base_y + rec_width - wall_y - 1))
+            stack.append((base_x, base_y, wall_x - base_x, wall_y - base_y))
+            if len(stack) > peak:
+                peak = len(stack)
+            if observe is not None:
+                observe(wall_x, wall_y, len(stack))
+        self.stats.steps, self.stats.peak_frontier = steps, peak
+
+    def get_wall_index(self, start, length):
         assert length >= 3              # 尺寸大于3才能生成十字
-        wall_index = randint(start + 1, start + length - 2)         # 在矩形块方向范围内随机取一个点
-        if wall_index % 2 == 1:                                     # 保证是偶数
+        wall_index = self.maze.rand.randint(start + 1, start + length - 2)    # 在矩形块方向范围内随机取一个点
+        if wall_index % 2 == 1:                                             # 保证是偶数
             wall_index -= 1
         return wall_index
 
@@ -418,6 +618,7 @@ class GeneratorCross(object):
     # 若交点已经是路径单元了（先前已被打通），则直接打通交点之前的边缘单元，否则会导致迷宫不连通。
     def generate_holes(self, base_x, base_y, rec_length, rec_width, wall_x, wall_y):
         holes = []
+        randint = self.maze.rand.randint
         # 在十字的四个边分别随机取一个点
         hole_entries = [
             (randint(base_x, wall_x - 1), wall_y),                      # 十字左墙随机取一个点
@@ -448,6 +649,9 @@ class GeneratorCross(object):
             # 否则，记录十字的对应方向的边所取的打通的位置
             else:
                 holes.append(hole_entries[i])
+        # 四个方向的边缘都已打通时，不需要再打通十字上的墙
+        if not holes:
+            return
         # 随机取holes进行打通
         ignore_hole = randint(0, len(holes) - 1)
         for i in range(0, len(holes)):
@@ -469,118 +673,328 @@ class GeneratorCross(object):
 # 2. 循环：当检查列表非空，随机从列表中取出一个路径单元，检查该单元与其相邻的路径单元是否同属一颗树。
 #     2.1. 有相邻的路径单元与其不属于同一棵树，则随机选择一个这样的相邻路径单元，将该单元与当前单元合并成一棵树（使用并查集）
 #     2.2. 否则，表示当前路径单元与其所有相邻路径单元都属于同一棵树，从检查列表中删除该路径单元
-# 并查集的应用方法：
+# 并查集的应用方法（见MazeStructures.UnionFind）：
 # 1. 存储。每棵树都有唯一的根节点，用这个根节点来代表这棵树的所有节点所在的合集
-#     初始化：每个节点(x, y)看作一棵树，自己就是这棵树的根节点，将自己的坐标作为自己这个合集的标识；
-#     查询：对于节点(x, y)，通过节点不断查找其父节点，直到找到根节点。
+#     初始化：每个节点看作一棵树，自己就是这棵树的根节点；
+#     查询：对于一个节点，通过节点不断查找其父节点，直到找到根节点，并将沿途的节点直接挂到根节点下（路径压缩）。
 # 2. 判断两个节点是否属于同一棵树：找到这两个节点所在树的根节点，判断两个根节点是否相同。
 # 3. 合并。
-#     每棵树的根节点存储一个属性weight，表示这棵树拥有的子节点数——节点较多的称作大树，较少的称作小树。合并时，保证小树变成大树的子树。
-class GeneratorUFS(object):
+#     每棵树的根节点存储这棵树拥有的节点数——节点较多的称作大树，较少的称作小树。合并时，保证小树变成大树的子树。
+# 检查列表使用Frontier，随机选取与删除都是O(1)，整个生成过程的耗时与单元数近似成线性关系。
+class GeneratorUFS(Generator):
     def __init__(self, maze):
-        self.maze = maze
-        # 用一个长度为路径单元总和的列表记录父节点
-        # parent_list存储每个路径单元的父节点。初始化时即路径单元自己
-        self.parent_list = [x for x in range(self.maze.scaled_length * self.maze.scaled_width)]
-        # weight_list为每个迷宫单元的权重，初始化时为1
-        self.weight_list = [1 for _ in range(self.maze.scaled_length * self.maze.scaled_width)]
+        super(GeneratorUFS, self).__init__(maze)
+        # 并查集，每个路径单元(2x+1, 2y+1)对应下标为 x * scaled_width + y 的节点。在每次生成时重新创建
+        self.union_find = None
 
     def generate(self):
+        observe = self.begin()
         # 首先将所有单元都设为墙
         self.maze.reset_map(MapGridType.MAP_BLOCK)
-        # 标记起点终点
-        origin_x, origin_y = self.maze.origin
-        dest_x, dest_y = self.maze.destination
-        # 执行并查集生成迷宫
-        self.union_find_set()
-        # 映射到原始地图上，确定起、终点单元的位置
-        self.maze.set_grid(2 * origin_x + 1, 2 * origin_y + 1, MapGridType.MAP_ORIGIN)
-        self.maze.set_grid(2 * dest_x + 1, 2 * dest_y + 1, MapGridType.MAP_DESTINATION)
-
-    def union_find_set(self):
-        checklist = list()
-        for x in range(self.maze.scaled_length):
-            for y in range(self.maze.scaled_width):
-                checklist.append((x, y))
-                self.maze.set_grid(2 * x + 1, 2 * y + 1, MapGridType.MAP_EMPTY)
+        # 执行并查集生成迷宫。起、终点以坐标记录在maze中，所有路径单元都会被打通
+        self.union_find_set(observe)
+        self.stats.lap('carve')
+
+    def union_find_set(self, observe=None):
+        scaled_length, scaled_width = self.maze.scaled_length, self.maze.scaled_width
+        self.union_find = UnionFind(scaled_length * scaled_width)
+        carve_path_cells(self.maze)
+        checklist = Frontier(range(scaled_length * scaled_width), self.maze.rand)
+        self.stats.lap('reset')
+        # 检查列表只会变短，峰值即初始的大小
+        steps, peak = 0, len(checklist)
         while checklist:
-            entry = choice(checklist)
-            if not self.check_adjacent_pos(entry[0], entry[1]):
-                checklist.remove(entry)
-
-    # 确定路径单元的树节点的index
-    def get_node_index(self, x, y):
-        return x * self.maze.scaled_width + y
-
-    # 已知路径单元的树节点的index，寻找其根节点的index
-    def find_root(self, index):
-        if index != self.parent_list[index]:
-            return self.find_root(self.parent_list[index])        # 一层一层寻找父节点
-        return self.parent_list[index]
-
-    # 合并两棵树。index即为两个节点
-    def union(self, index1, index2):
-        # 寻找两个节点的根节点(的index)
-        root1 = self.find_root(index1)
-        root2 = self.find_root(index2)
-        # 若两个根节点相同，则无需合并
-        if root1 == root2:
-            return
-        else:
-            # 将较小的树合并到较大的树中，即指定较小树的根节点的父节点为较大树的根节点
-            if self.weight_list[root1] > self.weight_list[root2]:
-                self.parent_list[root2] = root1
-                self.weight_list[root1] += self.weight_list[root2]
-            else:
-                self.parent_list[root1] = root2
-                self.weight_list[root2] += self.weight_list[root1]
-
-    # 检查一个路径单元相邻的四个路径单元
-    def check_adjacent_pos(self, x, y):
-        # self.maze.show_map()
-        # print('-----------------------')
+            steps += 1
+            entry_index = checklist.random_index()
+            node = checklist[entry_index]
+            if not self.check_adjacent_pos(node):
+                checklist.swap_remove(entry_index)
+            if observe is not None:
+                x, y = divmod(node, scaled_width)
+                observe(2 * x + 1, 2 * y + 1, len(checklist))
+        self.stats.steps, self.stats.peak_frontier = steps, peak
+
+    # 检查一个路径单元相邻的四个路径单元。node为该路径单元的树节点的index
+    def check_adjacent_pos(self, node):
+        scaled_width = self.maze.scaled_width
+        x, y = divmod(node, scaled_width)
+        find = self.union_find.find
         directions = []
-        # 定位到这个路径单元的index与其根节点的index
-        node1 = self.get_node_index(x, y)
-        root1 = self.find_root(node1)
-        if x > 0:
-            root2 = self.find_root(self.get_node_index(x - 1, y))
-            if root1 != root2:
-                directions.append(WallDirection.WALL_LEFT)
-        if y > 0:
-            root2 = self.find_root(self.get_node_index(x, y - 1))
-            if root1 != root2:
-                directions.append(WallDirection.WALL_UP)
-        if x < self.maze.scaled_length - 1:
-            root2 = self.find_root(self.get_node_index(x + 1, y))
-            if root1 != root2:
-                directions.append(WallDirection.WALL_RIGHT)
-        if y < self.maze.scaled_width - 1:
-            root2 = self.find_root(self.get_node_index(x, y + 1))
-            if root1 != root2:
-                directions.append(WallDirection.WALL_DOWN)
+        # 定位到这个路径单元的根节点的index
+        root1 = find(node)
+        if x > 0 and find(node - scaled_width) != root1:
+            directions.append(WallDirection.WALL_LEFT)
+        if y > 0 and find(node - 1) != root1:
+            directions.append(WallDirection.WALL_UP)
+        if x < self.maze.scaled_length - 1 and find(node + scaled_width) != root1:
+            directions.append(WallDirection.WALL_RIGHT)
+        if y < scaled_width - 1 and find(node + 1) != root1:
+            directions.append(WallDirection.WALL_DOWN)
 
         if len(directions):
-            direction = choice(directions)
+            direction = self.maze.rand.choice(directions)
             if direction == WallDirection.WALL_LEFT:
-                adj_x, adj_y = (x - 1, y)
-                self.maze.set_grid(2 * x, 2 * y + 1, MapGridType.MAP_EMPTY)
+                adj_node = node - scaled_width
+                self.maze.map.set(2 * x, 2 * y + 1, MapGridType.MAP_EMPTY)
             elif direction == WallDirection.WALL_UP:
-                adj_x, adj_y = (x, y - 1)
-                self.maze.set_grid(2 * x + 1, 2 * y, MapGridType.MAP_EMPTY)
+                adj_node = node - 1
+                self.maze.map.set(2 * x + 1, 2 * y, MapGridType.MAP_EMPTY)
             elif direction == WallDirection.WALL_RIGHT:
-                adj_x, adj_y = (x + 1, y)
-                self.maze.set_grid(2 * x + 2, 2 * y + 1, MapGridType.MAP_EMPTY)
+                adj_node = node + scaled_width
+                self.maze.map.set(2 * x + 2, 2 * y + 1, MapGridType.MAP_EMPTY)
             else:
-                adj_x, adj_y = (x, y + 1)
-                self.maze.set_grid(2 * x + 1, 2 * y + 2, MapGridType.MAP_EMPTY)
-            node2 = self.get_node_index(adj_x, adj_y)
-            self.union(node1, node2)
+                adj_node = node + 1
+                self.maze.map.set(2 * x + 1, 2 * y + 2, MapGridType.MAP_EMPTY)
+            self.union_find.union(node, adj_node)
             return True
         else:
             return False
 
 
+# 迷宫生成算法4：基于墙列表的Kruskal算法
+# 与GeneratorUFS不同，这里直接以相邻两个路径单元之间的墙作为图的边：
+# 1. 将所有路径单元打通，每个路径单元作为一棵单独的树；
+# 2. 列出所有相邻路径单元之间的墙，一次性随机打乱；
+# 3. 按打乱后的顺序遍历每一面墙，若墙两侧的路径单元不在同一棵树中，则打通这面墙并合并两棵树。
+# 每面墙只检查一次，当合并次数达到路径单元数-1时即生成了一棵生成树，可以提前结束。
+class GeneratorKruskal(Generator):
+    # 使用numpy时，每次批量计算的墙的数量
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, maze):
+        super(GeneratorKruskal, self).__init__(maze)
+        self.union_find = None
+
+    def generate(self):
+        observe = self.begin()
+        # 首先将所有单元都设为墙，再打通所有路径单元
+        self.maze.reset_map(MapGridType.MAP_BLOCK)
+        carve_path_cells(self.maze)
+        self.stats.lap('reset')
+        self.kruskal(observe)
+        self.stats.lap('carve')
+
+    # frontier为尚未合并的树的数目，每一步为检查一面墙
+    def kruskal(self, observe=None):
+        cells = self.maze.scaled_length * self.maze.scaled_width
+        self.union_find = UnionFind(cells)
+        union = self.union_find.union
+        buf = self.maze.map.buf
+        length = self.maze.length
+        remaining = cells - 1
+        steps = 0
+        for node1, node2, wall in self.shuffled_walls():
+            if remaining <= 0:
+                break
+            steps += 1
+            if union(node1, node2):
+                buf[wall] = MapGridType.MAP_EMPTY
+                remaining -= 1
+            if observe is not None:
+                observe(wall % length, wall // length, remaining + 1)
+        self.stats.steps, self.stats.peak_frontier = steps, cells
+
+    # 墙的编号：前(scaled_length - 1) * scaled_width个为左右相邻路径单元之间的墙，其余为上下相邻路径单元之间的墙。
+    # 路径单元(x, y)的树节点index与GeneratorUFS一致，即x * scaled_width + y
+    def horizontal_wall_count(self):
+        return (self.maze.scaled_length - 1) * self.maze.scaled_width
+
+    def wall_count(self):
+        return self.horizontal_wall_count() + self.maze.scaled_length * (self.maze.scaled_width - 1)
+
+    # 根据墙的编号，返回(墙一侧的树节点, 另一侧的树节点, 墙单元在地图缓冲区中的下标)
+    def decode_wall(self, wall):
+        scaled_width, length = self.maze.scaled_width, self.maze.length
+        horizontal = self.horizontal_wall_count()
+        if wall < horizontal:
+            x, y = divmod(wall, scaled_width)
+            node = x * scaled_width + y
+            return node, node + scaled_width, (2 * y + 1) * length + 2 * x + 2
+        x, y = divmod(wall - horizontal, scaled_width - 1)
+        node = x * scaled_width + y
+        return node, node + 1, (2 * y + 2) * length + 2 * x + 1
+
+    # 按随机顺序依次给出所有的墙。有numpy时分批向量化计算，否则逐个计算。
+    # 两种情况下墙的顺序都由迷宫的随机数发生器打乱得到，因此同一个种子得到的迷宫与是否安装了numpy无关
+    def shuffled_walls(self):
+        order = array('l', range(self.wall_count()))
+        self.maze.rand.shuffle(order)
+        np = load_numpy()
+        if np is None:
+            for wall in order:
+                yield self.decode_wall(wall)
+            return
+
+        scaled_width, length = self.maze.scaled_width, self.maze.length
+        horizontal = self.horizontal_wall_count()
+        order = np.frombuffer(order, dtype='l')
+        for start in range(0, len(order), self.CHUNK_SIZE):
+            wall = order[start:start + self.CHUNK_SIZE]
+            is_vertical = wall >= horizontal
+            # 上下相邻的墙每列有scaled_width - 1面
+            per_col = np.where(is_vertical, max(scaled_width - 1, 1), scaled_width)
+            x, y = np.divmod(np.where(is_vertical, wall - horizontal, wall), per_col)
+            node1 = x * scaled_width + y
+            node2 = node1 + np.where(is_vertical, 1, scaled_width)
+            cell = np.where(is_vertical, (2 * y + 2) * length + 2 * x + 1, (2 * y + 1) * length + 2 * x + 2)
+            yield from zip(node1.tolist(), node2.tolist(), cell.tolist())
+
+
+# 迷宫生成算法5：Eller算法，逐行生成
+# 只记录当前一行的路径单元各自属于哪个集合（同一集合内的单元已经连通），处理完一行即可输出，内存只与迷宫的宽度有关：
+# 1. 当前行中还不属于任何集合的路径单元，各自成为一个新的集合；
+# 2. 随机打通当前行中相邻且不属于同一集合的两个单元之间的墙，并合并两个集合（最后一行则全部打通）；
+# 3. 每个集合随机向下打通至少一个单元，被打通的下一行单元继承该集合，其余下一行单元不属于任何集合；
+# 4. 对下一行重复上面的步骤。
+# 一行之内的集合合并使用以标号为键的小并查集，行末再统一换成根标号，因此每行的耗时与行长成线性关系。
+# 每一步为生成一行路径单元；frontier为该行中的集合数，只在回调或采样时计算，峰值记为一行的路径单元数（集合数的上限）
+class GeneratorEller(Generator):
+    def generate(self):
+        observe = self.begin()
+        maze = self.maze
+        maze.reset_map(MapGridType.MAP_BLOCK)
+        self.stats.lap('reset')
+        for y, row in enumerate(eller_rows(maze.length, maze.width, maze.rand, observe)):
+            maze.map.write_row(y, row)
+        self.stats.steps, self.stats.peak_frontier = maze.scaled_width, maze.scaled_length
+        self.stats.lap('carve')
+
+
+# 生成器名 -> 生成器类
+GENERATORS = {
+    'backtrack': GeneratorRecursive,
+    'cross': GeneratorCross,
+    'ufs': GeneratorUFS,
+    'mybacktrack': MyGeneratorRecursive,
+    'kruskal': GeneratorKruskal,
+    'eller': GeneratorEller,
+}
+
+
+# 按Eller算法逐行给出迷宫地图（每行为长度为length的bytes），length、width为地图的长宽（奇数）。
+# 只保存当前一行的集合标号，内存为O(length)。observe不为None时，每生成一行路径单元以(0, 行的y坐标, 集合数)调用一次
+def eller_rows(length, width, rand, observe=None):
+    scaled_length, scaled_width = (length - 1) // 2, (width - 1) // 2
+    wall_row = bytes([MapGridType.MAP_BLOCK]) * length
+    yield wall_row
+    # labels[i]为当前行第i个路径单元所属集合的标号，-1表示还不属于任何集合
+    labels = [-1] * scaled_length
+    next_label = 0
+    # 当前行内的集合合并：parent为标号之间的并查集，每行开始时清空
+    parent = {}
+
+    def find(label):
+        root = label
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while label != root:
+            parent[label], label = root, parent.get(label, label)
+        return root
+
+    for y in range(scaled_width):
+        last = y == scaled_width - 1
+        parent.clear()
+        for i in range(scaled_length):
+            if labels[i] < 0:
+                labels[i] = next_label
+                next_label += 1
+        cells = bytearray(wall_row)
+        cells[1:2 * scaled_length:2] = bytes([MapGridType.MAP_EMPTY]) * scaled_length
+        for i in range(scaled_length - 1):
+            root1, root2 = find(labels[i]), find(labels[i + 1])
+            if root1 != root2 and (last or rand.random() < 0.5):
+                parent[root2] = root1
+                cells[2 * i + 2] = MapGridType.MAP_EMPTY
+        labels = [find(label) for label in labels]
+        if observe is not None:
+            observe(0, 2 * y + 1, len(set(labels)))
+        yield bytes(cells)
+
+        below = bytearray(wall_row)
+        if not last:
+            # 每个集合随机向下打通若干单元；一个都没有打通的集合，再从其单元中随机选一个打通
+            members = {}
+            for i, label in enumerate(labels):
+                members.setdefault(label, []).append(i)
+            next_labels = [-1] * scaled_length
+            for label, indexes in members.items():
+                down = [i for i in indexes if rand.random() < 0.5] or [rand.choice(indexes)]
+                for i in down:
+                    next_labels[i] = label
+                    below[2 * i + 1] = MapGridType.MAP_EMPTY
+            labels = next_labels
+        yield bytes(below)
+
+
+# 用Eller算法生成迷宫并逐行写入文件path（格式见MazeFile），不在内存中保存整张地图。
+# 起点与终点与Maze的默认设置相同，即左上角与右下角的路径单元
+def stream_eller(path, length, width, seed=None):
+    length += 1 - length % 2
+    width += 1 - width % 2
+    rand = seed if isinstance(seed, Random) else Random(seed)
+    destination = ((length - 1) // 2 - 1, (width - 1) // 2 - 1)
+    with open(path, 'wb') as file:
+        file.write(pack_header('eller', length, width, (0, 0), destination, seed))
+        for row in eller_rows(length, width, rand):
+            file.write(row)
+
+
+# 打通所有路径单元，即奇数行中的所有奇数列（供基于并查集的生成器使用）
+def carve_path_cells(maze):
+    for y in range(maze.scaled_width):
+        maze.map.set_row(2 * y + 1, 1, 2 * maze.scaled_length + 1, MapGridType.MAP_EMPTY, step=2)
+
+
+# 批量生成时第index个迷宫的种子。字符串种子的哈希与进程无关，因此各个进程由同一个seed得到的迷宫相同
+def maze_seed(seed, index):
+    return '%s-%d' % (seed, index)
+
+
+# 生成一个迷宫，返回其在文件中的记录（供generate_many的工作进程使用）
+def generate_maze_bytes(task):
+    length, width, generator, seed, packed, maze_kwargs = task
+    maze = Maze(length, width, generator, seed=seed, **maze_kwargs)
+    maze.generator.generate()
+    return maze.to_bytes(packed)
+
+
+# 批量生成count个迷宫，按顺序依次写入文件path，每个迷宫为一条记录（见MazeFile），可以用load_mazes读取。
+# size为边长或(length, width)；第i个迷宫的种子为maze_seed(seed, i)，因此结果与进程数workers无关。
+# 生成完的迷宫按顺序逐个写入，不在内存中保留。返回写入的迷宫数
+def generate_many(count, size, generator='backtrack', workers=1, path='mazes.bin', seed=0, chunk_size=1,
+                  packed=False, **maze_kwargs):
+    length, width = (size, size) if isinstance(size, int) else size
+    tasks = ((length, width, generator, maze_seed(seed, index), packed, maze_kwargs) for index in range(count))
+    with open(path, 'wb') as file:
+        if workers is None or workers <= 1:
+            for task in tasks:
+                file.write(generate_maze_bytes(task))
+        else:
+            from multiprocessing import Pool
+            with Pool(workers) as pool:
+                for data in pool.imap(generate_maze_bytes, tasks, chunk_size):
+                    file.write(data)
+    return count
+
+
+# 依次读取文件中的所有迷宫（如generate_many的输出）。use_mmap为True时整个文件只做映射，每次只读取用到的迷宫
+def load_mazes(path, use_mmap=True):
+    # 空文件不能映射
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb') as file:
+        if use_mmap:
+            buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        else:
+            buf = file.read()
+    mapping = buf if use_mmap else None
+    offset = 0
+    while offset < len(buf):
+        maze = Maze.from_record(buf, offset, mapping)
+        offset = read_header(buf, offset)['end']
+        yield maze
+
+
 def play(maze):
     while True:
         d = input()
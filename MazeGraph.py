@@ -0,0 +1,375 @@
+"""
+迷宫的走廊图（corridor graph）
+回溯、并查集、十字分割等生成器得到的迷宫大部分是宽度为1的走廊。将地图压缩为只包含“结点”的图：
+结点为相邻可通行单元数不等于2的单元（路口与死路），两个结点之间的走廊即图中的一条边，边的权重为走廊的长度（步数）。
+寻路时只在结点之间搜索，搜索结束后再把经过的边展开为单元，因此一次查询的耗时与经过的路口数有关，而与单元数无关。
+只适用于四方向移动。
+
+存储方式（下标均为加边框后的下标，见MazeGrid.Grid.padded_walls）：
+    nodes：结点所在单元的下标；
+    边e的两端为结点edge_a[e]、edge_b[e]，长度为edge_len[e]，走廊内部的edge_len[e] - 1个单元按从a到b的顺序
+    存放在corridor[edge_offset[e]:edge_offset[e + 1]]中；
+    结点的邻边按CSR格式存放：adj_edge[adj_start[n]:adj_start[n + 1]]，从a走向b的边记为e，从b走向a的记为~e；
+    slot_of[cell]：走廊单元为其在corridor中的位置（>= 0），结点单元为 -2 - 结点编号，墙为-1。
+"""
+from array import array
+from bisect import bisect_right
+from collections import deque
+from heapq import heappush, heappop
+
+
+class CorridorGraph(object):
+    def __init__(self, grid):
+        self.length = grid.length
+        walls, self.row = grid.padded_walls()
+        self.walls = bytes(walls)
+        self.nodes = array('l')
+        self.edge_a = array('l')
+        self.edge_b = array('l')
+        self.edge_len = array('l')
+        self.edge_offset = array('l', [0])
+        self.corridor = array('l')
+        self.adj_start = array('l', [0])
+        self.adj_edge = array('l')
+        self.slot_of = array('l', [-1]) * len(self.walls)
+        self.build()
+
+    def build(self):
+        walls, row, slot_of = self.walls, self.row, self.slot_of
+        deltas = (-1, 1, -row, row)
+        # 找出所有结点，并按结点的相邻单元数为其邻边预留位置
+        degrees = []
+        for cell in range(row, len(walls) - row):
+            if walls[cell]:
+                continue
+            degree = 4 - walls[cell - 1] - walls[cell + 1] - walls[cell - row] - walls[cell + row]
+            if degree != 2:
+                slot_of[cell] = -2 - len(self.nodes)
+                self.nodes.append(cell)
+                degrees.append(degree)
+        for degree in degrees:
+            self.adj_start.append(self.adj_start[-1] + degree)
+        self.adj_edge = array('l', [0]) * self.adj_start[-1]
+        fill = array('l', self.adj_start)
+        for node in range(len(self.nodes)):
+            self.trace_edges(node, deltas, fill)
+        # 不含结点的环形走廊（只可能出现在有环的地图中）：任取其中一个单元作为结点
+        for cell in range(row, len(walls) - row):
+            if not walls[cell] and slot_of[cell] == -1:
+                node = len(self.nodes)
+                slot_of[cell] = -2 - node
+                self.nodes.append(cell)
+                self.adj_start.append(self.adj_start[-1] + 2)
+                self.adj_edge.extend((0, 0))
+                fill.append(self.adj_start[-1])
+                self.trace_edges(node, deltas, fill)
+
+    # 从结点出发，沿每个方向走完尚未记录的走廊，记为一条边
+    def trace_edges(self, node, deltas, fill):
+        walls, slot_of, corridor = self.walls, self.slot_of, self.corridor
+        start = self.nodes[node]
+        for delta in deltas:
+            cur = start + delta
+            if walls[cur]:
+                continue
+            slot = slot_of[cur]
+            # 两个结点直接相邻时，由编号较小的一端记录；已从另一端走过的走廊不再记录
+            if slot >= 0 or (slot < -1 and -2 - slot < node):
+                continue
+            edge = len(self.edge_len)
+            prev, steps = start, 1
+            while slot_of[cur] == -1:
+                slot_of[cur] = len(corridor)
+                corridor.append(cur)
+                for step in deltas:
+                    nxt = cur + step
+                    if nxt != prev and not walls[nxt]:
+                        break
+                prev, cur = cur, nxt
+                steps += 1
+            other = -2 - slot_of[cur]
+            self.edge_a.append(node)
+            self.edge_b.append(other)
+            self.edge_len.append(steps)
+            self.edge_offset.append(len(corridor))
+            self.adj_edge[fill[node]] = edge
+            fill[node] += 1
+            self.adj_edge[fill[other]] = ~edge
+            fill[other] += 1
+
+    def node_count(self):
+        return len(self.nodes)
+
+    def edge_count(self):
+        return len(self.edge_len)
+
+    def index(self, x, y):
+        return (y + 1) * self.row + x + 1
+
+    # 单元所连接的结点：[(结点, 距离, 边, 单元在边上的位置, 结点在边上的位置), ...]。单元本身是结点时边为-1
+    def attach(self, cell):
+        slot = self.slot_of[cell]
+        if slot < -1:
+            return [(-2 - slot, 0, -1, 0, 0)]
+        edge = bisect_right(self.edge_offset, slot) - 1
+        pos = slot - self.edge_offset[edge] + 1
+        length = self.edge_len[edge]
+        return [(self.edge_a[edge], pos, edge, pos, 0), (self.edge_b[edge], length - pos, edge, pos, length)]
+
+    # 在边上从位置start（不含）走到位置stop（含），返回经过的单元
+    def walk(self, edge, start, stop):
+        # 走廊单元在corridor中的下标为 offset + 位置
+        offset, length = self.edge_offset[edge] - 1, self.edge_len[edge]
+        if stop > start:
+            cells = self.corridor[offset + start + 1:offset + min(stop, length - 1) + 1].tolist()
+            if stop == length:
+                cells.append(self.nodes[self.edge_b[edge]])
+        else:
+            cells = self.corridor[offset + max(stop, 1):offset + start].tolist()
+            cells.reverse()
+            if stop == 0:
+                cells.append(self.nodes[self.edge_a[edge]])
+        return cells
+
+    # 在走廊图上搜索从origin到destination（原始坐标）的最短路径，h值为结点到终点的曼哈顿距离。
+    # 返回(坐标列表, 路径长度, 扩展的结点数)；不连通时返回([], None, 扩展的结点数)
+    def find_path(self, origin, destination):
+        row = self.row
+        start, goal = self.index(*origin), self.index(*destination)
+        if self.walls[start] or self.walls[goal]:
+            return [], None, 0
+        goal_y, goal_x = divmod(goal, row)
+        nodes, edge_a, edge_b, edge_len = self.nodes, self.edge_a, self.edge_b, self.edge_len
+        adj_start, adj_edge = self.adj_start, self.adj_edge
+
+        starts, goals = self.attach(start), self.attach(goal)
+        # 终点所连接的结点：结点 -> (到终点的距离, 边, 结点在边上的位置, 终点在边上的位置)
+        exits = {}
+        for node, cost, edge, goal_pos, node_pos in goals:
+            if node not in exits or cost < exits[node][0]:
+                exits[node] = (cost, edge, node_pos, goal_pos)
+        # 最优路径的长度与最后一段：(长度, 到达终点前的最后一个结点, 边, 起始位置, 终止位置)
+        best = (float('inf'), None, -1, 0, 0)
+        # 起点与终点在同一条边上时，可以直接沿边走过去
+        if start == goal:
+            best = (0, None, -1, 0, 0)
+        elif starts[0][2] >= 0 and starts[0][2] == goals[0][2]:
+            start_pos, goal_pos = starts[0][3], goals[0][3]
+            best = (abs(goal_pos - start_pos), None, starts[0][2], start_pos, goal_pos)
+
+        # g值、父结点（-1表示直接与起点相连）以及到达时经过的边（编码同adj_edge）
+        count = len(nodes)
+        g_vals = array('l', [-1]) * count
+        parents = array('l', [-1]) * count
+        parent_edges = array('l', [0]) * count
+        closed = bytearray(count)
+        # 与起点直接相连的结点：结点 -> (边, 起点在边上的位置, 结点在边上的位置)
+        entries = {}
+        # 堆中的元素为 f * count + 结点，比较大小时与(f, 结点)元组的顺序一致
+        heap = []
+        for node, cost, edge, start_pos, node_pos in starts:
+            if g_vals[node] < 0 or cost < g_vals[node]:
+                g_vals[node] = cost
+                entries[node] = (edge, start_pos, node_pos)
+                y, x = divmod(nodes[node], row)
+                heappush(heap, (cost + abs(goal_x - x) + abs(goal_y - y)) * count + node)
+        expanded = 0
+        while heap and heap[0] // count < best[0]:
+            node = heappop(heap) % count
+            if closed[node]:
+                continue
+            closed[node] = 1
+            expanded += 1
+            g_val = g_vals[node]
+            if node in exits:
+                cost, edge, node_pos, goal_pos = exits[node]
+                if g_val + cost < best[0]:
+                    best = (g_val + cost, node, edge, node_pos, goal_pos)
+            for i in range(adj_start[node], adj_start[node + 1]):
+                edge = adj_edge[i]
+                if edge >= 0:
+                    neighbor, new_g = edge_b[edge], g_val + edge_len[edge]
+                else:
+                    neighbor, new_g = edge_a[~edge], g_val + edge_len[~edge]
+                if not closed[neighbor] and (g_vals[neighbor] < 0 or new_g < g_vals[neighbor]):
+                    g_vals[neighbor] = new_g
+                    parents[neighbor] = node
+                    parent_edges[neighbor] = edge
+                    y, x = divmod(nodes[neighbor], row)
+                    heappush(heap, (new_g + abs(goal_x - x) + abs(goal_y - y)) * count + neighbor)
+
+        cost, node, edge, start_pos, stop_pos = best
+        if node is None and edge < 0 and start != goal:
+            return [], None, expanded
+        # 从终点倒推，把每一段边展开为单元
+        segments = [self.walk(edge, start_pos, stop_pos)] if edge >= 0 else []
+        while node is not None:
+            if parents[node] < 0:
+                edge, start_pos, stop_pos = entries[node]
+                node = None
+            else:
+                edge = parent_edges[node]
+                if edge >= 0:
+                    start_pos, stop_pos = 0, edge_len[edge]
+                else:
+                    edge = ~edge
+                    start_pos, stop_pos = edge_len[edge], 0
+                node = parents[node]
+            if edge >= 0:
+                segments.append(self.walk(edge, start_pos, stop_pos))
+        cells = [start]
+        for segment in reversed(segments):
+            cells.extend(segment)
+        path = [(cell % row - 1, cell // row - 1) for cell in cells]
+        return path, cost, expanded
+
+
+class TreeIndex(object):
+    """
+    走廊图为树（森林）时的距离索引，用于回溯、并查集等生成器得到的完美迷宫：任意两个单元之间只有一条路径，不需要搜索。
+    以每个连通分量中编号最小的结点为根，记录每个结点的父结点、到达父结点的边、深度（层数）以及到根的路径长度。
+    求最近公共祖先（LCA）使用跳跃指针：每个结点除父结点外只多存一个指针jump，其指向的祖先的深度按二进制的规律分布，
+    与倍增法（binary lifting）一样每次查询O(log n)，但只需要O(n)的内存。
+    两个单元的距离由它们所在的边的端点的距离得到，为O(log n)；路径沿父结点逐段展开，为O(路径长度)。
+    走廊图中有环时is_tree为False，此时不能使用该索引（见Astar的tree模式）。
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        count = graph.node_count()
+        self.parents = array('l', [-1]) * count
+        # 从父结点走向该结点的边，编码同adj_edge
+        self.parent_edges = array('l', [0]) * count
+        self.depths = array('l', [0]) * count
+        self.distances = array('l', [0]) * count
+        self.jumps = array('l', [-1]) * count
+        self.roots = array('l', [-1]) * count
+        self.is_tree = True
+        self.build()
+
+    # 从每个根结点出发做广度优先遍历，父结点总是先于子结点处理，因此计算jump时父结点的jump已经确定
+    def build(self):
+        graph = self.graph
+        parents, parent_edges, depths, distances, jumps, roots = \
+            self.parents, self.parent_edges, self.depths, self.distances, self.jumps, self.roots
+        edge_a, edge_b, edge_len = graph.edge_a, graph.edge_b, graph.edge_len
+        adj_start, adj_edge = graph.adj_start, graph.adj_edge
+        for root in range(len(roots)):
+            if roots[root] >= 0:
+                continue
+            roots[root] = root
+            jumps[root] = root
+            queue = deque([root])
+            while queue:
+                node = queue.popleft()
+                for i in range(adj_start[node], adj_start[node + 1]):
+                    edge = adj_edge[i]
+                    if parents[node] >= 0 and edge == ~parent_edges[node]:
+                        continue
+                    neighbor = edge_b[edge] if edge >= 0 else edge_a[~edge]
+                    if roots[neighbor] >= 0:
+                        self.is_tree = False
+                        continue
+                    roots[neighbor] = root
+                    parents[neighbor] = node
+                    parent_edges[neighbor] = edge
+                    depths[neighbor] = depths[node] + 1
+                    distances[neighbor] = distances[node] + edge_len[edge if edge >= 0 else ~edge]
+                    jump = jumps[node]
+                    if depths[node] - depths[jump] == depths[jump] - depths[jumps[jump]]:
+                        jumps[neighbor] = jumps[jump]
+                    else:
+                        jumps[neighbor] = node
+                    queue.append(neighbor)
+
+    # 两个结点的最近公共祖先。两者不连通时返回-1
+    def lowest_common_ancestor(self, node1, node2):
+        if self.roots[node1] != self.roots[node2]:
+            return -1
+        parents, depths, jumps = self.parents, self.depths, self.jumps
+        if depths[node1] < depths[node2]:
+            node1, node2 = node2, node1
+        depth = depths[node2]
+        while depths[node1] > depth:
+            node1 = jumps[node1] if depths[jumps[node1]] >= depth else parents[node1]
+        # 深度相同的两个结点，其jump指向的祖先的深度也相同
+        while node1 != node2:
+            if jumps[node1] != jumps[node2]:
+                node1, node2 = jumps[node1], jumps[node2]
+            else:
+                node1, node2 = parents[node1], parents[node2]
+        return node1
+
+    # 两个结点之间的路径长度。不连通时返回None
+    def node_distance(self, node1, node2):
+        ancestor = self.lowest_common_ancestor(node1, node2)
+        if ancestor < 0:
+            return None
+        return self.distances[node1] + self.distances[node2] - 2 * self.distances[ancestor]
+
+    # 起点、终点（加边框后的下标）之间的最短连接方式：(长度, 起点一侧的连接, 终点一侧的连接)，连接的格式见CorridorGraph.attach
+    def best_route(self, start, goal):
+        graph = self.graph
+        best = (None, None, None)
+        starts, goals = graph.attach(start), graph.attach(goal)
+        if start == goal:
+            return 0, None, None
+        if starts[0][2] >= 0 and starts[0][2] == goals[0][2]:
+            best = (abs(goals[0][3] - starts[0][3]), None, goals[0])
+        for start_link in starts:
+            for goal_link in goals:
+                distance = self.node_distance(start_link[0], goal_link[0])
+                if distance is not None and (best[0] is None or start_link[1] + distance + goal_link[1] < best[0]):
+                    best = (start_link[1] + distance + goal_link[1], start_link, goal_link)
+        return best
+
+    # 两个单元（原始坐标）之间的路径长度，O(log n)。不连通时返回None
+    def distance(self, origin, destination):
+        graph = self.graph
+        start, goal = graph.index(*origin), graph.index(*destination)
+        if graph.walls[start] or graph.walls[goal]:
+            return None
+        return self.best_route(start, goal)[0]
+
+    # 两个单元（原始坐标）之间的路径，O(路径长度)。返回(坐标列表, 路径长度)，不连通时返回([], None)
+    def find_path(self, origin, destination):
+        graph = self.graph
+        start, goal = graph.index(*origin), graph.index(*destination)
+        if graph.walls[start] or graph.walls[goal]:
+            return [], None
+        cost, start_link, goal_link = self.best_route(start, goal)
+        if cost is None:
+            return [], None
+        cells = [start]
+        if start_link is None:
+            # 起点与终点相同，或在同一条边上
+            if goal_link is not None:
+                cells.extend(graph.walk(goal_link[2], graph.attach(start)[0][3], goal_link[3]))
+        else:
+            node1, node2 = start_link[0], goal_link[0]
+            if start_link[2] >= 0:
+                cells.extend(graph.walk(start_link[2], start_link[3], start_link[4]))
+            ancestor = self.lowest_common_ancestor(node1, node2)
+            # 起点一侧从下往上走到公共祖先，终点一侧从公共祖先往下走，后者先倒序收集
+            while node1 != ancestor:
+                cells.extend(self.walk_parent_edge(node1, upward=True))
+                node1 = self.parents[node1]
+            segments = []
+            while node2 != ancestor:
+                segments.append(self.walk_parent_edge(node2, upward=False))
+                node2 = self.parents[node2]
+            for segment in reversed(segments):
+                cells.extend(segment)
+            if goal_link[2] >= 0:
+                cells.extend(graph.walk(goal_link[2], goal_link[4], goal_link[3]))
+        row = graph.row
+        return [(cell % row - 1, cell // row - 1) for cell in cells], cost
+
+    # 展开结点与其父结点之间的边：upward为True时从结点走到父结点，否则从父结点走到结点
+    def walk_parent_edge(self, node, upward):
+        edge = self.parent_edges[node]
+        length = self.graph.edge_len[edge if edge >= 0 else ~edge]
+        # 从父结点出发时，edge >= 0表示父结点在位置0
+        start, stop = (0, length) if edge >= 0 else (length, 0)
+        if upward:
+            start, stop = stop, start
+        return self.graph.walk(edge if edge >= 0 else ~edge, start, stop)
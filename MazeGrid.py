@@ -0,0 +1,146 @@
+"""
+地图的存储后端。
+地图以一维缓冲区存储，每个单元占一个字节，取值即MapGridType中的编码。单元(x, y)在缓冲区中的下标为 y * length + x。
+起点、终点、玩家位置不存储在单元中，而是由Maze以坐标的形式单独记录，单元中只存储其下方的路径/墙。
+可选的后端：
+    'bytearray'：基于Python内置的bytearray，无额外依赖，单个单元的读写最快；
+    'numpy'：基于numpy的uint8数组，便于做整块的向量化运算（如渲染）。
+需要频繁读写单元的代码（生成器、a*）可以直接取grid.buf，用下标访问。
+numpy只在用到时才导入（见load_numpy），只使用bytearray后端时不需要为导入numpy付出启动时间。
+"""
+from functools import lru_cache
+
+from config import MapGridType
+
+
+# 导入numpy并返回该模块，没有安装时返回None。导入numpy约需0.1秒，因此在第一次用到时才导入，之后直接返回缓存的结果
+@lru_cache(maxsize=None)
+def load_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class Grid(object):
+    """ 地图的基类。子类只需实现缓冲区的分配与区间赋值 """
+    def __init__(self, length, width, value=MapGridType.MAP_EMPTY):
+        self.length = length
+        self.width = width
+        self.buf = self.allocate(length * width, value)
+
+    # 使用已有的缓冲区（不复制）创建地图，缓冲区的类型须与后端一致
+    @classmethod
+    def from_buffer(cls, length, width, buf):
+        grid = cls.__new__(cls)
+        grid.length = length
+        grid.width = width
+        grid.buf = buf
+        return grid
+
+    def allocate(self, size, value):
+        raise NotImplementedError
+
+    # 将缓冲区中[start, stop)内步长为step的单元都设为value
+    def set_range(self, start, stop, step, value):
+        raise NotImplementedError
+
+    def index(self, x, y):
+        return y * self.length + x
+
+    def get(self, x, y):
+        return self.buf[y * self.length + x]
+
+    def set(self, x, y, value):
+        self.buf[y * self.length + x] = value
+
+    # 将所有单元都设成某个值
+    def fill(self, value):
+        self.set_range(0, self.length * self.width, 1, value)
+
+    # 将第y行中[x_start, x_end)内步长为step的单元都设成某个值
+    def set_row(self, y, x_start, x_end, value, step=1):
+        if x_end > x_start:
+            self.set_range(y * self.length + x_start, y * self.length + x_end, step, value)
+
+    # 将第x列中[y_start, y_end)的单元都设成某个值
+    def set_col(self, x, y_start, y_end, value):
+        if y_end > y_start:
+            self.set_range(y_start * self.length + x, y_end * self.length + x, self.length, value)
+
+    def row(self, y):
+        return self.buf[y * self.length:(y + 1) * self.length]
+
+    # 用字节串data（长度为length）整体替换第y行
+    def write_row(self, y, data):
+        self.buf[y * self.length:(y + 1) * self.length] = data
+
+    # 统计值为value的单元数
+    def count(self, value):
+        return self.buf.count(value)
+
+    def rows(self):
+        for y in range(self.width):
+            yield self.row(y)
+
+    # 转换为四周加了一圈墙的bytearray，1为墙，0为可通行。加边框后遍历相邻单元时不需要判断边界。
+    # 返回该bytearray与加边框后每行的长度，单元(x, y)的下标为 (y + 1) * row + x + 1
+    def padded_walls(self):
+        length, width = self.length, self.width
+        row = length + 2
+        table = bytes(1 if code == MapGridType.MAP_BLOCK else 0 for code in range(256))
+        cells = bytes(self.buf).translate(table)
+        walls = bytearray(b'\x01') * (row * (width + 2))
+        for y in range(width):
+            walls[(y + 1) * row + 1:(y + 1) * row + 1 + length] = cells[y * length:(y + 1) * length]
+        return walls, row
+
+
+class ByteGrid(Grid):
+    """ 基于bytearray的地图 """
+    def allocate(self, size, value):
+        return bytearray([value]) * size
+
+    def set_range(self, start, stop, step, value):
+        count = len(range(start, stop, step))
+        self.buf[start:stop:step] = bytes([value]) * count
+
+
+class NumpyGrid(Grid):
+    """ 基于numpy uint8数组的地图 """
+    def allocate(self, size, value):
+        np = load_numpy()
+        if np is None:
+            raise ImportError("numpy is required for the 'numpy' grid backend")
+        return np.full(size, value, dtype=np.uint8)
+
+    def set_range(self, start, stop, step, value):
+        self.buf[start:stop:step] = value
+
+    def get(self, x, y):
+        return int(self.buf[y * self.length + x])
+
+    def row(self, y):
+        return self.buf[y * self.length:(y + 1) * self.length].tolist()
+
+    def write_row(self, y, data):
+        np = load_numpy()
+        self.buf[y * self.length:(y + 1) * self.length] = np.frombuffer(bytes(data), dtype=np.uint8)
+
+    def count(self, value):
+        return int(load_numpy().count_nonzero(self.buf == value))
+
+
+GRID_BACKENDS = {
+    'bytearray': ByteGrid,
+    'numpy': NumpyGrid,
+}
+
+
+def create_grid(length, width, backend='bytearray', value=MapGridType.MAP_EMPTY):
+    try:
+        grid_class = GRID_BACKENDS[backend]
+    except KeyError:
+        raise ValueError('unknown grid backend: %r' % backend)
+    return grid_class(length, width, value)
@@ -0,0 +1,260 @@
+"""
+分层寻路（HPA*）
+将地图划分为边长为cluster_size的正方形簇（cluster），只在簇与簇的交界处选取入口，寻路分两层进行：
+1. 抽象图：结点为入口单元。相邻两簇交界处两侧都可通行的单元组成一段段连续的区间，每段较短的区间在中点处取一对入口，
+   较长的区间（不短于LONG_ENTRANCE）在两端各取一对；一对入口之间的边长度为1（簇间边）。
+   同一个簇内的入口之间，以只在簇内行走的最短距离为边长（簇内边），由簇内的广度优先搜索预先算好。
+2. 查询时先把起点、终点接入各自所在簇的入口，在抽象图上做a*，再把抽象路径中相邻的两个入口之间的路径在对应的簇内展开。
+抽象图上的路径不一定是全局最短路径（入口的选取有限制），在完美迷宫中两簇之间的每个通道都只有一个单元宽，
+每个通道都是入口，因此得到的就是唯一的路径。只适用于四方向移动。
+地图单元的墙发生变化时（Maze.set_grid），只将该单元所在的簇记为需要更新，下次查询前重新计算这些簇的边界入口与簇内边，
+入口发生变化的相邻簇也一并更新。
+"""
+from collections import deque
+from heapq import heappush, heappop
+
+from config import MapGridType
+
+
+class ClusterGraph(object):
+    # 长度不小于该值的区间在两端各取一对入口，否则在中点取一对
+    LONG_ENTRANCE = 6
+    # 查询时起点、终点在抽象图中的结点编号（入口的编号即单元的下标，都不小于0）
+    START, GOAL = -1, -2
+
+    def __init__(self, grid, cluster_size=16):
+        self.grid = grid
+        self.length = grid.length
+        self.width = grid.width
+        self.cluster_size = cluster_size
+        self.clusters_x = (self.length + cluster_size - 1) // cluster_size
+        self.clusters_y = (self.width + cluster_size - 1) // cluster_size
+        # 交界的入口：('v', cx, cy)为簇(cx, cy)与右侧簇之间，('h', cx, cy)为簇(cx, cy)与下方簇之间，值为[(本侧单元, 对侧单元), ...]
+        self.borders = {}
+        # 簇间边：入口单元 -> [对侧的入口单元, ...]
+        self.inter = {}
+        # 簇内边：簇 -> {入口单元: [(同簇的入口单元, 距离), ...]}
+        self.intra = {}
+        # 墙发生变化、需要更新的簇
+        self.dirty_clusters = set()
+        self.build()
+
+    def build(self):
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                if cx + 1 < self.clusters_x:
+                    self.set_border(('v', cx, cy), self.find_entrances(('v', cx, cy)))
+                if cy + 1 < self.clusters_y:
+                    self.set_border(('h', cx, cy), self.find_entrances(('h', cx, cy)))
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                self.build_intra((cx, cy))
+
+    def cluster_of(self, cell):
+        y, x = divmod(cell, self.length)
+        return x // self.cluster_size, y // self.cluster_size
+
+    # 簇的范围：[x0, x1) * [y0, y1)
+    def cluster_bounds(self, cluster):
+        size = self.cluster_size
+        cx, cy = cluster
+        return cx * size, cy * size, min((cx + 1) * size, self.length), min((cy + 1) * size, self.width)
+
+    # 与簇相邻的交界
+    def cluster_borders(self, cluster):
+        cx, cy = cluster
+        borders = []
+        if cx > 0:
+            borders.append(('v', cx - 1, cy))
+        if cx + 1 < self.clusters_x:
+            borders.append(('v', cx, cy))
+        if cy > 0:
+            borders.append(('h', cx, cy - 1))
+        if cy + 1 < self.clusters_y:
+            borders.append(('h', cx, cy))
+        return borders
+
+    # 交界两侧的簇
+    @staticmethod
+    def border_clusters(border):
+        direction, cx, cy = border
+        return (cx, cy), ((cx + 1, cy) if direction == 'v' else (cx, cy + 1))
+
+    # 计算交界上的入口
+    def find_entrances(self, border):
+        buf, length, size = self.grid.buf, self.length, self.cluster_size
+        direction, cx, cy = border
+        if direction == 'v':
+            x = (cx + 1) * size - 1
+            pairs = [(y * length + x, y * length + x + 1) for y in range(cy * size, min((cy + 1) * size, self.width))]
+        else:
+            y = (cy + 1) * size - 1
+            pairs = [(y * length + x, (y + 1) * length + x)
+                     for x in range(cx * size, min((cx + 1) * size, self.length))]
+        entrances = []
+        run = []
+        for cell, other in pairs + [(None, None)]:
+            if cell is not None and buf[cell] != MapGridType.MAP_BLOCK and buf[other] != MapGridType.MAP_BLOCK:
+                run.append((cell, other))
+                continue
+            if len(run) >= self.LONG_ENTRANCE:
+                entrances.extend((run[0], run[-1]))
+            elif run:
+                entrances.append(run[len(run) // 2])
+            run = []
+        return entrances
+
+    # 替换交界上的入口，同时更新簇间边
+    def set_border(self, border, entrances):
+        for cell, other in self.borders.get(border, ()):
+            self.inter[cell].remove(other)
+            self.inter[other].remove(cell)
+        self.borders[border] = entrances
+        for cell, other in entrances:
+            self.inter.setdefault(cell, []).append(other)
+            self.inter.setdefault(other, []).append(cell)
+
+    # 簇中的所有入口单元
+    def cluster_nodes(self, cluster):
+        nodes = set()
+        for border in self.cluster_borders(cluster):
+            side = 0 if self.border_clusters(border)[0] == cluster else 1
+            for pair in self.borders[border]:
+                nodes.add(pair[side])
+        return sorted(nodes)
+
+    # 在簇内从cell出发做广度优先搜索，返回 单元 -> (距离, 父单元)
+    def cluster_bfs(self, cluster, cell, target=None):
+        buf, length = self.grid.buf, self.length
+        x0, y0, x1, y1 = self.cluster_bounds(cluster)
+        visited = {cell: (0, None)}
+        queue = deque([cell])
+        while queue:
+            cur = queue.popleft()
+            if cur == target:
+                break
+            y, x = divmod(cur, length)
+            dist = visited[cur][0] + 1
+            for neighbor, inside in ((cur - 1, x > x0), (cur + 1, x < x1 - 1),
+                                     (cur - length, y > y0), (cur + length, y < y1 - 1)):
+                if inside and neighbor not in visited and buf[neighbor] != MapGridType.MAP_BLOCK:
+                    visited[neighbor] = (dist, cur)
+                    queue.append(neighbor)
+        return visited
+
+    # 计算簇内边
+    def build_intra(self, cluster):
+        nodes = self.cluster_nodes(cluster)
+        edges = {node: [] for node in nodes}
+        for i, node in enumerate(nodes):
+            visited = self.cluster_bfs(cluster, node)
+            for other in nodes[i + 1:]:
+                if other in visited:
+                    edges[node].append((other, visited[other][0]))
+                    edges[other].append((node, visited[other][0]))
+        self.intra[cluster] = edges
+
+    # 单元(x, y)的墙发生了变化
+    def mark_changed(self, x, y):
+        self.dirty_clusters.add((x // self.cluster_size, y // self.cluster_size))
+
+    # 重新计算需要更新的簇的边界入口与簇内边；入口变化的交界另一侧的簇也需要重新计算簇内边
+    def update(self):
+        if not self.dirty_clusters:
+            return
+        affected = set(self.dirty_clusters)
+        for cluster in self.dirty_clusters:
+            for border in self.cluster_borders(cluster):
+                entrances = self.find_entrances(border)
+                if entrances != self.borders[border]:
+                    self.set_border(border, entrances)
+                    affected.update(self.border_clusters(border))
+        self.dirty_clusters = set()
+        for cluster in affected:
+            self.build_intra(cluster)
+
+    def node_count(self):
+        return sum(len(edges) for edges in self.intra.values())
+
+    # 起点或终点到其所在簇的入口的距离：[(入口单元, 距离), ...]
+    def link(self, cell):
+        cluster = self.cluster_of(cell)
+        visited = self.cluster_bfs(cluster, cell)
+        return [(node, visited[node][0]) for node in self.cluster_nodes(cluster) if node in visited]
+
+    # 搜索origin到destination（坐标）的路径，返回(坐标列表, 路径长度, 抽象图上扩展的结点数)；不连通时返回([], None, 扩展的结点数)
+    def find_path(self, origin, destination):
+        self.update()
+        buf, length = self.grid.buf, self.length
+        start = origin[1] * length + origin[0]
+        goal = destination[1] * length + destination[0]
+        if buf[start] == MapGridType.MAP_BLOCK or buf[goal] == MapGridType.MAP_BLOCK:
+            return [], None, 0
+        goal_y, goal_x = divmod(goal, length)
+        start_links = self.link(start)
+        goal_links = dict(self.link(goal))
+        # 起点与终点在同一个簇内时，簇内的直接路径也是候选
+        same_cluster = self.cluster_of(start) == self.cluster_of(goal)
+        direct = self.cluster_bfs(self.cluster_of(start), start, goal).get(goal) if same_cluster else None
+
+        def heuristic(node):
+            y, x = divmod(node, length)
+            return abs(goal_x - x) + abs(goal_y - y)
+
+        g_vals = {self.START: 0}
+        parents = {self.START: None}
+        closed = set()
+        heap = [(heuristic(start), 0, self.START)]
+        while heap:
+            _, g_val, node = heappop(heap)
+            if node in closed:
+                continue
+            if node == self.GOAL:
+                break
+            closed.add(node)
+            if node == self.START:
+                neighbors = list(start_links)
+                if direct is not None:
+                    neighbors.append((self.GOAL, direct[0]))
+            else:
+                neighbors = [(other, 1) for other in self.inter.get(node, ())]
+                neighbors.extend(self.intra[self.cluster_of(node)].get(node, ()))
+                if node in goal_links:
+                    neighbors.append((self.GOAL, goal_links[node]))
+            for neighbor, cost in neighbors:
+                new_g = g_val + cost
+                if neighbor not in closed and (neighbor not in g_vals or new_g < g_vals[neighbor]):
+                    g_vals[neighbor] = new_g
+                    parents[neighbor] = node
+                    heappush(heap, (new_g + (0 if neighbor == self.GOAL else heuristic(neighbor)), new_g, neighbor))
+
+        expanded = len(closed)
+        if self.GOAL not in g_vals:
+            return [], None, expanded
+        # 抽象路径：起点、入口...、终点，相邻两个结点之间在簇内展开（簇间边两端的单元本身相邻）
+        abstract = []
+        node = self.GOAL
+        while node is not None:
+            abstract.append(goal if node == self.GOAL else start if node == self.START else node)
+            node = parents[node]
+        abstract.reverse()
+        cells = [start]
+        for cur, nxt in zip(abstract, abstract[1:]):
+            if nxt in self.inter.get(cur, ()) and self.cluster_of(cur) != self.cluster_of(nxt):
+                cells.append(nxt)
+                continue
+            cells.extend(self.refine(cur, nxt))
+        path = [(cell % length, cell // length) for cell in cells]
+        return path, g_vals[self.GOAL], expanded
+
+    # 在同一个簇内展开两个单元之间的路径，返回不含cell、含target的单元列表
+    def refine(self, cell, target):
+        if cell == target:
+            return []
+        visited = self.cluster_bfs(self.cluster_of(cell), cell, target)
+        segment = []
+        while target != cell:
+            segment.append(target)
+            target = visited[target][1]
+        segment.reverse()
+        return segment
@@ -1,6 +1,11 @@
 import pygame
 from sys import exit
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from MazeGenerator import Maze, MapGridType
 
 
@@ -16,6 +21,30 @@ SCREEN_WIDTH = REC_WIDTH * REC_SIZE + BUTTON_WIDTH      # 屏幕宽度
 RANDOM_ORIGIN = False
 RANDOM_DESTINATION = False
 
+# 绘制模式：'numpy'将整个地图通过颜色表映射为RGB数组后一次性绘制；'rect'逐个单元调用pygame.draw.rect
+RENDER_MODE = 'numpy'
+
+# 增量绘制时，需要重绘的单元数超过该值则直接整体重绘
+DIRTY_CELL_LIMIT = 4096
+
+# 各类单元的颜色
+GRID_COLORS = {
+    MapGridType.MAP_EMPTY: (255, 255, 255),             # 白，代表路径
+    MapGridType.MAP_BLOCK: (0, 0, 0),                   # 黑，代表墙
+    MapGridType.MAP_PATH: (135, 206, 235),              # 天蓝，代表a*自动寻路的路径
+    MapGridType.MAP_DESTINATION: (255, 0, 0),           # 红，代表终点
+    MapGridType.MAP_ORIGIN: (0, 255, 0),                # 绿，代表起点
+    MapGridType.MAP_PLAYER: (255, 255, 0),              # 黄，代表玩家游玩当前的位置
+}
+
+
+# 颜色表：以单元的字节编码为下标，得到对应的RGB颜色。未定义的编码显示为黄色
+def build_color_table():
+    table = np.full((256, 3), GRID_COLORS[MapGridType.MAP_PLAYER], dtype=np.uint8)
+    for grid_type, color in GRID_COLORS.items():
+        table[grid_type] = color
+    return table
+
 
 class Button(object):
     def __init__(self, screen, generator, x, y):
@@ -48,13 +77,23 @@ class Button(object):
 
 
 class Game(object):
-    def __init__(self):
+    def __init__(self, length=REC_LENGTH, width=REC_WIDTH, rec_size=REC_SIZE, render_mode=RENDER_MODE):
         pygame.init()
-        self.screen = pygame.display.set_mode([SCREEN_LENGTH, SCREEN_WIDTH])
+        self.length = length
+        self.width = width
+        self.rec_size = rec_size
+        self.screen = pygame.display.set_mode([self.length * self.rec_size, self.width * self.rec_size + BUTTON_WIDTH])
         self.clock = pygame.time.Clock()
+        # 没有安装numpy时，退回逐单元绘制
+        if render_mode == 'numpy' and np is None:
+            render_mode = 'rect'
+        self.render_mode = render_mode
+        self.color_table = build_color_table() if self.render_mode == 'numpy' else None
         self.maze_generator = 'cross'
-        self.maze = Maze(REC_LENGTH, REC_WIDTH, self.maze_generator)
+        self.maze = Maze(self.length, self.width, self.maze_generator)
         self.mode = 0
+        # 按钮状态改变等情况下需要整体重绘
+        self.redraw_all = True
         self.buttons = []
         self.buttons.append(Button(self.screen, 'BACKTRACK', 0, 0))
         self.buttons.append(Button(self.screen, 'CROSS', BUTTON_WIDTH + 80, 0))
@@ -62,30 +101,58 @@ class Game(object):
         self.buttons.append(Button(self.screen, 'MyBACKTRACK', (BUTTON_WIDTH + 80) * 3, 0))
         self.buttons[1].click(self)
 
+    # 绘制一帧，返回本帧改变了的屏幕区域，用于pygame.display.update
     def play(self):
         self.clock.tick(30)
 
-        pygame.draw.rect(self.screen, (255, 255, 255), pygame.Rect(0, 0, SCREEN_WIDTH, BUTTON_WIDTH))
+        all_dirty, dirty_cells = self.maze.pop_dirty()
+        if not (all_dirty or self.redraw_all or len(dirty_cells) > DIRTY_CELL_LIMIT):
+            return self.draw_cells(dirty_cells)
+        self.redraw_all = False
+
+        pygame.draw.rect(self.screen, (255, 255, 255), pygame.Rect(0, 0, self.screen.get_width(), BUTTON_WIDTH))
         for button in self.buttons:
             button.draw()
 
+        self.draw_maze()
+        return [self.screen.get_rect()]
+
+    def cell_rect(self, x, y):
+        return pygame.Rect(self.rec_size * x, self.rec_size * y + BUTTON_WIDTH, self.rec_size, self.rec_size)
+
+    # 只重绘发生改变的单元
+    def draw_cells(self, cells):
+        rects = []
+        for x, y in cells:
+            rect = self.cell_rect(x, y)
+            pygame.draw.rect(self.screen, GRID_COLORS[self.maze.get_grid_type(x, y)], rect)
+            rects.append(rect)
+        return rects
+
+    def draw_maze(self):
+        if self.render_mode == 'numpy':
+            self.draw_maze_surface()
+        else:
+            self.draw_maze_rects()
+
+    # 逐个单元绘制矩形
+    def draw_maze_rects(self):
         for y in range(self.maze.width):
             for x in range(self.maze.length):
-                grid_type = self.maze.get_grid_type(x, y)
-                if grid_type == MapGridType.MAP_EMPTY:
-                    color = (255, 255, 255)                 # 白，代表路径
-                elif grid_type == MapGridType.MAP_BLOCK:
-                    color = (0, 0, 0)                       # 黑，代表墙
-                elif grid_type == MapGridType.MAP_PATH:
-                    color = (135, 206, 235)                 # 天蓝，代表a*自动寻路的路径
-                elif grid_type == MapGridType.MAP_DESTINATION:
-                    color = (255, 0, 0)                     # 红，代表终点
-                elif grid_type == MapGridType.MAP_ORIGIN:
-                    color = (0, 255, 0)                     # 绿，代表起点
-                else:
-                    color = (255, 255, 0)                   # 黄，代表玩家游玩当前的位置（功能开发中）
-                pygame.draw.rect(self.screen, color,
-                                 pygame.Rect(REC_SIZE * x, REC_SIZE * y + BUTTON_WIDTH, REC_SIZE, REC_SIZE))
+                pygame.draw.rect(self.screen, GRID_COLORS[self.maze.get_grid_type(x, y)], self.cell_rect(x, y))
+
+    # 将地图缓冲区通过颜色表映射为RGB数组，缩放后一次性绘制到屏幕上
+    def draw_maze_surface(self):
+        maze = self.maze
+        codes = np.frombuffer(maze.map.buf, dtype=np.uint8).reshape(maze.width, maze.length)
+        # surfarray以(x, y)为下标，因此先转置
+        rgb = self.color_table[codes.T]
+        # 起点、终点与玩家不存储在缓冲区中，单独覆盖上去
+        for x, y in (maze.origin_coor, maze.destination_coor, maze.player_loc):
+            rgb[x, y] = GRID_COLORS[maze.get_grid_type(x, y)]
+        surface = pygame.transform.scale(pygame.surfarray.make_surface(rgb),
+                                         (maze.length * self.rec_size, maze.width * self.rec_size))
+        self.screen.blit(surface, (0, BUTTON_WIDTH))
 
     def generate_maze(self):
         if self.mode >= 2:
@@ -101,7 +168,40 @@ class Game(object):
         self.mode += 1
 
     def reset_maze(self):
-        self.maze = Maze(REC_LENGTH, REC_WIDTH, self.maze_generator, RANDOM_ORIGIN, RANDOM_DESTINATION)
+        self.maze = Maze(self.length, self.width, self.maze_generator, RANDOM_ORIGIN, RANDOM_DESTINATION)
+
+    # 显示路径时（mode为2），玩家移动或墙变化后用增量规划器重新求玩家到终点的路径，替换a*标记的路径
+    def replan(self):
+        if self.mode != 2:
+            return
+        for x, y in self.maze.astar.path:
+            if self.maze.map.get(x, y) == MapGridType.MAP_PATH:
+                self.maze.set_grid(x, y, MapGridType.MAP_EMPTY)
+        self.maze.astar.path = []
+        self.maze.replan()
+
+    # direction为'auto'时沿终点的距离场（见MazeField）走一步，距离场在墙变化前一直复用
+    def move_player(self, direction):
+        if self.mode == 0:
+            return
+        if direction == 'auto':
+            direction = self.maze.distance_field().next_move(*self.maze.player_loc)
+            if direction is None:
+                return
+        self.maze.player_move(direction)
+        self.replan()
+
+    # 点击迷宫中的单元，在墙与路径之间切换（起点、终点与玩家所在的单元除外）
+    def toggle_wall(self, mousex, mousey):
+        x, y = mousex // self.rec_size, (mousey - BUTTON_WIDTH) // self.rec_size
+        if self.mode == 0 or not self.maze.is_valid(x, y) or \
+                (x, y) in (self.maze.origin_coor, self.maze.destination_coor, self.maze.player_loc):
+            return
+        if self.maze.map.get(x, y) == MapGridType.MAP_BLOCK:
+            self.maze.set_grid(x, y, MapGridType.MAP_EMPTY)
+        else:
+            self.maze.set_grid(x, y, MapGridType.MAP_BLOCK)
+        self.replan()
 
 
 def check_buttons(game, mousex, mousey):
@@ -111,18 +211,28 @@ def check_buttons(game, mousex, mousey):
             for tmp in game.buttons:
                 if tmp != button:
                     tmp.unclick()
+            game.redraw_all = True
             break
 
 
+# 方向键对应的玩家移动方向，Tab键让玩家自动向终点走一步
+PLAYER_KEYS = {
+    pygame.K_UP: 'up',
+    pygame.K_DOWN: 'down',
+    pygame.K_LEFT: 'left',
+    pygame.K_RIGHT: 'right',
+    pygame.K_TAB: 'auto',
+}
+
+
 def play(game, k_button):
-    ...
+    game.move_player(PLAYER_KEYS[k_button])
 
 
 if __name__ == '__main__':
     the_game = Game()
     while True:
-        the_game.play()
-        pygame.display.update()
+        pygame.display.update(the_game.play())
 
         for event in pygame.event.get():
             # 退出
@@ -130,8 +240,15 @@ if __name__ == '__main__':
                 pygame.quit()
                 exit()
             if event.type == pygame.KEYDOWN:
+                # 方向键移动玩家，其他键生成迷宫/寻路/重置
+                if event.key in PLAYER_KEYS:
+                    play(the_game, event.key)
+                    continue
                 the_game.generate_maze()
                 break
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_x, mouse_y = pygame.mouse.get_pos()
-                check_buttons(the_game, mouse_x, mouse_y)
\ No newline at end of file
+                if mouse_y >= BUTTON_WIDTH:
+                    the_game.toggle_wall(mouse_x, mouse_y)
+                else:
+                    check_buttons(the_game, mouse_x, mouse_y)
\ No newline at end of file
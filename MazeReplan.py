@@ -0,0 +1,142 @@
+"""
+增量寻路（D* Lite）
+终点固定，起点（玩家的位置）不断移动，地图上的单元在墙与路径之间变化时，不必每次都从头搜索：
+规划器从终点向起点反向搜索，保留每个单元到终点的距离g与由相邻单元推出的单步估计rhs（rhs = min(相邻单元的g) + 1），
+g == rhs的单元是一致的。墙变化后只需重新计算变化单元及其相邻单元的rhs，将不一致的单元放入优先队列，
+按key从小到大处理，直到起点一致且队列中没有可能影响起点的单元为止，被处理的只是受影响的那一部分搜索树。
+key = (min(g, rhs) + h(起点, 单元) + km, min(g, rhs))，h为曼哈顿距离。起点移动后，已在队列中的key不再重新计算，
+而是把起点移动的距离累加到km上，使新加入的key与旧key可以比较（见Koenig & Likhachev, D* Lite）。
+只用于四方向移动，每步的cost为1。
+与簇抽象（MazeHierarchy）相同，Maze.set_grid只记录墙发生变化的单元，下次查询时才修复。
+"""
+from heapq import heappush, heappop
+
+from config import MapGridType
+
+INF = float('inf')
+
+
+class DStarLite(object):
+    def __init__(self, grid, destination):
+        self.grid = grid
+        self.length = grid.length
+        self.width = grid.width
+        self.destination = tuple(destination)
+        self.goal = destination[1] * self.length + destination[0]
+        size = self.length * self.width
+        self.g = [INF] * size
+        self.rhs = [INF] * size
+        self.rhs[self.goal] = 0
+        # 优先队列：堆中为(key1, key2, 单元)，queued记录每个在队列中的单元的当前key，堆中与之不符的元素已过期
+        self.heap = [(0, 0, self.goal)]
+        self.queued = {self.goal: (0, 0)}
+        self.km = 0
+        # 上次查询的起点（单元下标），为None时还没有查询过
+        self.start = None
+        # 墙发生变化、下次查询前需要修复的单元
+        self.changed = set()
+        # 上次查询中处理（出队并更新g值）的单元数
+        self.expanded = 0
+
+    # 单元cell的相邻单元（不含地图之外的）
+    def neighbors(self, cell):
+        length = self.length
+        y, x = divmod(cell, length)
+        result = []
+        if x > 0:
+            result.append(cell - 1)
+        if x < length - 1:
+            result.append(cell + 1)
+        if y > 0:
+            result.append(cell - length)
+        if y < self.width - 1:
+            result.append(cell + length)
+        return result
+
+    def calculate_key(self, cell):
+        length = self.length
+        value = min(self.g[cell], self.rhs[cell])
+        y, x = divmod(cell, length)
+        start_y, start_x = divmod(self.start, length)
+        return value + abs(x - start_x) + abs(y - start_y) + self.km, value
+
+    # 重新计算单元的rhs，并根据其是否一致决定是否放入队列
+    def update_vertex(self, cell):
+        buf, g = self.grid.buf, self.g
+        if cell != self.goal:
+            if buf[cell] == MapGridType.MAP_BLOCK:
+                self.rhs[cell] = INF
+            else:
+                self.rhs[cell] = min([g[other] for other in self.neighbors(cell)
+                                      if buf[other] != MapGridType.MAP_BLOCK] or [INF]) + 1
+        self.queued.pop(cell, None)
+        if g[cell] != self.rhs[cell]:
+            key = self.calculate_key(cell)
+            self.queued[cell] = key
+            heappush(self.heap, key + (cell,))
+
+    # 单元(x, y)的墙发生了变化
+    def mark_changed(self, x, y):
+        self.changed.add(y * self.length + x)
+
+    # 处理队列，直到起点一致且队列中剩余的key都不小于起点的key
+    def compute_shortest_path(self):
+        g, rhs, heap, queued = self.g, self.rhs, self.heap, self.queued
+        buf, start = self.grid.buf, self.start
+        expanded = 0
+        while heap:
+            key1, key2, cell = heap[0]
+            if queued.get(cell) != (key1, key2):
+                heappop(heap)
+                continue
+            start_value = min(g[start], rhs[start])
+            if (key1, key2) >= (start_value + self.km, start_value) and rhs[start] == g[start]:
+                break
+            heappop(heap)
+            new_key = self.calculate_key(cell)
+            if (key1, key2) < new_key:
+                queued[cell] = new_key
+                heappush(heap, new_key + (cell,))
+                continue
+            del queued[cell]
+            expanded += 1
+            if g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+                for other in self.neighbors(cell):
+                    if buf[other] != MapGridType.MAP_BLOCK:
+                        self.update_vertex(other)
+            else:
+                g[cell] = INF
+                for other in self.neighbors(cell):
+                    self.update_vertex(other)
+                self.update_vertex(cell)
+        self.expanded = expanded
+
+    # 求origin（坐标）到终点的路径，返回(坐标列表, 路径长度, 处理的单元数)；不连通时返回([], None, 处理的单元数)。
+    # 起点的移动与上次查询以来墙的变化都在这里一并修复
+    def find_path(self, origin):
+        length, buf = self.length, self.grid.buf
+        start = origin[1] * length + origin[0]
+        if self.start is not None and start != self.start:
+            y, x = divmod(start, length)
+            last_y, last_x = divmod(self.start, length)
+            self.km += abs(x - last_x) + abs(y - last_y)
+        self.start = start
+        changed, self.changed = self.changed, set()
+        for cell in changed:
+            self.update_vertex(cell)
+            for other in self.neighbors(cell):
+                self.update_vertex(other)
+        self.compute_shortest_path()
+        if buf[start] == MapGridType.MAP_BLOCK or buf[self.goal] == MapGridType.MAP_BLOCK or self.g[start] == INF:
+            return [], None, self.expanded
+        # 从起点出发，每一步走向g值最小的相邻单元，直到终点
+        g = self.g
+        cells = [start]
+        cell = start
+        while cell != self.goal:
+            cell = min((other for other in self.neighbors(cell) if buf[other] != MapGridType.MAP_BLOCK),
+                       key=g.__getitem__)
+            cells.append(cell)
+        path = [(cell % length, cell // length) for cell in cells]
+        return path, g[start], self.expanded
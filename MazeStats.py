@@ -0,0 +1,76 @@
+"""
+搜索与生成的统计信息（见SearchRoute.Astar.stats与各生成器的stats）。
+计数在循环中用局部变量累加，循环结束后一次性写入；各阶段的耗时由lap在阶段之间记录，不需要改动循环本身。
+每一步的回调与frontier大小的采样通过observer得到的函数完成，两者都关闭时observer为None，循环中只多一次判断。
+"""
+from time import perf_counter
+
+
+class Stats(object):
+    """ 统计信息的公共部分：各阶段的耗时，以及每sample_every步记录一次的frontier（open集、生成器的检查列表等）大小 """
+    def __init__(self, sample_every=0):
+        self.sample_every = sample_every
+        # 阶段名 -> 耗时（秒），按阶段开始的顺序排列
+        self.phases = {}
+        # [(步数, frontier大小), ...]
+        self.frontier = []
+        self.last_time = None
+
+    # 开始计时
+    def start(self):
+        self.last_time = perf_counter()
+
+    # 将上次start/lap以来的耗时记入阶段name
+    def lap(self, name):
+        now = perf_counter()
+        if self.last_time is not None:
+            self.phases[name] = self.phases.get(name, 0.0) + now - self.last_time
+        self.last_time = now
+
+    # 返回每一步调用的函数observe(x, y, value, frontier大小)：调用callback(x, y, value)，并按sample_every采样frontier的大小
+    # （省略时即value，如生成器的回调参数就是frontier的大小）。callback为None且不采样时返回None
+    def observer(self, callback):
+        every = self.sample_every
+        if callback is None and not every:
+            return None
+        frontier = self.frontier
+        steps = [0]
+
+        def observe(x, y, value, size=None):
+            if callback is not None:
+                callback(x, y, value)
+            if every:
+                steps[0] += 1
+                if steps[0] % every == 0:
+                    frontier.append((steps[0], value if size is None else size))
+        return observe
+
+    # 以字典的形式返回统计信息（如写入JSON）
+    def as_dict(self):
+        result = {key: value for key, value in vars(self).items() if key != 'last_time'}
+        result['frontier'] = [list(sample) for sample in self.frontier]
+        return result
+
+
+class SearchStats(Stats):
+    """
+    一次搜索的统计信息。expanded为扩展（加入close集）的单元数；pushes、pops为入堆、出堆次数，stale_pops为其中弹出的过期元素数；
+    peak_open为堆中元素数的峰值（含过期的元素）。使用走廊图等索引的模式只记录expanded与各阶段的耗时。
+    solutions只用于加权与anytime模式，为每一轮得到的(权重, 路径cost, cost与最短路径之比的上界, 自搜索开始的秒数)
+    """
+    def __init__(self, sample_every=0):
+        super(SearchStats, self).__init__(sample_every)
+        self.expanded = 0
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.peak_open = 0
+        self.solutions = []
+
+
+class GeneratorStats(Stats):
+    """ 一次生成的统计信息。steps为主循环的步数，peak_frontier为检查列表（或栈、剩余集合数等）的峰值 """
+    def __init__(self, sample_every=0):
+        super(GeneratorStats, self).__init__(sample_every)
+        self.steps = 0
+        self.peak_frontier = 0
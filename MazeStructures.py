@@ -0,0 +1,89 @@
+"""
+迷宫生成与寻路中共用的数据结构
+"""
+import random
+from array import array
+
+
+class UnionFind(object):
+    """
+    并查集。节点用0 ~ size-1的整数表示，父节点与每棵树的大小都存储在数组中。
+    查找根节点时使用循环而非递归，并做路径压缩；合并时将较小的树合并到较大的树中。
+    """
+    def __init__(self, size):
+        # parent存储每个节点的父节点，初始化时即节点自己
+        self.parent = array('l', range(size))
+        # tree_size为以该节点为根的树的节点数，只对根节点有意义
+        self.tree_size = array('l', [1]) * size
+
+    # 寻找节点的根节点，并将路径上的节点都直接挂到根节点下
+    def find(self, index):
+        parent = self.parent
+        root = index
+        while parent[root] != root:
+            root = parent[root]
+        while parent[index] != root:
+            parent[index], index = root, parent[index]
+        return root
+
+    # 合并两个节点所在的树。若两个节点原本就在同一棵树中，返回False
+    def union(self, index1, index2):
+        root1 = self.find(index1)
+        root2 = self.find(index2)
+        if root1 == root2:
+            return False
+        if self.tree_size[root1] < self.tree_size[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        self.tree_size[root1] += self.tree_size[root2]
+        return True
+
+
+class Frontier(object):
+    """
+    用于生成算法的待检查列表，支持O(1)的随机选取与删除。元素为整数（如单元的index），存储在数组中。
+    删除时将末尾的元素换到被删除的位置，因此删除后元素的顺序会改变。
+    """
+    def __init__(self, items=(), rand=random):
+        self.items = array('l', items)
+        self.rand = rand
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def append(self, item):
+        self.items.append(item)
+
+    # 随机取一个元素的下标
+    def random_index(self):
+        return self.rand.randrange(len(self.items))
+
+    # 按选取策略取一个元素的下标（策略见check_selection）
+    def select_index(self, selection):
+        if selection == 'newest':
+            return len(self.items) - 1
+        if selection == 'random':
+            return self.random_index()
+        if self.rand.random() < selection:
+            return len(self.items) - 1
+        return self.random_index()
+
+    # 删除下标为index的元素，用末尾的元素填补其位置
+    def swap_remove(self, index):
+        last = self.items.pop()
+        if index < len(self.items):
+            self.items[index] = last
+
+
+# 生成器从待检查列表中选取单元的策略：
+# 'newest'总是取最新加入的单元；'random'随机选取；0~1之间的数值表示以该概率取最新加入的单元，否则随机选取。
+# 由于删除时会用末尾的元素填补空位，混合策略下的“最新”只是近似的。
+def check_selection(selection):
+    if selection in ('newest', 'random'):
+        return selection
+    if isinstance(selection, (int, float)) and not isinstance(selection, bool) and 0 <= selection <= 1:
+        return selection
+    raise ValueError("selection must be 'newest', 'random' or a ratio in [0, 1], got %r" % (selection,))
@@ -15,18 +15,69 @@ A星算法
         3.2.2. 相邻节点在open集中，若从当前节点走到这个相邻节点所计算而得的G值更小，则更新此相邻节点的G值与F值，并重定向其父节点为当前节点
         3.2.3. 否则，将该相邻节点加入open集，设置其G值与F值，并设置其父节点为当前节点。
 * 若迷宫实际不通，则在第一步时判断获取到的节点n为空，就会退出
+
+快速模式（Astar(maze, fast=True)）：
+不为每个单元创建Node对象，而是将单元编码为 y * length + x 的整数（为省去边界判断，地图四周额外加一圈墙），
+g值、父单元与close标记都存放在预先分配的数组中，close标记与墙共用同一个bytearray。
+相邻单元的下标偏移预先算好；cost放大为整数后，堆中直接存放由(f, h, index)压缩成的一个整数，比较时比元组快。
+八方向移动时，对角移动不能穿过墙角，h值使用octile距离。
+g值变小时直接再次入堆，弹出时跳过已在close集中的过期元素。
+
+通行cost、h值与加权（Astar(maze, heuristic='euclidean', weight=2, anytime=True, time_budget=0.005)）：
+Maze.costs为每个单元的通行cost（1～255），移动进入该单元的cost为平移/对角的cost乘以它，默认（None）都为1。
+heuristic可选曼哈顿、octile与欧氏距离（见HEURISTICS）；weight大于1时为加权a*，以不超过weight倍的路径cost换取更少的扩展。
+普通模式直接支持这三项；快速模式用到其中任一项，或anytime为True时，改用search_weighted（ARA*）：
+先以weight得到一条路径，再逐步减小权重改进路径，在time_budget内返回已得到的最好路径，bound为其cost与最短路径之比的上界。
+其他模式不支持这几项。
+所有模式的path_cost都是float：平移为1，对角移动为1.4，再乘以通行cost（搜索中放大为整数，见mark_path）。
+
+走廊图模式（Astar(maze, corridor=True)）：
+在只含路口与死路的走廊图（见MazeGraph）上搜索，再将经过的走廊展开为单元。只用于四方向移动。
+Maze会缓存走廊图，对同一个迷宫的多次查询只需建立一次；其他地图（如TestMap）每次搜索时建立。
+
+树索引模式（Astar(maze, tree=True)）：
+完美迷宫（走廊图是一棵树）中任意两个单元之间只有一条路径，用最近公共祖先直接得到路径，不做搜索（见MazeGraph.TreeIndex）。
+迷宫有环时（如十字分割生成器在墙上开了多个洞，或TestMap）退回到走廊图模式的a*。
+
+分层模式（Astar(maze, hierarchical=True)）：
+HPA*，在由簇的入口组成的抽象图上搜索，再在经过的簇内展开路径（见MazeHierarchy）。只用于四方向移动。
+Maze会缓存簇抽象，墙发生变化时只更新受影响的簇；路径长度可能略大于最短路径（完美迷宫中总是最短的）。
+
+增量模式（Astar(maze, incremental=True)）：
+D* Lite，从终点向起点反向搜索并保留搜索状态（见MazeReplan）。只用于四方向移动。
+Maze会缓存规划器，之后起点移动或墙发生变化时只修复受影响的部分，不必从头搜索（MazePlay中玩家移动后即用它重新规划）。
+
+统计信息（Astar.stats，见MazeStats）：
+每次搜索都记录扩展的单元数、入堆/出堆次数、弹出的过期元素数、堆的峰值，以及准备（prepare）、搜索（search）、
+回溯并标记路径（path）各阶段的耗时。计数在循环中用局部变量累加，入堆次数由出堆次数与堆中剩余的元素数得到。
+Astar(maze, on_expand=f)在每扩展一个单元时调用f(x, y, g值)，sample_every=n时每扩展n个单元记录一次堆的大小；
+两者都不用时循环中只多一次判断。使用走廊图、树索引、簇抽象或增量规划器的模式只记录扩展数与耗时。
+
+分块世界（MazeChunks.TileWorld）：
+地图没有完整的缓冲区，搜索时以坐标为键，用字典记录g值与父单元，通过world.is_blocked按需读取（生成）所需的块。
+块的缓存有容量上限，被淘汰的块需要时会重新生成。四方向、八方向移动都可使用，cost与h值同快速模式。
 """
 from config import MapGridType
+from MazeGrid import create_grid
+from MazeGraph import CorridorGraph, TreeIndex
+from MazeHierarchy import ClusterGraph
+from MazeReplan import DStarLite
+from MazeStats import SearchStats
 from random import randint
+from array import array
 from heapq import *
+from math import sqrt
+from time import perf_counter
 
 
 class TestMap(object):
     """ 简单的测试迷宫类。0代表可通行的路径单元，1代表不可通行的墙单元，2代表走过的路径 """
-    def __init__(self, length, width):
+    def __init__(self, length, width, backend='bytearray'):
         self.length = length
         self.width = width
-        self.map = [[0] * self.length for _ in range(self.width)]
+        self.map = create_grid(self.length, self.width, backend)
+        # 每个单元的通行cost（见Maze.costs）
+        self.costs = None
         self.origin_coor = 0, 0
         self.destination_coor = length - 1, width - 1
 
@@ -36,11 +87,17 @@ class TestMap(object):
             x, y = (randint(0, self.length - 1), randint(0, self.width - 1))
             while (x, y) == self.origin_coor or (x, y) == self.destination_coor:
                 x, y = (randint(0, self.length - 1), randint(0, self.width - 1))
-            self.map[y][x] = MapGridType.MAP_BLOCK
+            self.set_grid(x, y, MapGridType.MAP_BLOCK)
+
+    def set_grid(self, x, y, value):
+        self.map.set(x, y, value)
+
+    def get_grid_type(self, x, y):
+        return self.map.get(x, y)
 
     def show_map(self):
         print("+" * (3 * self.length + 2))
-        for row in self.map:
+        for row in self.map.rows():
             s = '+'
             for entry in row:
                 s += ' ' + str(entry) + ' '
@@ -51,11 +108,15 @@ class TestMap(object):
     # 随机获取可移动的单元
     def generate_pos(self, range_x, range_y):
         x, y = (randint(range_x[0], range_x[1]), randint(range_y[0], range_y[1]))
-        while self.map[y][x] == 1:
+        while self.map.get(x, y) == MapGridType.MAP_BLOCK:
             x, y = (randint(range_x[0], range_x[1]), randint(range_y[0], range_y[1]))
         return x, y
 
 
+# 可选的h值，各模式都以Astar.get_scaled_h计算
+HEURISTICS = ('manhattan', 'octile', 'euclidean')
+
+
 class Node(object):
     """ 节点类。每个节点具有如下特征：横纵坐标、父节点、g值、f值 """
     def __init__(self, coor, g_val, h_val=0, father=None):
@@ -69,9 +130,6 @@ class Node(object):
     def get_pos(self):
         return self.coor[0], self.coor[1]
 
-    def get_h_val(self, dest_coor):
-        return abs(dest_coor[0] - self.coor[0]) + abs(dest_coor[1] - self.coor[1])
-
     def reset_g_val(self, new_g_val):
         self.g_val = new_g_val
         self.reset_f_val()
@@ -84,42 +142,323 @@ class Node(object):
 
 
 class OpenList(object):
-    """ OpenList类，基于堆，实现快速定位openList中最小F值的点. """
+    """
+    OpenList类，基于堆，实现快速定位openList中最小F值的点.
+    节点的g值变小时（decrease_key），将节点以新的F值再次入堆；旧的元素留在堆中，弹出时发现其F值与节点当前的F值不符则跳过。
+    """
     def __init__(self):
         self.heap = list()
         self.open_list = dict()
+        # 统计信息：入堆次数、出堆次数、弹出的过期元素数
+        self.push_count = 0
+        self.pop_count = 0
+        self.stale_count = 0
+
+    def __len__(self):
+        return len(self.open_list)
 
     def push(self, node):
         heappush(self.heap, (node.f_val, node.coor))
         self.open_list[node.coor] = node
+        self.push_count += 1
 
     def pop(self):
-        node_coor = heappop(self.heap)[1]
-        node = self.open_list.pop(node_coor)            # dict 移除键值对时间复杂度也是O(1)
-        return node
+        while True:
+            f_val, node_coor = heappop(self.heap)
+            self.pop_count += 1
+            node = self.open_list.get(node_coor)
+            # 节点已出堆，或其F值已经变小（有更新的元素在堆中），则是过期的元素
+            if node is not None and node.f_val == f_val:
+                del self.open_list[node_coor]           # dict 移除键值对时间复杂度也是O(1)
+                return node
+            self.stale_count += 1
+
+    # 节点的F值变小后调用，以新的F值重新入堆
+    def decrease_key(self, node):
+        heappush(self.heap, (node.f_val, node.coor))
+        self.push_count += 1
 
     # 根据坐标，从open集中返回Node。若不存在则返回None
     def locate_node(self, coor):
         return self.open_list.get(coor, None)
 
 
+class IndexedOpenList(object):
+    """
+    基于带索引的二叉堆的open集。记录每个节点在堆中的位置，节点的g值变小时直接将其在堆中上移，堆中不会有过期的元素。
+    接口与OpenList相同。
+    """
+    def __init__(self):
+        self.heap = list()                                  # 堆中直接存放Node，按(f值, 坐标)排序
+        self.position = dict()                              # 坐标 -> 节点在堆中的位置
+        self.push_count = 0
+        self.pop_count = 0
+        self.stale_count = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, node):
+        self.heap.append(node)
+        self.position[node.coor] = len(self.heap) - 1
+        self.sift_up(len(self.heap) - 1)
+        self.push_count += 1
+
+    def pop(self):
+        if not self.heap:
+            raise IndexError('pop from empty open list')
+        self.pop_count += 1
+        node = self.heap[0]
+        last = self.heap.pop()
+        del self.position[node.coor]
+        if self.heap:
+            self.heap[0] = last
+            self.position[last.coor] = 0
+            self.sift_down(0)
+        return node
+
+    def decrease_key(self, node):
+        self.sift_up(self.position[node.coor])
+
+    def locate_node(self, coor):
+        index = self.position.get(coor)
+        return None if index is None else self.heap[index]
+
+    @staticmethod
+    def less(node1, node2):
+        return (node1.f_val, node1.coor) < (node2.f_val, node2.coor)
+
+    def sift_up(self, index):
+        heap, position = self.heap, self.position
+        node = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if not self.less(node, heap[parent]):
+                break
+            heap[index] = heap[parent]
+            position[heap[index].coor] = index
+            index = parent
+        heap[index] = node
+        position[node.coor] = index
+
+    def sift_down(self, index):
+        heap, position = self.heap, self.position
+        size = len(heap)
+        node = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and self.less(heap[child + 1], heap[child]):
+                child += 1
+            if not self.less(heap[child], node):
+                break
+            heap[index] = heap[child]
+            position[heap[index].coor] = index
+            index = child
+        heap[index] = node
+        position[node.coor] = index
+
+
+class JumpGrid(object):
+    """
+    跳点搜索所用的地图：四周加了一圈墙的bytes，1为墙，0为可通行；另存一份转置后的地图，使垂直方向的跳跃也能按行扫描。
+    从一个单元出发沿某个方向一直“跳”到下一个跳点（终点，或存在强制邻居的单元）为止，中间的单元都不入堆：
+    平移时，若侧面的单元可通行而其后方的单元是墙，则该侧面单元是强制邻居；
+    对角移动时，每走一步都沿水平、垂直两个分量方向各跳一次，能找到跳点则当前单元也是跳点。
+    平移的跳跃不逐个单元判断，而是用bytes.find在本行中找下一面墙、在相邻两行中找“墙->可通行”的交界，都在C层完成。
+    """
+    def __init__(self, walls, row):
+        self.walls = walls
+        self.row = row
+        self.col = len(walls) // row
+        # 转置后，原坐标(x, y)的下标为 x * col + y
+        self.walls_t = b''.join(walls[x::row] for x in range(row))
+
+    # 根据到达当前单元的方向，给出需要继续搜索的方向（剪枝后的邻居）
+    def prune_directions(self, cur, parent):
+        row = self.row
+        cur_y, cur_x = divmod(cur, row)
+        parent_y, parent_x = divmod(parent, row)
+        dx, dy = (cur_x > parent_x) - (cur_x < parent_x), (cur_y > parent_y) - (cur_y < parent_y)
+        if dx and dy:
+            return [(0, dy), (dx, 0), (dx, dy)]
+        directions = [(dx, dy)]
+        # 平移时，还需要搜索两侧的方向，以及朝前方两侧的对角方向（墙的判断在jump中进行）
+        for side_x, side_y in ((dy, dx), (-dy, -dx)):
+            if not self.walls[cur + side_y * row + side_x]:
+                directions.append((side_x, side_y))
+                directions.append((dx + side_x, dy + side_y))
+        return directions
+
+    # 从cur出发沿(dx, dy)方向跳跃，返回找到的跳点的下标，没有则返回-1
+    def jump(self, cur, dx, dy, goal):
+        if not (dx and dy):
+            return self.jump_straight(cur, dx, dy, goal)
+        walls, row = self.walls, self.row
+        step = dy * row + dx
+        while True:
+            # 不能穿过墙角
+            if walls[cur + dx] or walls[cur + dy * row]:
+                return -1
+            cur += step
+            if walls[cur]:
+                return -1
+            if cur == goal:
+                return cur
+            if self.jump_straight(cur, dx, 0, goal) >= 0 or self.jump_straight(cur, 0, dy, goal) >= 0:
+                return cur
+
+    # 沿水平或垂直方向跳跃。垂直方向在转置后的地图上按行扫描
+    def jump_straight(self, cur, dx, dy, goal):
+        if dx:
+            return self.scan(self.walls, self.row, cur, dx, goal)
+        row, col = self.row, self.col
+        cur_y, cur_x = divmod(cur, row)
+        goal_y, goal_x = divmod(goal, row)
+        found = self.scan(self.walls_t, col, cur_x * col + cur_y, dy, goal_x * col + goal_y)
+        if found < 0:
+            return -1
+        x, y = divmod(found, col)
+        return y * row + x
+
+    # 在地图buf（每行长度为row）中，从cur沿本行向右（step = 1）或向左（step = -1）寻找第一个跳点
+    @staticmethod
+    def scan(buf, row, cur, step, goal):
+        line_start = cur - cur % row
+        if step > 0:
+            # 本行中下一面墙的位置，跳点必须在它之前
+            wall = buf.find(b'\x01', cur + 1, line_start + row)
+            # 上一行/下一行中，p - 1处是墙而p处可通行，则本行的p处存在强制邻居
+            above = buf.find(b'\x01\x00', cur - row, wall - row)
+            below = buf.find(b'\x01\x00', cur + row, wall + row)
+            found = [p for p in (above + row + 1 if above >= 0 else -1, below - row + 1 if below >= 0 else -1,
+                                 goal if cur < goal < wall else -1) if p >= 0]
+            return min(found) if found else -1
+        wall = buf.rfind(b'\x01', line_start, cur)
+        # 上一行/下一行中，p处可通行而p + 1处是墙，则本行的p处存在强制邻居
+        above = buf.rfind(b'\x00\x01', wall + 1 - row, cur + 1 - row)
+        below = buf.rfind(b'\x00\x01', wall + 1 + row, cur + 1 + row)
+        found = [p for p in (above + row if above >= 0 else -1, below - row if below >= 0 else -1,
+                             goal if wall < goal < cur else -1) if p >= 0]
+        return max(found) if found else -1
+
+
+OPEN_LISTS = {
+    'lazy': OpenList,
+    'indexed': IndexedOpenList,
+}
+
+
 class Astar(object):
-    def __init__(self, maze):
+    # 相邻单元的坐标偏移，依次为左、上、右、下，以及左上、右上、左下、右下
+    OFFSETS = [(-1, 0), (0, -1), (1, 0), (0, 1)]
+    DIAGONAL_OFFSETS = [(-1, -1), (1, -1), (-1, 1), (1, 1)]
+    # 快速模式中cost的放大倍数，使平移（1）与对角移动（1.4）的cost都是整数
+    COST_SCALE = 5
+
+    def __init__(self, maze, fast=False, diagonal=False, open_list='lazy', bidirectional=False, jump_point=False,
+                 corridor=False, tree=False, hierarchical=False, cluster_size=16, incremental=False, on_expand=None,
+                 sample_every=0, heuristic=None, weight=1, anytime=False, weight_step=0.5, time_budget=None):
         self.maze = maze
-        self.open_list = OpenList()
+        self.fast = fast
+        # 双向搜索与跳点搜索都基于快速模式的数据结构
+        self.bidirectional = bidirectional
+        # 跳点搜索只用于八方向移动
+        self.jump_point = jump_point
+        if self.jump_point:
+            diagonal = True
+        # 走廊图模式、树索引模式、分层模式与增量模式只用于四方向移动
+        self.corridor = corridor
+        self.tree = tree
+        self.hierarchical = hierarchical
+        self.cluster_size = cluster_size
+        self.incremental = incremental
+        if (self.corridor or self.tree or self.hierarchical or self.incremental) and diagonal:
+            raise ValueError('corridor, tree, hierarchical and incremental search only support 4-connected moves')
+        # h值（见HEURISTICS），为None时由移动方式决定（见get_heuristic）。
+        # weight为加权a*的权重（f = g + weight * h），得到的路径cost不超过最短路径的weight倍（h值不高估时；
+        # 八方向移动时曼哈顿距离会高估）。
+        # anytime为True时使用ARA*：先以weight快速得到一条路径，再每次将权重减小weight_step并复用之前的搜索结果改进路径，
+        # 直到权重降为1（路径最短）或用完time_budget（秒）。见search_weighted
+        if heuristic is not None and heuristic not in HEURISTICS:
+            raise ValueError('unknown heuristic: %r' % heuristic)
+        if weight < 1:
+            raise ValueError('weight must be at least 1')
+        if (heuristic is not None or weight != 1 or anytime) and \
+                (self.bidirectional or self.jump_point or self.corridor or self.tree or self.hierarchical or
+                 self.incremental):
+            raise ValueError('heuristic, weight and anytime only apply to the node and fast searches')
+        self.heuristic = heuristic
+        self.weight = weight
+        self.anytime = anytime
+        self.weight_step = weight_step
+        self.time_budget = time_budget
+        # 每个单元的通行cost（见Maze.costs），搜索开始时从地图读取
+        self.costs = None
+        # 定义“相邻”为周围的四个方向或八个方向
+        self.offsets = self.OFFSETS + self.DIAGONAL_OFFSETS if diagonal else self.OFFSETS
+        # open集的实现，见OPEN_LISTS（只用于非快速模式）
+        self.open_list = OPEN_LISTS[open_list]()
         self.close_list = set()                             # close集存储的是坐标
+        # 搜索结果：从起点到终点的坐标列表，以及路径的总cost。没有可行的路径时path为空，path_cost为None
+        self.path = []
+        self.path_cost = None
+        # 路径cost与最短路径之比的上界（只用于加权与anytime模式，见search_weighted）
+        self.bound = None
+        # 从起点一侧、从终点一侧分别扩展（加入close集）的单元数。单向搜索时只有起点一侧
+        self.expanded_forward = 0
+        self.expanded_backward = 0
+        # 统计信息（见MazeStats.SearchStats）。on_expand(x, y, g值)在每扩展一个单元时调用；sample_every不为0时，
+        # 每扩展该数目的单元记录一次堆的大小。回调与采样只用于逐单元扩展的模式（普通、快速、双向、跳点与分块世界）
+        self.on_expand = on_expand
+        self.stats = SearchStats(sample_every)
 
     def search(self):
+        self.stats.start()
+        if getattr(self.maze, 'is_tiled', False):
+            if self.weight != 1 or self.anytime:
+                raise ValueError('weight and anytime only apply to the node and fast searches')
+            return self.search_tiled()
+        self.costs = getattr(self.maze, 'costs', None)
+        if self.costs is not None and (self.bidirectional or self.jump_point or self.corridor or self.tree or
+                                       self.hierarchical or self.incremental):
+            raise ValueError('terrain costs are only supported by the node and fast searches')
+        if self.anytime or (self.fast and (self.heuristic is not None or self.weight != 1 or
+                                           self.costs is not None)):
+            return self.search_weighted()
+        if self.incremental:
+            return self.search_incremental()
+        if self.hierarchical:
+            return self.search_hierarchical()
+        if self.tree:
+            return self.search_tree()
+        if self.corridor:
+            return self.search_corridor()
+        if self.jump_point:
+            return self.search_jump_point()
+        if self.bidirectional:
+            return self.search_bidirectional()
+        if self.fast:
+            return self.search_fast()
+        return self.search_nodes()
+
+    def search_nodes(self):
         # 建立起点终点对象，将起点加入open集
         cur_node = Node(self.maze.origin_coor, 0)                # 初始为起点
         destination = Node(self.maze.destination_coor, 0)
-        self.open_list.push(cur_node)
+        open_list = self.open_list
+        open_list.push(cur_node)
+        observe = self.stats.observer(self.on_expand)
+        peak_open = 1
+        self.stats.lap('prepare')
         while True:
             # 寻找open集中f值最小的单元，并从open集中弹出。
             try:
                 cur_node = self.open_list.pop()
             except IndexError:
                 print(" 没有可行的路径 ")
+                cur_node = None
                 break
             # 若选择的单元就是终点，则结束
             if cur_node.coor == destination.coor:
@@ -128,13 +467,591 @@ class Astar(object):
             self.close_list.add(cur_node.coor)
             # 检查该单元的相邻单元，调整open集
             self.add_adjacent_positions(cur_node)
+            if len(open_list.heap) > peak_open:
+                peak_open = len(open_list.heap)
+            if observe is not None:
+                observe(cur_node.coor[0], cur_node.coor[1], cur_node.g_val / self.COST_SCALE, len(open_list.heap))
+        self.stats.lap('search')
+        self.record_heap(open_list.push_count, open_list.pop_count, open_list.stale_count, peak_open)
 
-        # 在结束后，若已经走到了终点，则依次寻找父单元，在地图上标记已经探寻过的路径单元
+        # 在结束后，若已经走到了终点，则依次寻找父单元，得到路径
+        self.expanded_forward = len(self.close_list)
+        path = []
+        cost = cur_node.g_val if cur_node is not None else None
         while cur_node is not None:
-            coor_x, coor_y = cur_node.get_pos()
-            if (coor_x, coor_y) != self.maze.origin_coor and (coor_x, coor_y) != self.maze.destination_coor:
-                self.maze.map[coor_y][coor_x] = MapGridType.MAP_PATH
+            path.append(cur_node.get_pos())
             cur_node = cur_node.father
+        path.reverse()
+        return self.mark_path(path, cost)
+
+    # 快速模式，见文件开头的说明
+    def search_fast(self):
+        maze = self.maze
+        dest_x, dest_y = maze.destination_coor
+        blocked, row = self.build_blocked()
+        size = len(blocked)
+        start = (maze.origin_coor[1] + 1) * row + maze.origin_coor[0] + 1
+        goal = (dest_y + 1) * row + dest_x + 1
+        # 加边框后，坐标(x, y)对应的下标为 (y + 1) * row + x + 1，因此 x + 1、y + 1 可直接由divmod得到
+        dest_x, dest_y = dest_x + 1, dest_y + 1
+        # cost统一乘以COST_SCALE后都是整数（平移为5，对角为7），h值的上限用于将(f, h, index)压缩为一个整数
+        scale = self.COST_SCALE
+        h_range = scale * (row + size // row) + 1
+        push, pop = heappush, heappop
+
+        # 预先分配的数组：g值（-1表示尚未到达）与父单元（-1表示没有）
+        g_vals = array('l', [-1]) * size
+        parents = array('l', [-1]) * size
+        deltas = self.build_deltas(row)
+        # 对角移动时需要判断墙（不含close集）
+        walls = bytes(blocked)
+        corner = self.get_heuristic_corner()
+
+        g_vals[start] = 0
+        h_val = self.get_scaled_h(abs(dest_x - maze.origin_coor[0] - 1), abs(dest_y - maze.origin_coor[1] - 1))
+        # 堆中的元素为 (f * h_range + h) * size + index，比较大小时与(f, h, index)元组的顺序一致
+        heap = [(h_val * h_range + h_val) * size + start]
+        found = False
+        observe = self.stats.observer(self.on_expand)
+        stale = 0
+        peak_open = 1
+        self.stats.lap('prepare')
+        while heap:
+            cur = pop(heap) % size
+            # 同一个单元可能多次入堆，已在close集中（被标记为不可通行）的是过期的元素
+            if blocked[cur]:
+                stale += 1
+                continue
+            if cur == goal:
+                found = True
+                break
+            # 加入close集：直接标记为不可通行
+            blocked[cur] = 1
+            self.expanded_forward += 1
+            cur_g = g_vals[cur]
+            for delta, cost, side1, side2 in deltas:
+                neighbor = cur + delta
+                if not blocked[neighbor] and not (side1 and (walls[cur + side1] or walls[cur + side2])):
+                    g_val = cur_g + cost
+                    old_g = g_vals[neighbor]
+                    if old_g < 0 or g_val < old_g:
+                        g_vals[neighbor] = g_val
+                        parents[neighbor] = cur
+                        y, x = divmod(neighbor, row)
+                        x, y = abs(dest_x - x), abs(dest_y - y)
+                        h_val = scale * (x + y)
+                        if corner:
+                            h_val -= corner * (x if x < y else y)
+                        push(heap, ((g_val + h_val) * h_range + h_val) * size + neighbor)
+            if len(heap) > peak_open:
+                peak_open = len(heap)
+            if observe is not None:
+                observe(cur % row - 1, cur // row - 1, cur_g / scale, len(heap))
+        self.stats.lap('search')
+        # 每次弹出的元素或是过期的，或被扩展，或是终点；入堆的元素或已弹出，或仍在堆中
+        pops = self.expanded_forward + stale + found
+        self.record_heap(pops + len(heap), pops, stale, peak_open)
+
+        path = []
+        if not found:
+            print(" 没有可行的路径 ")
+        else:
+            path = self.trace_parents(parents, goal, row)
+            path.reverse()
+        return self.mark_path(path, g_vals[goal] if found else None)
+
+    # 加权模式与anytime模式（ARA*，见Likhachev等, ARA*: Anytime A* with Provable Bounds on Sub-Optimality）。
+    # 数据结构与快速模式相同，另外支持每个单元的通行cost（移动cost乘以目标单元的cost）与可选的h值。
+    # 每一轮以当前权重w搜索（f = g + w * h），直到终点的g值不大于open集中最小的f值，此时路径cost不超过最短路径的w倍。
+    # 一轮之中已扩展（在close集中）的单元g值又变小时不再入堆，而是记入incons；下一轮减小w，将open集与incons合并后
+    # 按新的f值重建堆，清空close集，继续搜索。每轮结束时记录路径，以及更精确的上界：路径cost / min(open集与incons中的g + h)。
+    # 有time_budget时，得到第一条路径后每扩展256个单元检查一次时间，用完时中止本轮，返回上一轮的路径；
+    # 第一条路径总是会搜索完（地图不连通时为空），因此应以较大的初始权重使它足够快。
+    def search_weighted(self):
+        started = perf_counter()
+        deadline = None if self.time_budget is None else started + self.time_budget
+        maze = self.maze
+        blocked, row = self.build_blocked()
+        size = len(blocked)
+        walls = bytes(blocked)
+        costs = self.build_costs(row)
+        deltas = self.build_deltas(row)
+        move_costs = {delta: cost for delta, cost, _, _ in deltas}
+        get_scaled_h = self.get_scaled_h
+        scale = self.COST_SCALE
+        h_range = scale * (row + size // row) + 1
+        f_unit = h_range * size
+        push, pop = heappush, heappop
+        start = (maze.origin_coor[1] + 1) * row + maze.origin_coor[0] + 1
+        goal = (maze.destination_coor[1] + 1) * row + maze.destination_coor[0] + 1
+        goal_y, goal_x = divmod(goal, row)
+
+        g_vals = array('l', [-1]) * size
+        parents = array('l', [-1]) * size
+        # h值只与单元有关，第一次入堆时计算并保存，重建堆时不必重新计算（-1表示尚未计算）
+        h_vals = array('l', [-1]) * size
+        # 在open集中、在本轮的close集中、在incons中的标记
+        in_open = bytearray(size)
+        closed = bytearray(size)
+        in_incons = bytearray(size)
+        incons = []
+        weight = self.weight
+        start_y, start_x = divmod(start, row)
+        h_vals[start] = get_scaled_h(abs(goal_x - start_x), abs(goal_y - start_y))
+        g_vals[start] = 0
+        in_open[start] = 1
+        heap = [] if walls[start] else [(int(weight * h_vals[start]) * h_range + h_vals[start]) * size + start]
+        path = []
+        path_g = 0
+        observe = self.stats.observer(self.on_expand)
+        stale = discarded = 0
+        peak_open = 1
+        self.stats.lap('prepare')
+        while True:
+            interrupted = False
+            while heap:
+                item = heap[0]
+                cur = item % size
+                if closed[cur]:
+                    pop(heap)
+                    stale += 1
+                    continue
+                if 0 <= g_vals[goal] <= item // f_unit:
+                    break
+                if deadline is not None and path and not self.expanded_forward & 255 and perf_counter() > deadline:
+                    interrupted = True
+                    break
+                pop(heap)
+                in_open[cur] = 0
+                closed[cur] = 1
+                self.expanded_forward += 1
+                cur_g = g_vals[cur]
+                for delta, cost, side1, side2 in deltas:
+                    neighbor = cur + delta
+                    if walls[neighbor] or (side1 and (walls[cur + side1] or walls[cur + side2])):
+                        continue
+                    g_val = cur_g + (cost * costs[neighbor] if costs is not None else cost)
+                    old_g = g_vals[neighbor]
+                    if old_g < 0 or g_val < old_g:
+                        g_vals[neighbor] = g_val
+                        parents[neighbor] = cur
+                        if closed[neighbor]:
+                            if not in_incons[neighbor]:
+                                in_incons[neighbor] = 1
+                                incons.append(neighbor)
+                            continue
+                        h_val = h_vals[neighbor]
+                        if h_val < 0:
+                            y, x = divmod(neighbor, row)
+                            h_val = h_vals[neighbor] = get_scaled_h(abs(goal_x - x), abs(goal_y - y))
+                        in_open[neighbor] = 1
+                        push(heap, ((g_val + int(weight * h_val)) * h_range + h_val) * size + neighbor)
+                if len(heap) > peak_open:
+                    peak_open = len(heap)
+                if observe is not None:
+                    observe(cur % row - 1, cur // row - 1, cur_g / scale, len(heap))
+            if interrupted or g_vals[goal] < 0:
+                break
+            # 本轮的路径cost。已扩展的单元g值变小后父单元也会改变，沿父单元回溯得到的路径cost可能小于终点的g值，
+            # 因此按路径重新计算，只在比之前的路径更短时替换
+            new_g, cell = 0, goal
+            while parents[cell] >= 0:
+                new_g += move_costs[cell - parents[cell]] * (costs[cell] if costs is not None else 1)
+                cell = parents[cell]
+            if not path or new_g < path_g:
+                path = self.trace_parents(parents, goal, row)
+                path.reverse()
+                path_g = new_g
+            # open集与incons中g + h的最小值是最短路径cost的下界
+            frontier = {item % size for item in heap if in_open[item % size]}
+            frontier.update(incons)
+            lower = min([g_vals[cell] + h_vals[cell] for cell in frontier] + [path_g])
+            self.bound = min(weight, path_g / lower) if lower else 1.0
+            self.stats.solutions.append((weight, path_g / scale, self.bound, perf_counter() - started))
+            if not self.anytime or weight <= 1 or self.bound <= 1 or \
+                    (deadline is not None and perf_counter() > deadline):
+                break
+            # 减小权重，以open集与incons重建堆，开始下一轮
+            weight = max(1, weight - self.weight_step)
+            discarded += len(heap)
+            heap = [((g_vals[cell] + int(weight * h_vals[cell])) * h_range + h_vals[cell]) * size + cell
+                    for cell in frontier]
+            heapify(heap)
+            for cell in incons:
+                in_open[cell] = 1
+                in_incons[cell] = 0
+            incons = []
+            closed = bytearray(size)
+        self.stats.lap('search')
+        pops = self.expanded_forward + stale
+        self.record_heap(pops + len(heap) + discarded, pops, stale, peak_open)
+        if not path:
+            print(" 没有可行的路径 ")
+        return self.mark_path(path, path_g if path else None)
+
+    # 双向搜索：分别从起点与终点出发，各自以到对方的距离作为h值，每次扩展open集较小的一侧。
+    # 两侧的搜索相遇时记录经过相遇单元的最短路径长度best；
+    # 任一侧堆顶的f值都是经过该侧open集的路径长度的下界，当best不大于两侧堆顶f值中的较大者时，即可确定best最短。
+    def search_bidirectional(self):
+        maze = self.maze
+        blocked, row = self.build_blocked()
+        size = len(blocked)
+        scale = self.COST_SCALE
+        h_range = scale * (row + size // row) + 1
+        f_unit = h_range * size
+        push, pop = heappush, heappop
+        deltas = self.build_deltas(row)
+        walls = bytes(blocked)
+        corner = self.get_heuristic_corner()
+        start = (maze.origin_coor[1] + 1) * row + maze.origin_coor[0] + 1
+        goal = (maze.destination_coor[1] + 1) * row + maze.destination_coor[0] + 1
+
+        # 两侧各自的close标记（与墙共用）、g值、父单元、堆，以及h值所指向的目标（加边框后的坐标）
+        sides = []
+        for source, target in ((start, goal), (goal, start)):
+            g_vals = array('l', [-1]) * size
+            g_vals[source] = 0
+            target_y, target_x = divmod(target, row)
+            source_y, source_x = divmod(source, row)
+            h_val = self.get_scaled_h(abs(target_x - source_x), abs(target_y - source_y))
+            sides.append((bytearray(blocked), g_vals, array('l', [-1]) * size,
+                          [(h_val * h_range + h_val) * size + source], target_x, target_y))
+        expanded = [0, 0]
+
+        best, meet = -1, -1
+        if start == goal:
+            best, meet = 0, start
+        heap_forward, heap_backward = sides[0][3], sides[1][3]
+        observe = self.stats.observer(self.on_expand)
+        stale = 0
+        peak_open = 2
+        self.stats.lap('prepare')
+        while heap_forward and heap_backward:
+            if best >= 0 and best <= max(heap_forward[0] // f_unit, heap_backward[0] // f_unit):
+                break
+            side = 0 if len(heap_forward) <= len(heap_backward) else 1
+            closed, g_vals, parents, heap, target_x, target_y = sides[side]
+            other_g = sides[1 - side][1]
+            cur = pop(heap) % size
+            if closed[cur]:
+                stale += 1
+                continue
+            closed[cur] = 1
+            expanded[side] += 1
+            cur_g = g_vals[cur]
+            for delta, cost, side1, side2 in deltas:
+                neighbor = cur + delta
+                if not closed[neighbor] and not (side1 and (walls[cur + side1] or walls[cur + side2])):
+                    g_val = cur_g + cost
+                    old_g = g_vals[neighbor]
+                    if old_g < 0 or g_val < old_g:
+                        g_vals[neighbor] = g_val
+                        parents[neighbor] = cur
+                        y, x = divmod(neighbor, row)
+                        x, y = abs(target_x - x), abs(target_y - y)
+                        h_val = scale * (x + y)
+                        if corner:
+                            h_val -= corner * (x if x < y else y)
+                        push(heap, ((g_val + h_val) * h_range + h_val) * size + neighbor)
+                        # 另一侧已经到达过该单元，两侧在此相遇
+                        if other_g[neighbor] >= 0 and (best < 0 or g_val + other_g[neighbor] < best):
+                            best, meet = g_val + other_g[neighbor], neighbor
+            open_size = len(heap_forward) + len(heap_backward)
+            if open_size > peak_open:
+                peak_open = open_size
+            if observe is not None:
+                observe(cur % row - 1, cur // row - 1, cur_g / scale, open_size)
+        self.stats.lap('search')
+
+        self.expanded_forward, self.expanded_backward = expanded
+        pops = expanded[0] + expanded[1] + stale
+        self.record_heap(pops + len(heap_forward) + len(heap_backward), pops, stale, peak_open)
+        path = []
+        if best < 0:
+            print(" 没有可行的路径 ")
+        else:
+            # 相遇单元 -> 起点的部分反转后，接上相遇单元 -> 终点的部分
+            path = self.trace_parents(sides[0][2], meet, row)
+            path.reverse()
+            path.extend(self.trace_parents(sides[1][2], meet, row)[1:])
+        return self.mark_path(path, best if best >= 0 else None)
+
+    # 跳点搜索（Jump Point Search），八方向移动且不能穿过墙角。跳跃的规则见JumpGrid。
+    # 相邻两个跳点之间是一条直线或对角线，其cost即两者之间的octile距离，因此得到的路径cost与八方向的a*相同。
+    def search_jump_point(self):
+        maze = self.maze
+        walls, row = self.build_blocked()
+        grid = JumpGrid(bytes(walls), row)
+        size = len(walls)
+        scale = self.COST_SCALE
+        h_range = scale * (row + size // row) + 1
+        push, pop = heappush, heappop
+        start = (maze.origin_coor[1] + 1) * row + maze.origin_coor[0] + 1
+        goal = (maze.destination_coor[1] + 1) * row + maze.destination_coor[0] + 1
+        goal_y, goal_x = divmod(goal, row)
+
+        g_vals = array('l', [-1]) * size
+        parents = array('l', [-1]) * size
+        closed = bytearray(size)
+        g_vals[start] = 0
+        start_y, start_x = divmod(start, row)
+        h_val = self.get_scaled_h(abs(goal_x - start_x), abs(goal_y - start_y))
+        heap = [(h_val * h_range + h_val) * size + start]
+        found = False
+        observe = self.stats.observer(self.on_expand)
+        stale = 0
+        peak_open = 1
+        self.stats.lap('prepare')
+        while heap:
+            cur = pop(heap) % size
+            if closed[cur]:
+                stale += 1
+                continue
+            if cur == goal:
+                found = True
+                break
+            closed[cur] = 1
+            self.expanded_forward += 1
+            cur_y, cur_x = divmod(cur, row)
+            cur_g = g_vals[cur]
+            directions = self.offsets if parents[cur] < 0 else grid.prune_directions(cur, parents[cur])
+            for dx, dy in directions:
+                jump_point = grid.jump(cur, dx, dy, goal)
+                if jump_point < 0 or closed[jump_point]:
+                    continue
+                y, x = divmod(jump_point, row)
+                g_val = cur_g + self.get_scaled_h(abs(x - cur_x), abs(y - cur_y))
+                old_g = g_vals[jump_point]
+                if old_g < 0 or g_val < old_g:
+                    g_vals[jump_point] = g_val
+                    parents[jump_point] = cur
+                    h_val = self.get_scaled_h(abs(goal_x - x), abs(goal_y - y))
+                    push(heap, ((g_val + h_val) * h_range + h_val) * size + jump_point)
+            if len(heap) > peak_open:
+                peak_open = len(heap)
+            if observe is not None:
+                observe(cur_x - 1, cur_y - 1, cur_g / scale, len(heap))
+        self.stats.lap('search')
+        pops = self.expanded_forward + stale + found
+        self.record_heap(pops + len(heap), pops, stale, peak_open)
+
+        path = []
+        if not found:
+            print(" 没有可行的路径 ")
+        else:
+            # 父单元链上只有跳点，需要补全相邻跳点之间的单元
+            jump_points = self.trace_parents(parents, goal, row)
+            jump_points.reverse()
+            path.append(jump_points[0])
+            for (x, y), (next_x, next_y) in zip(jump_points, jump_points[1:]):
+                dx, dy = (next_x > x) - (next_x < x), (next_y > y) - (next_y < y)
+                while (x, y) != (next_x, next_y):
+                    x, y = x + dx, y + dy
+                    path.append((x, y))
+        return self.mark_path(path, g_vals[goal] if found else None)
+
+    # 走廊图模式，见文件开头的说明
+    def search_corridor(self):
+        get_graph = getattr(self.maze, 'get_corridor_graph', None)
+        graph = get_graph() if get_graph is not None else CorridorGraph(self.maze.map)
+        self.stats.lap('prepare')
+        path, steps, self.expanded_forward = graph.find_path(self.maze.origin_coor, self.maze.destination_coor)
+        self.stats.lap('search')
+        return self.mark_steps(path, steps)
+
+    # 树索引模式，见文件开头的说明
+    def search_tree(self):
+        get_index = getattr(self.maze, 'get_tree_index', None)
+        index = get_index() if get_index is not None else TreeIndex(CorridorGraph(self.maze.map))
+        if not index.is_tree:
+            return self.search_corridor()
+        self.stats.lap('prepare')
+        path, steps = index.find_path(self.maze.origin_coor, self.maze.destination_coor)
+        self.stats.lap('search')
+        return self.mark_steps(path, steps)
+
+    # 分层模式，见文件开头的说明
+    def search_hierarchical(self):
+        get_hierarchy = getattr(self.maze, 'get_hierarchy', None)
+        if get_hierarchy is not None:
+            hierarchy = get_hierarchy(self.cluster_size)
+        else:
+            hierarchy = ClusterGraph(self.maze.map, self.cluster_size)
+        self.stats.lap('prepare')
+        path, steps, self.expanded_forward = hierarchy.find_path(self.maze.origin_coor,
+                                                                 self.maze.destination_coor)
+        self.stats.lap('search')
+        return self.mark_steps(path, steps)
+
+    # 增量模式的搜索，见文件开头的说明
+    def search_incremental(self):
+        get_replanner = getattr(self.maze, 'get_replanner', None)
+        if get_replanner is not None:
+            replanner = get_replanner()
+        else:
+            replanner = DStarLite(self.maze.map, self.maze.destination_coor)
+        self.stats.lap('prepare')
+        path, steps, self.expanded_backward = replanner.find_path(self.maze.origin_coor)
+        self.stats.lap('search')
+        return self.mark_steps(path, steps)
+
+    # 分块世界中的搜索，见文件开头的说明
+    def search_tiled(self):
+        world = self.maze
+        start, goal = world.origin_coor, world.destination_coor
+        if world.is_blocked(*start) or world.is_blocked(*goal):
+            print(" 没有可行的路径 ")
+            return self.mark_path([])
+        is_blocked = world.is_blocked
+        goal_x, goal_y = goal
+        moves = [(dx, dy, self.get_scaled_cost(dx, dy)) for dx, dy in self.offsets]
+        get_scaled_h = self.get_scaled_h
+        push, pop = heappush, heappop
+
+        g_vals = {start: 0}
+        parents = {start: None}
+        closed = set()
+        h_val = get_scaled_h(abs(goal_x - start[0]), abs(goal_y - start[1]))
+        heap = [(h_val, h_val, start)]
+        found = False
+        observe = self.stats.observer(self.on_expand)
+        stale = 0
+        peak_open = 1
+        self.stats.lap('prepare')
+        while heap:
+            _, _, cur = pop(heap)
+            if cur in closed:
+                stale += 1
+                continue
+            if cur == goal:
+                found = True
+                break
+            closed.add(cur)
+            x, y = cur
+            cur_g = g_vals[cur]
+            for dx, dy, cost in moves:
+                neighbor = (x + dx, y + dy)
+                if neighbor in closed or is_blocked(x + dx, y + dy):
+                    continue
+                # 对角移动时不能穿过墙角
+                if dx and dy and (is_blocked(x + dx, y) or is_blocked(x, y + dy)):
+                    continue
+                g_val = cur_g + cost
+                old_g = g_vals.get(neighbor)
+                if old_g is None or g_val < old_g:
+                    g_vals[neighbor] = g_val
+                    parents[neighbor] = cur
+                    h_val = get_scaled_h(abs(goal_x - x - dx), abs(goal_y - y - dy))
+                    push(heap, (g_val + h_val, h_val, neighbor))
+            if len(heap) > peak_open:
+                peak_open = len(heap)
+            if observe is not None:
+                observe(x, y, cur_g / self.COST_SCALE, len(heap))
+        self.stats.lap('search')
+
+        self.expanded_forward = len(closed)
+        pops = self.expanded_forward + stale + found
+        self.record_heap(pops + len(heap), pops, stale, peak_open)
+        path = []
+        if not found:
+            print(" 没有可行的路径 ")
+        else:
+            cur = goal
+            while cur is not None:
+                path.append(cur)
+                cur = parents[cur]
+            path.reverse()
+        return self.mark_path(path, g_vals[goal] if found else None)
+
+    # 从index开始沿父单元回溯，返回经过的坐标（加边框后的下标转换为原始坐标）
+    @staticmethod
+    def trace_parents(parents, index, row):
+        path = []
+        while index != -1:
+            y, x = divmod(index, row)
+            path.append((x - 1, y - 1))
+            index = parents[index]
+        return path
+
+    # 快速模式中使用的整数cost：平移为COST_SCALE，对角移动为1.4 * COST_SCALE
+    @classmethod
+    def get_scaled_cost(cls, dx, dy):
+        if dx and dy:
+            return cls.COST_SCALE * 7 // 5
+        return cls.COST_SCALE
+
+    # 相邻单元的(下标偏移, 移动cost, 两个需要检查的拐角单元的下标偏移)。
+    # 对角移动时不能穿过墙角，即水平、垂直方向上相邻的两个单元都不能是墙；平移时拐角偏移为0，不做检查
+    def build_deltas(self, row):
+        deltas = []
+        for dx, dy in self.offsets:
+            corners = (dx, dy * row) if dx and dy else (0, 0)
+            deltas.append((dy * row + dx, self.get_scaled_cost(dx, dy)) + corners)
+        return deltas
+
+    # 各模式使用的h值。未指定heuristic时，四方向移动为曼哈顿距离；八方向移动为octile距离（曼哈顿距离会高估对角移动）
+    def get_heuristic(self):
+        if self.heuristic is not None:
+            return self.heuristic
+        return 'manhattan' if len(self.offsets) == 4 else 'octile'
+
+    # 快速模式中使用的h值。octile距离即 对角cost * min(dx, dy) + 平移cost * (max(dx, dy) - min(dx, dy))，
+    # 写作 平移cost * (dx + dy) - corner * min(dx, dy)，曼哈顿距离的corner为0。
+    # 欧氏距离放大后向下取整。八方向移动时放大倍数为 对角cost / sqrt(2)（而不是COST_SCALE，否则对角方向上
+    # COST_SCALE * sqrt(2) 会高于对角cost），这样它不超过octile距离，不会高估
+    def get_heuristic_corner(self):
+        if self.get_heuristic() == 'manhattan':
+            return 0
+        return 2 * self.COST_SCALE - self.get_scaled_cost(1, 1)
+
+    def get_scaled_h(self, dx, dy):
+        if self.get_heuristic() == 'euclidean':
+            scale = self.get_scaled_cost(1, 1) / sqrt(2) if len(self.offsets) == 8 else self.COST_SCALE
+            return int(scale * sqrt(dx * dx + dy * dy))
+        return self.COST_SCALE * (dx + dy) - self.get_heuristic_corner() * min(dx, dy)
+
+    # 将地图转换为四周加了一圈墙的bytearray，1为不可通行，0为可通行（见MazeGrid.Grid.padded_walls）。
+    # 返回该bytearray与加边框后每行的长度。地图缓存了转换结果时（如MazeBatch.QueryMap）直接使用其复制
+    def build_blocked(self):
+        get_padded_walls = getattr(self.maze, 'get_padded_walls', None)
+        if get_padded_walls is not None:
+            return get_padded_walls()
+        return self.maze.map.padded_walls()
+
+    # 将每个单元的通行cost转换为与build_blocked的下标一致的bytes（边框上的cost为1，不会被读到）。
+    # 地图没有通行cost时返回None
+    def build_costs(self, row):
+        if self.costs is None:
+            return None
+        length, width = self.maze.length, self.maze.width
+        padded = bytearray(b'\x01') * (row * (width + 2))
+        for y in range(width):
+            padded[(y + 1) * row + 1:(y + 1) * row + 1 + length] = self.costs[y * length:(y + 1) * length]
+        return bytes(padded)
+
+    # 记录堆的统计信息
+    def record_heap(self, pushes, pops, stale_pops, peak_open):
+        stats = self.stats
+        stats.pushes, stats.pops, stats.stale_pops, stats.peak_open = pushes, pops, stale_pops, peak_open
+
+    # 记录搜索到的路径与cost，并在地图上标记起终点之间的路径单元。
+    # cost以COST_SCALE为单位（各模式的g值），在这里统一换算为float的path_cost；没有可行的路径时为None
+    def mark_path(self, path, cost=None):
+        self.path = path
+        self.path_cost = cost / self.COST_SCALE if cost is not None else None
+        for coor_x, coor_y in path:
+            if (coor_x, coor_y) != self.maze.origin_coor and (coor_x, coor_y) != self.maze.destination_coor:
+                self.maze.set_grid(coor_x, coor_y, MapGridType.MAP_PATH)
+        self.stats.expanded = self.expanded_forward + self.expanded_backward
+        self.stats.lap('path')
+        return path
+
+    # 走廊图、树索引、簇抽象与增量规划器得到的是路径的步数（每步cost为1），换算后记录
+    def mark_steps(self, path, steps):
+        if steps is None:
+            print(" 没有可行的路径 ")
+            return self.mark_path(path)
+        return self.mark_path(path, steps * self.COST_SCALE)
 
     def add_adjacent_positions(self, cur_node):
         # 找到当前单元的所有合法相邻单元（的坐标）
@@ -149,41 +1066,45 @@ class Astar(object):
                 # 若相邻单元不在open集中，则将其加入open集
                 if neighbor_node is None:
                     node = Node(neighbor, g_val, father=cur_node)
-                    node.h_val = node.get_h_val(self.maze.destination_coor)
+                    dest_x, dest_y = self.maze.destination_coor
+                    node.h_val = self.weight * self.get_scaled_h(abs(dest_x - neighbor[0]), abs(dest_y - neighbor[1]))
                     node.reset_f_val()
                     self.open_list.push(node)
                 # 若在open集中，且该相邻单元的原本的g值大于基于cur_node而来的g值，则更新该单元的g值为当前的g，并更新该单元的父单元
                 elif neighbor_node.g_val > g_val:
                     neighbor_node.reset_g_val(g_val)
                     neighbor_node.reset_father(cur_node)
+                    self.open_list.decrease_key(neighbor_node)
 
     # 判断相邻单元的坐标是否可移动。即：位于地图边界内，且不是墙单元
     def get_legal_neighbor(self, cur_coor, offset):
         new_x, new_y = (cur_coor[0] + offset[0], cur_coor[1] + offset[1])
         if new_x < 0 or new_x >= self.maze.length or \
                 new_y < 0 or new_y >= self.maze.width or \
-                self.maze.map[new_y][new_x] == MapGridType.MAP_BLOCK:
+                self.maze.map.get(new_x, new_y) == MapGridType.MAP_BLOCK:
             return None
         return new_x, new_y
 
     # 定位当前单元的合法相邻单元的坐标
     def get_neighbors(self, cur_coor):
-        # 定义“相邻”为周围的四个方向或八个方向
-        offsets = [(-1, 0), (0, -1), (1, 0), (0, 1)]
-        # offsets = [(-1,0), (0, -1), (1, 0), (0, 1), (-1,-1), (1, -1), (-1, 1), (1, 1)]
         neighbors = []
-        for offset in offsets:
+        for offset in self.offsets:
             neighbor = self.get_legal_neighbor(cur_coor, offset)
+            # 对角移动时不能穿过墙角
+            if neighbor is not None and offset[0] and offset[1] and \
+                    (self.get_legal_neighbor(cur_coor, (offset[0], 0)) is None or
+                     self.get_legal_neighbor(cur_coor, (0, offset[1])) is None):
+                continue
             if neighbor is not None:
                 neighbors.append(neighbor)
         return neighbors
 
-    # 计算移动cost。目的是区分平移还是对角移动
-    @staticmethod
-    def get_move_cost(cur_node, target_coor):
-        if cur_node.coor[0] != target_coor[0] and cur_node.coor[1] != target_coor[1]:
-            return 1.4
-        return 1
+    # 计算移动cost（放大COST_SCALE倍，见get_scaled_cost），再乘以目标单元的通行cost
+    def get_move_cost(self, cur_node, target_coor):
+        cost = self.get_scaled_cost(cur_node.coor[0] - target_coor[0], cur_node.coor[1] - target_coor[1])
+        if self.costs is not None:
+            cost *= self.costs[target_coor[1] * self.maze.length + target_coor[0]]
+        return cost
 
 
 if __name__ == '__main__':
@@ -1,14 +1,15 @@
 class MapGridType:
-    MAP_ORIGIN = 'O'
-    MAP_DESTINATION = 'D'
+    """ 地图单元的类型。地图以每个单元一个字节的形式存储，取值即为下面的编码 """
     MAP_EMPTY = 0
     MAP_BLOCK = 1
     MAP_PATH = 2
     MAP_PLAYER = 3
+    MAP_ORIGIN = 4
+    MAP_DESTINATION = 5
 
 
 class WallDirection:
     WALL_LEFT = 0,
     WALL_UP = 1,
     WALL_RIGHT = 2,
-    WALL_DOWN = 3
\ No newline at end of file
+    WALL_DOWN = 3
@@ -0,0 +1,58 @@
+"""
+批量寻路的回归测试（python -m pytest）：find_paths在当前进程与多个工作进程中得到的结果都与逐个搜索相同，并按输入顺序返回
+"""
+import random
+
+import pytest
+
+from config import MapGridType
+from MazeBatch import find_paths
+from MazeGenerator import Maze
+from SearchRoute import Astar
+
+SIZE = 41
+QUERIES = 40
+
+
+def random_pairs(maze, seed):
+    rand = random.Random(seed)
+    cells = [(x, y) for y in range(maze.width) for x in range(maze.length)
+             if maze.map.get(x, y) != MapGridType.MAP_BLOCK]
+    return [(rand.choice(cells), rand.choice(cells)) for _ in range(QUERIES)]
+
+
+# 逐个用快速模式搜索，得到(路径, 路径cost)。路径会标记在地图上，因此每次都重新生成迷宫
+def single_searches(generator, seed, pairs):
+    results = []
+    for origin, destination in pairs:
+        maze = Maze(SIZE, SIZE, generator, seed=seed)
+        maze.generator.generate()
+        maze.origin_coor, maze.destination_coor = origin, destination
+        astar = Astar(maze, fast=True)
+        astar.search()
+        results.append((astar.path, astar.path_cost))
+    return results
+
+
+@pytest.mark.parametrize('workers', (1, 2))
+@pytest.mark.parametrize('generator', ('kruskal', 'cross'))
+def test_find_paths_matches_single_searches(generator, workers):
+    maze = Maze(SIZE, SIZE, generator, seed=3)
+    maze.generator.generate()
+    walls = bytes(maze.map.buf)
+    pairs = random_pairs(maze, 3)
+    assert list(maze.find_paths(pairs, workers=workers)) == single_searches(generator, 3, pairs)
+    # 批量查询不在地图上标记路径
+    assert bytes(maze.map.buf) == walls
+
+
+@pytest.mark.parametrize('workers', (1, 2))
+def test_module_find_paths(workers):
+    maze = Maze(SIZE, SIZE, 'kruskal', seed=5)
+    maze.generator.generate()
+    pairs = random_pairs(maze, 5)
+    expected = single_searches('kruskal', 5, pairs)
+    assert list(find_paths(maze.map, pairs, workers=workers, chunk_size=3)) == expected
+    # 树索引模式得到的cost与快速模式相同
+    costs = [cost for _, cost in find_paths(maze.map, pairs, workers=workers, tree=True)]
+    assert costs == [cost for _, cost in expected]
@@ -0,0 +1,92 @@
+"""
+命令行工具（MazeCli）的回归测试（python -m pytest）：各子命令的输出，以及起终点、下标等参数错误时给出的提示
+"""
+import json
+
+import pytest
+
+from MazeCli import main
+from MazeGenerator import Maze
+
+
+@pytest.fixture
+def maze_file(tmp_path):
+    path = str(tmp_path / 'mazes.bin')
+    assert main(['batch', '3', '--size', '21x15', '--generator', 'kruskal', '--seed', '4', '--output', path]) == 0
+    return path
+
+
+def test_generate_prints_maze(capsys):
+    assert main(['generate', '--size', '21', '--generator', 'kruskal', '--seed', '3']) == 0
+    maze = Maze(21, 21, 'kruskal', seed=3)
+    maze.generator.generate()
+    assert capsys.readouterr().out == maze.to_text() + '\n'
+
+
+def test_info(maze_file, capsys):
+    capsys.readouterr()
+    assert main(['info', maze_file]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 4
+    assert lines[1].split()[:3] == ['0', 'kruskal', '21x15']
+
+
+def test_solve(maze_file, capsys):
+    capsys.readouterr()
+    assert main(['solve', maze_file, '--index', '2', '--mode', 'tree', '--stats']) == 0
+    out = capsys.readouterr().out
+    cost = float(out.split()[1])
+    assert cost > 0
+    assert json.loads(out[out.index('{'):])['expanded'] >= 0
+    # 各模式得到的cost相同
+    for mode in ('nodes', 'fast', 'corridor', 'incremental'):
+        assert main(['solve', maze_file, '--index', '2', '--mode', mode]) == 0
+        assert float(capsys.readouterr().out.split()[1]) == cost
+
+
+def test_solve_new_maze_with_ends(capsys):
+    assert main(['solve', '--size', '21', '--seed', '1', '--origin', '1,1', '--destination', '19,19', '--show']) == 0
+    assert 'cost ' in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('option, coor, message', (
+    ('--origin', '100,100', 'origin 100,100 is outside the 21x21 maze'),
+    ('--destination', '-1,3', 'destination -1,3 is outside the 21x21 maze'),
+    ('--origin', '0,0', 'origin 0,0 is a wall'),
+))
+def test_solve_bad_ends(option, coor, message):
+    with pytest.raises(SystemExit) as error:
+        main(['solve', '--size', '21', '--seed', '1', option + '=' + coor])
+    assert message in str(error.value)
+
+
+def test_solve_bad_index(maze_file):
+    with pytest.raises(SystemExit) as error:
+        main(['solve', maze_file, '--index', '3'])
+    assert 'no maze at index 3' in str(error.value)
+
+
+def test_export(maze_file, tmp_path, capsys):
+    maze = Maze.load(maze_file, 0)
+    capsys.readouterr()
+    assert main(['export', maze_file]) == 0
+    assert capsys.readouterr().out == maze.to_text() + '\n'
+
+    pgm = str(tmp_path / 'maze.pgm')
+    assert main(['export', maze_file, '--format', 'pgm', '--output', pgm]) == 0
+    with open(pgm, 'rb') as file:
+        data = file.read()
+    assert data.startswith(b'P5\n21 15\n255\n') and len(data) == len(b'P5\n21 15\n255\n') + 21 * 15
+
+    for export_format in ('raw', 'bits'):
+        path = str(tmp_path / ('maze.' + export_format))
+        assert main(['export', maze_file, '--format', export_format, '--output', path]) == 0
+        assert bytes(Maze.load(path).map.buf) == bytes(maze.map.buf)
+    with pytest.raises(SystemExit):
+        main(['export', maze_file, '--format', 'raw'])
+
+
+def test_missing_file():
+    with pytest.raises(SystemExit) as error:
+        main(['info', 'no-such-file.bin'])
+    assert str(error.value).startswith('info: ')
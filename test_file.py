@@ -0,0 +1,137 @@
+"""
+迷宫文件（MazeFile）的回归测试（python -m pytest）：原始编码与一位编码的保存/读取、mmap映射、多条记录的文件，
+以及截断或头部损坏的文件（应当抛出ValueError）
+"""
+import pytest
+
+import MazeFile
+from config import MapGridType
+from MazeGenerator import Maze, generate_many, load_mazes, maze_seed
+from SearchRoute import Astar
+
+GENERATORS = ('backtrack', 'mybacktrack', 'kruskal', 'eller')
+SEEDS = (7, 'seven', None)
+
+
+def new_maze(generator, seed, length=31, width=21):
+    maze = Maze(length, width, generator, random_origin=True, random_destination=True, seed=seed)
+    maze.generator.generate()
+    return maze
+
+
+def assert_same_maze(loaded, maze, walls=None):
+    assert bytes(loaded.map.buf) == (walls if walls is not None else bytes(maze.map.buf))
+    assert (loaded.length, loaded.width) == (maze.length, maze.width)
+    assert loaded.origin == maze.origin and loaded.destination == maze.destination
+    assert loaded.origin_coor == maze.origin_coor and loaded.destination_coor == maze.destination_coor
+    assert loaded.seed == maze.seed
+    assert loaded.generator_name == maze.generator_name
+
+
+@pytest.mark.parametrize('use_mmap', (True, False))
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('generator', GENERATORS)
+def test_raw_round_trip(generator, seed, use_mmap, tmp_path):
+    maze = new_maze(generator, seed)
+    path = str(tmp_path / 'maze.bin')
+    maze.save(path)
+    assert_same_maze(Maze.load(path, use_mmap=use_mmap), maze)
+
+
+# 一位编码不保存路径标记
+@pytest.mark.parametrize('use_mmap', (True, False))
+@pytest.mark.parametrize('generator', GENERATORS)
+def test_packed_round_trip(generator, use_mmap, tmp_path):
+    maze = new_maze(generator, 3)
+    walls = bytes(maze.map.buf)
+    Astar(maze, fast=True).search()
+    assert MapGridType.MAP_PATH in maze.map.buf
+    path = str(tmp_path / 'maze.bin')
+    maze.save(path, packed=True)
+    assert_same_maze(Maze.load(path, use_mmap=use_mmap), maze, walls)
+
+
+# mmap以写时复制的方式映射文件：修改读取的地图不会写回文件
+def test_mmap_copy_on_write(tmp_path):
+    maze = new_maze('kruskal', 5)
+    path = str(tmp_path / 'maze.bin')
+    maze.save(path)
+    with open(path, 'rb') as file:
+        data = file.read()
+    loaded = Maze.load(path)
+    assert isinstance(loaded.map, MazeFile.MappedGrid)
+    loaded.set_grid(1, 1, MapGridType.MAP_BLOCK)
+    assert loaded.map.get(1, 1) == MapGridType.MAP_BLOCK
+    with open(path, 'rb') as file:
+        assert file.read() == data
+    # 映射的地图也可以直接搜索
+    assert Astar(Maze.load(path), fast=True).search()
+
+
+@pytest.mark.parametrize('use_mmap', (True, False))
+@pytest.mark.parametrize('packed', (False, True))
+def test_multiple_records(packed, use_mmap, tmp_path):
+    path = str(tmp_path / 'mazes.bin')
+    assert generate_many(6, (25, 15), 'kruskal', path=path, seed=11, packed=packed) == 6
+    mazes = list(load_mazes(path, use_mmap))
+    assert len(mazes) == 6
+    with open(path, 'rb') as file:
+        data = file.read()
+    offset = 0
+    for index, loaded in enumerate(mazes):
+        expected = Maze(25, 15, 'kruskal', seed=maze_seed(11, index))
+        expected.generator.generate()
+        assert_same_maze(loaded, expected)
+        # 以记录的起始位置单独读取
+        assert_same_maze(Maze.load(path, offset, use_mmap), expected)
+        offset = MazeFile.read_header(data, offset)['end']
+    assert offset == len(data)
+
+
+# 修改记录头部中的一个字段（字段的顺序见MazeFile.HEADER）
+def patch_header(record, field, value):
+    fields = list(MazeFile.HEADER.unpack_from(record))
+    fields[field] = value
+    return MazeFile.HEADER.pack(*fields) + record[MazeFile.HEADER.size:]
+
+
+def bad_records():
+    maze = new_maze('kruskal', 1)
+    record = maze.to_bytes()
+    return {
+        'empty': b'',
+        'short header': record[:10],
+        'short grid': record[:-3],
+        'magic': patch_header(record, 0, b'ZAME'),
+        'version': patch_header(record, 1, MazeFile.VERSION + 1),
+        'encoding': patch_header(record, 2, 9),
+        'generator': patch_header(record, 3, b'nope'),
+        'generator name': patch_header(record, 3, b'\xff\xfe'),
+        'size': patch_header(record, 4, 0),
+        'origin': patch_header(record, 6, 100),
+        'destination': patch_header(record, 9, -5),
+        'seed type': patch_header(record, 10, 9),
+        # 种子为整数1，只占一个字节
+        'seed': record[:MazeFile.HEADER.size] + b'x' + record[MazeFile.HEADER.size + 1:],
+    }
+
+
+@pytest.mark.parametrize('use_mmap', (True, False))
+@pytest.mark.parametrize('name', sorted(bad_records()))
+def test_bad_record(name, use_mmap, tmp_path):
+    path = str(tmp_path / 'bad.bin')
+    with open(path, 'wb') as file:
+        file.write(bad_records()[name])
+    with pytest.raises(ValueError):
+        Maze.load(path, use_mmap=use_mmap)
+    if name != 'empty':
+        with pytest.raises(ValueError):
+            list(load_mazes(path, use_mmap))
+
+
+# 空文件中没有迷宫
+@pytest.mark.parametrize('use_mmap', (True, False))
+def test_empty_file(use_mmap, tmp_path):
+    path = str(tmp_path / 'empty.bin')
+    open(path, 'wb').close()
+    assert list(load_mazes(path, use_mmap)) == []
@@ -0,0 +1,127 @@
+"""
+生成器的回归测试（python -m pytest）：每个生成器在各种尺寸（含细长的矩形地图）下生成的迷宫都是连通的，
+同一个种子总是得到相同的迷宫；逐行写入文件的Eller迷宫与在内存中生成的相同
+"""
+import sys
+
+import pytest
+
+from config import MapGridType
+from MazeGenerator import Maze, GENERATORS, stream_eller
+from MazeGrid import load_numpy
+
+SHAPES = ((5, 5), (7, 31), (31, 7), (3, 41), (41, 3), (20, 30), (61, 61), (201, 11))
+SEEDS = (1, 2, 3)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('generator', sorted(GENERATORS))
+def test_connected(generator, seed):
+    for length, width in SHAPES:
+        maze = Maze(length, width, generator, random_origin=True, random_destination=True, seed=seed)
+        maze.generator.generate()
+        assert maze.is_connected(), '%s generated a disconnected %dx%d maze' % (generator, length, width)
+
+
+@pytest.mark.parametrize('generator', sorted(GENERATORS))
+def test_same_seed_same_maze(generator):
+    mazes = [Maze(41, 31, generator, seed=7) for _ in range(2)]
+    for maze in mazes:
+        maze.generator.generate()
+    assert bytes(mazes[0].map.buf) == bytes(mazes[1].map.buf)
+
+
+# 同一个种子得到的迷宫与是否安装了numpy无关（文件中保存的种子依赖于这一点）
+@pytest.mark.parametrize('generator', sorted(GENERATORS))
+def test_same_seed_without_numpy(generator, monkeypatch):
+    maze = Maze(41, 31, generator, seed=7)
+    maze.generator.generate()
+    # sys.modules中为None的模块导入时抛出ImportError；load_numpy缓存了导入的结果，需要清除
+    monkeypatch.setitem(sys.modules, 'numpy', None)
+    load_numpy.cache_clear()
+    try:
+        assert load_numpy() is None
+        masked = Maze(41, 31, generator, seed=7)
+        masked.generator.generate()
+    finally:
+        load_numpy.cache_clear()
+    assert bytes(masked.map.buf) == bytes(maze.map.buf)
+
+
+def test_unknown_generator():
+    with pytest.raises(ValueError):
+        Maze(11, 11, 'prim')
+
+
+# 命令行工具为了启动快不导入MazeGenerator，生成器名单独列出，须与GENERATORS一致
+def test_cli_generators():
+    import MazeCli
+    assert sorted(MazeCli.GENERATORS) == sorted(GENERATORS)
+
+
+# 完美迷宫：连通且没有环，即相邻的通路单元对（边）数比通路单元数少1
+def is_perfect(maze):
+    buf, length = maze.map.buf, maze.length
+    cells = edges = 0
+    for index in range(length * maze.width):
+        if buf[index] == MapGridType.MAP_BLOCK:
+            continue
+        cells += 1
+        if (index + 1) % length and buf[index + 1] != MapGridType.MAP_BLOCK:
+            edges += 1
+        if index + length < len(buf) and buf[index + length] != MapGridType.MAP_BLOCK:
+            edges += 1
+    return maze.is_connected() and edges == cells - 1
+
+
+# 逐行写入文件的Eller迷宫与在内存中生成的相同，且是完美迷宫
+@pytest.mark.parametrize('seed', (1, 2, 'three'))
+@pytest.mark.parametrize('length, width', ((5, 5), (41, 31), (30, 20), (3, 61), (61, 3)))
+def test_stream_eller(length, width, seed, tmp_path):
+    path = str(tmp_path / 'eller.bin')
+    stream_eller(path, length, width, seed)
+    streamed = Maze.load(path)
+    maze = Maze(length, width, 'eller', seed=seed)
+    maze.generator.generate()
+    assert bytes(streamed.map.buf) == bytes(maze.map.buf)
+    assert (streamed.length, streamed.width) == (maze.length, maze.width)
+    assert streamed.origin_coor == maze.origin_coor and streamed.destination_coor == maze.destination_coor
+    assert streamed.seed == seed and streamed.generator_name == 'eller'
+    assert is_perfect(streamed)
+
+
+# 生成器的统计信息：on_step在主循环的每一步调用一次，按sample_every采样frontier的大小
+@pytest.mark.parametrize('generator', sorted(GENERATORS))
+def test_generator_stats(generator):
+    maze = Maze(41, 31, generator, seed=1)
+    calls = []
+    maze.generator.on_step = lambda x, y, frontier: calls.append((x, y))
+    maze.generator.sample_every = 3
+    maze.generator.generate()
+    stats = maze.generator.stats
+    assert stats.steps > 0 and len(calls) == stats.steps
+    assert len(stats.frontier) == stats.steps // 3
+    assert max(size for _, size in stats.frontier) <= stats.peak_frontier
+    assert set(stats.phases) == {'reset', 'carve'}
+
+
+# 每个打通的单元都计入统计：回溯生成器每一步压入（打通）或弹出一个路径单元，并查集生成器每一步打通一面墙或移除一个单元，
+# 因此步数都等于通路单元数；Kruskal每一步检查一面墙，打通的墙都在检查过的墙中
+@pytest.mark.parametrize('generator', ('backtrack', 'ufs', 'kruskal'))
+def test_generator_stats_count_carved_cells(generator):
+    maze = Maze(41, 31, generator, seed=2)
+    calls = []
+    maze.generator.on_step = lambda x, y, frontier: calls.append((x, y))
+    maze.generator.generate()
+    steps = maze.generator.stats.steps
+    path_cells = maze.scaled_length * maze.scaled_width
+    open_cells = {(x, y) for y in range(maze.width) for x in range(maze.length)
+                  if maze.map.get(x, y) != MapGridType.MAP_BLOCK}
+    # 完美迷宫：路径单元之间打通了 path_cells - 1 面墙
+    assert len(open_cells) == 2 * path_cells - 1
+    carved_walls = {(x, y) for x, y in open_cells if x % 2 == 0 or y % 2 == 0}
+    if generator == 'kruskal':
+        assert carved_walls <= set(calls) and steps >= len(carved_walls)
+    else:
+        assert steps == len(open_cells)
+        assert {(x, y) for x, y in open_cells if (x, y) not in carved_walls} == set(calls)
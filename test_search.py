@@ -0,0 +1,422 @@
+"""
+寻路的回归测试（python -m pytest）：在随机障碍的TestMap与生成的迷宫上，各模式得到的路径cost与快速模式相同；
+墙变化后，各种缓存的索引（增量规划器、簇抽象等）仍与重新搜索的结果一致
+"""
+import random
+
+import pytest
+
+from config import MapGridType
+from MazeBatch import QueryMap
+from MazeField import DistanceField
+from MazeGenerator import Maze
+from MazeHierarchy import ClusterGraph
+# 不直接导入TestMap，否则pytest会把它当作测试类收集
+import SearchRoute
+from SearchRoute import Astar, HEURISTICS
+
+SEEDS = (1, 2, 3, 4, 5)
+MAPS_PER_SEED = 20
+
+
+# 以seed生成若干张随机障碍的TestMap（尺寸与障碍密度各不相同）
+def random_maps(seed):
+    random.seed(seed)
+    for _ in range(MAPS_PER_SEED):
+        test_map = SearchRoute.TestMap(random.randint(5, 30), random.randint(5, 30))
+        test_map.create_block(int(test_map.length * test_map.width * random.uniform(0.1, 0.35)))
+        yield test_map
+
+
+def search(test_map, **options):
+    astar = Astar(test_map, **options)
+    astar.search()
+    return astar.path_cost
+
+
+def new_maze(generator, seed, size=31):
+    maze = Maze(size, size, generator, seed=seed)
+    maze.generator.generate()
+    return maze
+
+
+# 以快速模式重新搜索origin到destination，返回路径cost（不在地图上标记路径）
+def fast_cost(maze, origin, destination, diagonal=False):
+    return QueryMap(maze.map).find_path(origin, destination, {'fast': True, 'diagonal': diagonal})[1]
+
+
+# 路径从origin走到destination，每一步都移动到相邻的非墙单元
+def assert_valid_path(maze, path, origin, destination):
+    assert path[0] == tuple(origin) and path[-1] == tuple(destination)
+    for (x, y), (next_x, next_y) in zip(path, path[1:]):
+        assert abs(next_x - x) + abs(next_y - y) == 1
+        assert maze.map.get(next_x, next_y) != MapGridType.MAP_BLOCK
+
+
+# 单元(x, y)四周不是墙的相邻单元
+def open_neighbors(maze, x, y):
+    return [(x + dx, y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+            if maze.is_valid(x + dx, y + dy) and maze.map.get(x + dx, y + dy) != MapGridType.MAP_BLOCK]
+
+
+def random_open_pairs(maze, rand, count):
+    cells = [(x, y) for y in range(maze.width) for x in range(maze.length)
+             if maze.map.get(x, y) != MapGridType.MAP_BLOCK]
+    return [(rand.choice(cells), rand.choice(cells)) for _ in range(count)]
+
+
+# 起点、终点与玩家以外的一个随机单元，其类型不在excluded中
+def random_cell(maze, rand, *excluded):
+    while True:
+        x, y = rand.randrange(maze.length), rand.randrange(maze.width)
+        if (x, y) not in (maze.origin_coor, maze.destination_coor, maze.player_loc) and \
+                maze.map.get(x, y) not in excluded:
+            return x, y
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('diagonal', (False, True))
+def test_nodes_match_fast(seed, diagonal):
+    for test_map in random_maps(seed):
+        cost = search(test_map, diagonal=diagonal, fast=True)
+        for open_list in ('lazy', 'indexed'):
+            assert search(test_map, diagonal=diagonal, open_list=open_list) == cost
+
+
+# 欧氏距离不能高于octile距离（八方向）或曼哈顿距离（四方向），否则会高估
+@pytest.mark.parametrize('diagonal', (False, True))
+def test_euclidean_admissible(diagonal):
+    test_map = SearchRoute.TestMap(5, 5)
+    euclidean = Astar(test_map, diagonal=diagonal, heuristic='euclidean')
+    default = Astar(test_map, diagonal=diagonal)
+    for dx in range(50):
+        for dy in range(50):
+            assert euclidean.get_scaled_h(dx, dy) <= default.get_scaled_h(dx, dy), (dx, dy)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('heuristic', HEURISTICS)
+def test_heuristics_on_diagonal_maps(seed, heuristic):
+    for test_map in random_maps(seed):
+        cost = search(test_map, diagonal=True, fast=True)
+        if heuristic == 'manhattan':
+            # 曼哈顿距离在八方向地图上会高估，只检查不比最短路径更短
+            assert cost is None or search(test_map, diagonal=True, heuristic=heuristic) >= cost
+            continue
+        assert search(test_map, diagonal=True, heuristic=heuristic) == cost
+        assert search(test_map, diagonal=True, heuristic=heuristic, fast=True) == cost
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('diagonal', (False, True))
+def test_anytime_bound(seed, diagonal):
+    for test_map in random_maps(seed):
+        cost = search(test_map, diagonal=diagonal, fast=True)
+        astar = Astar(test_map, diagonal=diagonal, heuristic='euclidean', weight=3, anytime=True)
+        astar.search()
+        if cost is None:
+            assert astar.path_cost is None
+            continue
+        assert cost <= astar.path_cost <= cost * astar.bound + 1e-9
+
+
+# 双向搜索：两侧相遇后的停止条件最容易出错，在各种障碍密度、四方向与八方向移动下与快速模式比较
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('diagonal', (False, True))
+def test_bidirectional_matches_fast(seed, diagonal):
+    for test_map in random_maps(seed):
+        cost = search(test_map, diagonal=diagonal, fast=True)
+        astar = Astar(test_map, diagonal=diagonal, bidirectional=True)
+        astar.search()
+        assert astar.path_cost == cost
+        if cost is not None:
+            assert astar.path[0] == test_map.origin_coor and astar.path[-1] == test_map.destination_coor
+    # 迷宫中只有唯一的路径，两侧的搜索在走廊中相遇
+    for generator in ('kruskal', 'cross'):
+        maze = new_maze(generator, seed, 41)
+        cost = fast_cost(maze, maze.origin_coor, maze.destination_coor, diagonal)
+        assert search(maze, diagonal=diagonal, bidirectional=True) == cost
+
+
+# 跳点搜索：八方向地图上在不同的障碍密度下与快速模式比较
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('density', (0.0, 0.1, 0.2, 0.3, 0.4))
+def test_jump_point_matches_fast(seed, density):
+    random.seed(seed)
+    for _ in range(MAPS_PER_SEED):
+        test_map = SearchRoute.TestMap(random.randint(5, 40), random.randint(5, 40))
+        test_map.create_block(int(test_map.length * test_map.width * density))
+        test_map.origin_coor = test_map.generate_pos((0, test_map.length - 1), (0, test_map.width - 1))
+        test_map.destination_coor = test_map.generate_pos((0, test_map.length - 1), (0, test_map.width - 1))
+        cost = search(test_map, diagonal=True, fast=True)
+        astar = Astar(test_map, jump_point=True)
+        astar.search()
+        assert astar.path_cost == cost
+        if cost is not None:
+            # 补全后的路径每一步都是相邻的单元
+            assert all(max(abs(x2 - x1), abs(y2 - y1)) == 1 for (x1, y1), (x2, y2) in zip(astar.path, astar.path[1:]))
+
+
+@pytest.mark.parametrize('diagonal', (False, True))
+def test_path_cost_is_float(diagonal):
+    for test_map in random_maps(1):
+        for options in ({}, {'fast': True}, {'bidirectional': True}, {'weight': 2}, {'anytime': True}):
+            cost = search(test_map, diagonal=diagonal, **options)
+            assert cost is None or type(cost) is float
+
+
+# 增量规划器（D* Lite）：玩家移动或墙变化后，Maze.replan得到的cost与重新搜索的相同
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('generator', ('kruskal', 'cross'))
+def test_replan_after_changes(generator, seed):
+    maze = new_maze(generator, seed)
+    rand = random.Random(seed)
+    blocked = None
+    path, cost = maze.replan()
+    for step in range(120):
+        if step % 4 == 0:
+            # 玩家沿规划的路径走一步，没有路径时随机走一步
+            if len(path) > 1:
+                maze.player_loc = path[1]
+            else:
+                maze.player_move(rand.choice(('up', 'down', 'left', 'right')))
+        elif step % 4 == 1:
+            # 在一个随机的通路单元上加墙（可能切断玩家到终点的路径），下一步再拆掉
+            blocked = random_cell(maze, rand, MapGridType.MAP_BLOCK)
+            maze.set_grid(blocked[0], blocked[1], MapGridType.MAP_BLOCK)
+        elif step % 4 == 2:
+            maze.set_grid(blocked[0], blocked[1], MapGridType.MAP_EMPTY)
+        else:
+            # 拆掉一面原有的墙（形成环）
+            x, y = random_cell(maze, rand, MapGridType.MAP_EMPTY, MapGridType.MAP_PATH)
+            maze.set_grid(x, y, MapGridType.MAP_EMPTY)
+        path, cost = maze.replan()
+        assert cost == fast_cost(maze, maze.player_loc, maze.destination_coor)
+        if cost is not None:
+            assert_valid_path(maze, path, maze.player_loc, maze.destination_coor)
+
+
+# 玩家四周都变成墙后没有可行的路径，拆掉这些墙后又能重新规划
+def test_replan_cut_off():
+    maze = new_maze('kruskal', 1)
+    first_cost = maze.replan()[1]
+    assert first_cost == fast_cost(maze, maze.player_loc, maze.destination_coor)
+    neighbors = open_neighbors(maze, *maze.player_loc)
+    for cell in neighbors:
+        maze.set_grid(cell[0], cell[1], MapGridType.MAP_BLOCK)
+    path, cost = maze.replan()
+    assert path == [] and cost is None
+    assert fast_cost(maze, maze.player_loc, maze.destination_coor) is None
+    for cell in neighbors:
+        maze.set_grid(cell[0], cell[1], MapGridType.MAP_EMPTY)
+    path, cost = maze.replan()
+    assert cost == first_cost
+    assert_valid_path(maze, path, maze.player_loc, maze.destination_coor)
+
+
+# 分层模式：完美迷宫中堵上死路（仍是完美迷宫）后，增量更新的簇抽象得到的cost与快速模式相同
+@pytest.mark.parametrize('seed', SEEDS)
+def test_hierarchy_update_perfect_maze(seed):
+    maze = new_maze('kruskal', seed, 61)
+    hierarchy = maze.get_hierarchy(8)
+    rand = random.Random(seed)
+    ends = (maze.origin_coor, maze.destination_coor)
+    for _ in range(6):
+        for origin, destination in random_open_pairs(maze, rand, 10):
+            path, cost, _ = hierarchy.find_path(origin, destination)
+            assert cost == fast_cost(maze, origin, destination)
+            assert_valid_path(maze, path, origin, destination)
+        dead_ends = [(x, y) for y in range(maze.width) for x in range(maze.length)
+                     if maze.map.get(x, y) != MapGridType.MAP_BLOCK and (x, y) not in ends and
+                     len(open_neighbors(maze, x, y)) == 1]
+        for x, y in rand.sample(dead_ends, 10):
+            maze.set_grid(x, y, MapGridType.MAP_BLOCK)
+        assert maze.get_hierarchy(8) is hierarchy and hierarchy.dirty_clusters
+        assert maze.is_connected()
+
+
+# 分层模式：墙任意变化（形成环或切断通路）后，增量更新的簇抽象与重新建立的结果相同，路径连通且不短于最短路径
+@pytest.mark.parametrize('seed', SEEDS)
+def test_hierarchy_update(seed):
+    maze = new_maze('kruskal', seed, 61)
+    hierarchy = maze.get_hierarchy(8)
+    rand = random.Random(seed)
+    for _ in range(6):
+        for _ in range(8):
+            x, y = random_cell(maze, rand, MapGridType.MAP_EMPTY, MapGridType.MAP_PATH)
+            maze.set_grid(x, y, MapGridType.MAP_EMPTY)
+        x, y = random_cell(maze, rand, MapGridType.MAP_BLOCK)
+        maze.set_grid(x, y, MapGridType.MAP_BLOCK)
+        rebuilt = ClusterGraph(maze.map, 8)
+        for origin, destination in random_open_pairs(maze, rand, 10):
+            path, cost, _ = hierarchy.find_path(origin, destination)
+            shortest = fast_cost(maze, origin, destination)
+            assert (cost is None) == (shortest is None)
+            assert cost == rebuilt.find_path(origin, destination)[1]
+            if cost is not None:
+                assert cost >= shortest
+                assert_valid_path(maze, path, origin, destination)
+
+
+# 走廊图与树索引：完美迷宫中得到的cost与快速模式相同（mybacktrack逐个单元挖通，得到的迷宫可能有环，不在此列）
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('generator', ('backtrack', 'ufs', 'kruskal', 'eller'))
+def test_corridor_and_tree_match_fast(generator, seed):
+    maze = new_maze(generator, seed, 41)
+    graph, index = maze.get_corridor_graph(), maze.get_tree_index()
+    assert index.is_tree
+    for origin, destination in random_open_pairs(maze, random.Random(seed), 30):
+        cost = fast_cost(maze, origin, destination)
+        path, steps, _ = graph.find_path(origin, destination)
+        assert steps == cost
+        assert_valid_path(maze, path, origin, destination)
+        path, steps = index.find_path(origin, destination)
+        assert steps == cost
+        assert_valid_path(maze, path, origin, destination)
+    cost = fast_cost(maze, maze.origin_coor, maze.destination_coor)
+    assert search(maze, corridor=True) == search(maze, tree=True) == cost
+
+
+# 墙变化后缓存的走廊图与树索引重新建立；出现环后树索引模式退回走廊图模式
+def test_corridor_and_tree_rebuilt_after_walls():
+    maze = new_maze('kruskal', 2, 41)
+    graph, index = maze.get_corridor_graph(), maze.get_tree_index()
+    # 标记路径不改变墙的分布，缓存仍然有效
+    assert search(maze, tree=True) == fast_cost(maze, maze.origin_coor, maze.destination_coor)
+    assert maze.get_corridor_graph() is graph and maze.get_tree_index() is index
+    # 拆掉一面两侧都是通路的墙：完美迷宫中两侧本已连通，因此形成环
+    wall = next((x, y) for y in range(1, maze.width - 1) for x in range(1, maze.length - 1)
+                if maze.map.get(x, y) == MapGridType.MAP_BLOCK and len(open_neighbors(maze, x, y)) == 2)
+    maze.set_grid(wall[0], wall[1], MapGridType.MAP_EMPTY)
+    assert maze.get_corridor_graph() is not graph
+    assert not maze.get_tree_index().is_tree
+    rand = random.Random(2)
+    pairs = random_open_pairs(maze, rand, 20) + [(wall, maze.destination_coor), (maze.origin_coor, wall)]
+    for origin, destination in pairs:
+        maze.origin_coor, maze.destination_coor = origin, destination
+        cost = fast_cost(maze, origin, destination)
+        assert search(maze, tree=True) == search(maze, corridor=True) == cost
+    # 重新堵上这面墙后又是完美迷宫
+    maze.set_grid(wall[0], wall[1], MapGridType.MAP_BLOCK)
+    assert maze.get_tree_index().is_tree
+    for origin, destination in random_open_pairs(maze, rand, 20):
+        assert maze.get_tree_index().find_path(origin, destination)[1] == fast_cost(maze, origin, destination)
+
+
+# 分块世界：按需生成块、容量很小（块会被淘汰后重新生成）时，搜索得到的cost与在完整地图上的快速模式相同
+@pytest.mark.parametrize('diagonal', (False, True))
+def test_tiled_world_matches_full_grid(diagonal):
+    from MazeChunks import TileWorld
+
+    def full_grid(world):
+        grid = SearchRoute.TestMap(world.length, world.width)
+        for y in range(world.width):
+            for x in range(world.length):
+                if world.is_blocked(x, y):
+                    grid.set_grid(x, y, MapGridType.MAP_BLOCK)
+        return grid
+
+    world = TileWorld(seed=3, tile_size=6, cache_tiles=2, tiles_x=4, tiles_y=3)
+    grid = full_grid(TileWorld(seed=3, tile_size=6, tiles_x=4, tiles_y=3))
+    # 块的内容只由种子决定，淘汰后重新生成的结果不变
+    assert bytes(full_grid(world).map.buf) == bytes(grid.map.buf)
+    rand = random.Random(3)
+    cells = [(x, y) for y in range(1, world.width, 2) for x in range(1, world.length, 2)]
+    for _ in range(20):
+        world.origin_coor, world.destination_coor = rand.choice(cells), rand.choice(cells)
+        cost = search(world, diagonal=diagonal)
+        # 各块之间都打通了缝，整个世界是连通的
+        assert cost is not None
+        assert cost == fast_cost(grid, world.origin_coor, world.destination_coor, diagonal)
+        world.clear_overlay()
+    assert world.evictions > 0
+    assert len(world.tiles) <= world.cache_tiles
+
+
+# 距离场：从随机单元沿next_move走到终点的步数与快速模式的路径cost相同
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('generator', ('kruskal', 'cross'))
+def test_distance_field_moves(generator, seed):
+    moves = {'left': (-1, 0), 'right': (1, 0), 'up': (0, -1), 'down': (0, 1)}
+    maze = new_maze(generator, seed, 41)
+    # 有环的地图上距离场同样适用
+    rand = random.Random(seed)
+    for _ in range(10):
+        x, y = random_cell(maze, rand, MapGridType.MAP_EMPTY, MapGridType.MAP_PATH)
+        maze.set_grid(x, y, MapGridType.MAP_EMPTY)
+    field = maze.distance_field()
+    target = maze.destination_coor
+    for (x, y), _ in random_open_pairs(maze, rand, 20):
+        cost = fast_cost(maze, (x, y), target)
+        steps = 0
+        while (x, y) != target:
+            dx, dy = moves[field.next_move(x, y)]
+            x, y = x + dx, y + dy
+            assert maze.map.get(x, y) != MapGridType.MAP_BLOCK
+            steps += 1
+        assert steps == cost
+    assert field.next_move(*target) is None
+    # 逐个单元与整层（numpy）扩展得到的距离相同；距离相同的两个方向可任选其一，因此只检查下一步的距离少1
+    for vector_frontier in (1, maze.length * maze.width + 1):
+        other = DistanceField(maze.map, target, vector_frontier)
+        assert other.distance == field.distance
+        for y in range(maze.width):
+            for x in range(maze.length):
+                step = other.next_step(x, y)
+                if step is not None:
+                    assert other.get_distance(*step) == other.get_distance(x, y) - 1
+
+
+# 墙变化后缓存的距离场失效，重新建立
+def test_distance_field_invalidated():
+    maze = new_maze('kruskal', 1, 41)
+    field = maze.distance_field()
+    assert maze.distance_field() is field
+    # 标记路径不改变墙的分布
+    Astar(maze, fast=True).search()
+    assert maze.distance_field() is field
+    origin = maze.origin_coor
+    assert field.get_distance(*origin) == fast_cost(maze, origin, maze.destination_coor)
+    # 堵上起点的下一步后，起点不再可达
+    next_x, next_y = field.next_step(*origin)
+    maze.set_grid(next_x, next_y, MapGridType.MAP_BLOCK)
+    rebuilt = maze.distance_field()
+    assert rebuilt is not field
+    assert rebuilt.get_distance(*origin) is None and rebuilt.next_move(*origin) is None
+    maze.set_grid(next_x, next_y, MapGridType.MAP_EMPTY)
+    assert maze.distance_field().get_distance(*origin) == field.get_distance(*origin)
+
+
+# 搜索的统计信息：on_expand在每扩展一个单元时调用一次，第一个扩展的是起点（g值为0）；
+# 入堆次数不少于出堆次数，出堆的元素包括扩展的单元与过期的元素；按sample_every采样堆的大小
+@pytest.mark.parametrize('diagonal', (False, True))
+@pytest.mark.parametrize('options', ({}, {'open_list': 'indexed'}, {'fast': True}, {'bidirectional': True},
+                                     {'jump_point': True}, {'weight': 2}, {'anytime': True}))
+def test_search_stats(options, diagonal):
+    for test_map in random_maps(2):
+        calls = []
+        astar = Astar(test_map, diagonal=diagonal, on_expand=lambda x, y, g: calls.append((x, y, g)), sample_every=4,
+                      **options)
+        astar.search()
+        stats = astar.stats
+        assert len(calls) == stats.expanded > 0
+        assert calls[0] == test_map.origin_coor + (0,)
+        assert stats.pushes >= stats.pops >= stats.expanded + stats.stale_pops
+        assert stats.peak_open <= stats.pushes
+        assert len(stats.frontier) == stats.expanded // 4
+        assert list(stats.phases) == ['prepare', 'search', 'path']
+        for x, y, g in calls:
+            assert test_map.map.get(x, y) != MapGridType.MAP_BLOCK and g >= 0
+
+
+# 使用索引的模式只记录扩展数与耗时（树索引模式不做搜索，扩展数为0）
+@pytest.mark.parametrize('options', ({'corridor': True}, {'tree': True}, {'hierarchical': True},
+                                     {'incremental': True}))
+def test_index_search_stats(options):
+    maze = new_maze('kruskal', 1, 41)
+    calls = []
+    astar = Astar(maze, on_expand=lambda x, y, g: calls.append((x, y)), **options)
+    astar.search()
+    assert (astar.stats.expanded > 0) != ('tree' in options) and not calls
+    assert astar.stats.pushes == astar.stats.pops == 0
+    assert list(astar.stats.phases) == ['prepare', 'search', 'path']